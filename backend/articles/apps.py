@@ -8,3 +8,18 @@ class ArticlesConfig(AppConfig):
     def ready(self):
         """应用启动时导入 signals"""
         import articles.signals  # noqa
+
+        # 进程启动后的首个请求触发一次 slug 索引重建，本地全文索引缺失时一并重建（ready 中不能访问数据库）
+        from django.core.signals import request_started
+        request_started.connect(_rebuild_slug_index_once, dispatch_uid='articles_rebuild_slug_index')
+
+
+def _rebuild_slug_index_once(sender, **kwargs):
+    from django.core.signals import request_started
+    from search.fallback import LocalSearchIndex
+    from .lookup import ArticleSlugResolver
+
+    request_started.disconnect(dispatch_uid='articles_rebuild_slug_index')
+    ArticleSlugResolver.schedule_rebuild()
+    if not LocalSearchIndex.is_ready():
+        LocalSearchIndex.schedule_rebuild()
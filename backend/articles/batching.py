@@ -0,0 +1,126 @@
+"""
+按事务合并文章变更的副作用
+
+一次 API 调用中同一篇文章可能触发多次信号（创建时的 post_save、tags.set 的
+m2m_changed、补写 published_at 的第二次 post_save）。这里按事务收集变更的文章 ID：
+- 发件箱每篇文章每个事务只写一行（仍在事务内写入，保证与数据变更一起提交或回滚）
+- 缓存失效、相关文章标记在事务提交后按最终状态执行一次，并只投递一次发件箱消费任务
+
+不在事务中（自动提交，如 shell、Celery 任务、管理命令）时每次变更立即处理，行为与逐次处理相同
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleChangeBatch:
+    """单个事务内待处理的文章变更"""
+
+    # 挂在数据库连接上的属性名（连接是线程隔离的）
+    CONNECTION_ATTR = '_article_change_batch'
+
+    def __init__(self):
+        # 文章 ID -> 需要失效的 slug
+        self.articles: Dict[int, Set[str]] = {}
+        # 需要重算相关文章的 ID（删除的文章不需要）
+        self.related_ids: Set[int] = set()
+
+    # ============================================
+    # 收集
+    # ============================================
+
+    @classmethod
+    def current(cls) -> Tuple['ArticleChangeBatch', bool]:
+        """
+        获取当前事务的批次，不存在时创建（调用方在 add 之后注册提交回调）
+
+        事务（或保存点）回滚时 Django 会丢弃其中注册的回调，
+        此时连接上残留的批次已失效，需要重新创建
+
+        Returns:
+            tuple: (批次, 是否新建)
+        """
+        connection = transaction.get_connection()
+        batch = getattr(connection, cls.CONNECTION_ATTR, None)
+        if batch is not None and batch._is_pending(connection):
+            return batch, False
+
+        batch = cls()
+        setattr(connection, cls.CONNECTION_ATTR, batch)
+        return batch, True
+
+    def _is_pending(self, connection) -> bool:
+        """提交回调是否仍在等待执行"""
+        return any(item[1] == self.flush for item in connection.run_on_commit)
+
+    def add(self, article_ids: Iterable[int], slugs: Optional[Iterable[str]] = None,
+            related: bool = True) -> None:
+        """
+        记录文章变更
+
+        Args:
+            article_ids: 文章 ID
+            slugs: 需要失效详情缓存的 slug（当前及变更前的 slug）
+            related: 是否标记相关文章待重算
+        """
+        from .indexing import SearchIndexOutbox
+
+        new_ids = []
+        for article_id in article_ids:
+            if related:
+                self.related_ids.add(article_id)
+            if article_id not in self.articles:
+                self.articles[article_id] = set()
+                new_ids.append(article_id)
+            if slugs:
+                self.articles[article_id].update(slug for slug in slugs if slug)
+
+        # 发件箱行在事务内写入，同一事务内的后续变更无需重复写入
+        if new_ids:
+            SearchIndexOutbox.record(new_ids, schedule=False)
+
+    # ============================================
+    # 提交后执行
+    # ============================================
+
+    def flush(self) -> None:
+        """事务提交后：清理缓存、标记相关文章、投递一次发件箱消费"""
+        from .caching import ArticleDetailCache
+        from .indexing import SearchIndexOutbox
+        from .related import RelatedArticleEngine
+
+        connection = transaction.get_connection()
+        if getattr(connection, self.CONNECTION_ATTR, None) is self:
+            delattr(connection, self.CONNECTION_ATTR)
+
+        if not self.articles:
+            return
+
+        for article_id, slugs in self.articles.items():
+            ArticleDetailCache.invalidate(article_id, slugs=sorted(slugs) or None)
+
+        for article_id in self.related_ids:
+            RelatedArticleEngine.mark_dirty(article_id)
+
+        SearchIndexOutbox.schedule_drain()
+
+
+def record_article_changes(article_ids: Iterable[int], slugs: Optional[Iterable[str]] = None,
+                           related: bool = True) -> None:
+    """记录文章变更（同一事务内按文章 ID 合并）"""
+    if not transaction.get_connection().in_atomic_block:
+        # 自动提交：on_commit 会立即执行，没有可合并的事务，直接处理
+        batch = ArticleChangeBatch()
+        batch.add(article_ids, slugs=slugs, related=related)
+        batch.flush()
+        return
+
+    batch, created = ArticleChangeBatch.current()
+    batch.add(article_ids, slugs=slugs, related=related)
+    if created:
+        # 在 add 之后注册，回调执行时批次中一定有本次变更
+        transaction.on_commit(batch.flush)
@@ -0,0 +1,122 @@
+"""
+文章详情响应缓存
+
+缓存已发布文章序列化后的完整 payload，按 ID 和 slug 各存一份：
+1. 命中时只需一次 Redis GET，无需查询 MySQL 和序列化
+2. 失效由 articles/signals.py 中的 post_save / m2m_changed / post_delete 触发
+3. 回源前记录版本号，写入时版本号已变化则放弃写入，避免并发回源写入旧数据
+4. 统计字段（阅读/点赞/评论数）不依赖缓存内容，由视图从统计缓存实时覆盖
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache_utils import CacheKeyBuilder, get_many, set_many
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleDetailCache:
+    """文章详情 payload 缓存"""
+
+    @classmethod
+    def _payload_key(cls, lookup: Union[str, int]) -> str:
+        """根据查找值返回 payload 键（数字按 ID，其他按 slug）"""
+        if isinstance(lookup, int):
+            return CacheKeyBuilder.article_detail(lookup)
+        return CacheKeyBuilder.article_detail_slug(lookup)
+
+    @classmethod
+    def get(cls, lookup_value: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的详情 payload
+
+        与 get_object 的查找顺序一致：先按 slug，再按 ID
+
+        Args:
+            lookup_value: URL 中的 slug 或 ID
+
+        Returns:
+            dict: 序列化后的文章详情，未命中返回 None
+        """
+        keys = [cls._payload_key(lookup_value)]
+        if lookup_value.isdigit():
+            keys.append(cls._payload_key(int(lookup_value)))
+
+        try:
+            cached = get_many(keys)
+        except Exception as e:
+            logger.warning(f"读取文章详情缓存失败: {e}")
+            return None
+
+        for key in keys:
+            entry = cached.get(key)
+            if isinstance(entry, dict) and entry.get('data'):
+                return dict(entry['data'])
+        return None
+
+    @classmethod
+    def get_version(cls, lookup_value: Union[str, int]) -> int:
+        """
+        回源前读取版本号
+
+        Args:
+            lookup_value: URL 中的 slug 或 ID
+
+        Returns:
+            int: 当前版本号
+        """
+        try:
+            return cache.get(CacheKeyBuilder.article_detail_version(lookup_value), 0)
+        except Exception:
+            return -1
+
+    @classmethod
+    def set(cls, lookup_value: Union[str, int], version: int, data: Dict[str, Any]) -> bool:
+        """
+        写入详情 payload（同时写入 ID 和 slug 两个键）
+
+        Args:
+            lookup_value: 回源时使用的查找值
+            version: 回源前读取的版本号
+            data: 序列化后的文章详情
+
+        Returns:
+            bool: 是否写入
+        """
+        if version < 0 or cls.get_version(lookup_value) != version:
+            # 回源期间文章已被修改，放弃写入
+            return False
+
+        entry = {
+            'version': version,
+            'data': dict(data),
+        }
+        try:
+            set_many({
+                cls._payload_key(data['id']): entry,
+                cls._payload_key(data['slug']): entry,
+            }, ttl=settings.ARTICLE_DETAIL_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"写入文章 {data.get('id')} 详情缓存失败: {e}")
+            return False
+        return True
+
+    @classmethod
+    def invalidate(cls, article_id: int, slugs: Optional[List[str]] = None) -> None:
+        """
+        使文章详情缓存失效
+
+        Args:
+            article_id: 文章 ID
+            slugs: 当前及变更前的 slug
+        """
+        from utils.cache_utils import CacheWarmer
+
+        try:
+            CacheWarmer.invalidate_article(article_id, slugs=slugs)
+        except Exception as e:
+            logger.warning(f"清除文章 {article_id} 缓存失败: {e}")
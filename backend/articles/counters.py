@@ -0,0 +1,314 @@
+"""
+文章计数器写回缓冲
+
+阅读量不再在请求线程中直接 UPDATE 热点行：
+1. 读路径只在 Redis 中累加（每篇文章一个计数键 + 脏集合 + 阅读记录队列）
+2. Celery 定时任务批量写回 MySQL（单条 CASE UPDATE + bulk_create 阅读记录）；
+   阅读记录先整体移入处理中队列，写库提交后才删除，写回中途失败或进程退出不会丢失
+3. 超过最大延迟未写回时，由读路径触发一次异步写回
+"""
+
+import ipaddress
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+from utils.cache_utils import CacheKeyBuilder, CacheLock, delete_many
+
+logger = logging.getLogger(__name__)
+
+
+def _get_redis():
+    """获取原生 Redis 连接（需要 INCR/SPOP/LTRIM 等原子操作）"""
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def _normalize_ip(ip_address: Optional[str]) -> Optional[str]:
+    """校验 IP 地址，非法值返回 None（X-Forwarded-For 可能被伪造）"""
+    if not ip_address:
+        return None
+    try:
+        return str(ipaddress.ip_address(ip_address))
+    except ValueError:
+        return None
+
+
+class ViewCounterBuffer:
+    """阅读量写回缓冲（write-behind）"""
+
+    COUNT_PREFIX = "view_buffer_count"
+    DIRTY_SET = "view_buffer_dirty"
+    EVENT_LIST = "view_buffer_events"
+    EVENT_PROCESSING = "view_buffer_events_processing"
+    LAST_FLUSH = "view_buffer_last_flush"
+    FLUSH_TRIGGER_LOCK = "view_buffer_flush_trigger"
+    FLUSH_LOCK = "view_buffer_flush"
+
+    # 单次写回任务最多处理的批次数，避免任务长时间占用 worker
+    MAX_FLUSH_ROUNDS = 20
+    # 写回锁超时（秒），定时任务与读路径触发的写回不会同时处理同一批阅读记录
+    FLUSH_LOCK_TIMEOUT = 300
+
+    @classmethod
+    def count_key(cls, article_id: int) -> str:
+        """单篇文章的待写回阅读量键"""
+        return CacheKeyBuilder.build(cls.COUNT_PREFIX, article_id)
+
+    @classmethod
+    def _key(cls, name: str) -> str:
+        return CacheKeyBuilder.build(name)
+
+    @classmethod
+    def record(cls, article_id: int, ip_address: str = '', user_agent: str = '') -> int:
+        """
+        记录一次阅读
+
+        Args:
+            article_id: 文章 ID
+            ip_address: 访客 IP
+            user_agent: 访客 User Agent
+
+        Returns:
+            int: 该文章尚未写回 MySQL 的阅读量（Redis 不可用时直接写库并返回 0）
+        """
+        event = json.dumps({
+            'article_id': article_id,
+            'ip_address': ip_address or '',
+            'user_agent': (user_agent or '')[:500],
+        })
+        events_key = cls._key(cls.EVENT_LIST)
+
+        try:
+            redis_conn = _get_redis()
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.incr(cls.count_key(article_id))
+            pipe.sadd(cls._key(cls.DIRTY_SET), article_id)
+            pipe.rpush(events_key, event)
+            # 写回严重滞后时丢弃最旧的阅读记录，计数本身不受影响
+            pipe.ltrim(events_key, -settings.VIEW_EVENT_BUFFER_MAX, -1)
+            pipe.get(cls._key(cls.LAST_FLUSH))
+            pending, _, _, _, last_flush = pipe.execute()
+        except Exception as e:
+            logger.warning(f"阅读量缓冲不可用，直接写库: {e}")
+            from .models import Article
+            Article.objects.filter(pk=article_id).update(view_count=F('view_count') + 1)
+            return 0
+
+        cls._maybe_trigger_flush(last_flush)
+        return int(pending)
+
+    @classmethod
+    def get_pending(cls, article_ids: List[int]) -> Dict[int, int]:
+        """
+        批量获取尚未写回的阅读量
+
+        Args:
+            article_ids: 文章 ID 列表
+
+        Returns:
+            dict: {article_id: pending_count}
+        """
+        if not article_ids:
+            return {}
+
+        try:
+            values = _get_redis().mget([cls.count_key(aid) for aid in article_ids])
+        except Exception as e:
+            logger.debug(f"读取待写回阅读量失败: {e}")
+            return {}
+
+        return {
+            aid: int(value)
+            for aid, value in zip(article_ids, values)
+            if value
+        }
+
+    @classmethod
+    def _maybe_trigger_flush(cls, last_flush) -> None:
+        """超过最大延迟仍未写回时，异步触发一次写回（同一时间只触发一次）"""
+        max_lag = settings.VIEW_COUNTER_MAX_LAG
+        if last_flush is not None and time.time() - float(last_flush) < max_lag:
+            return
+
+        if not CacheLock.acquire(cls._key(cls.FLUSH_TRIGGER_LOCK), timeout=max_lag):
+            return
+
+        try:
+            from .tasks import flush_view_counters
+            flush_view_counters.delay()
+        except Exception as e:
+            logger.warning(f"触发阅读量写回任务失败: {e}")
+
+    @classmethod
+    def flush(cls, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        将缓冲的阅读量写回 MySQL
+
+        Args:
+            batch_size: 每批处理的文章数，默认使用配置
+
+        Returns:
+            dict: 写回结果统计（其他写回正在进行时各项为 0）
+        """
+        lock_key = cls._key(cls.FLUSH_LOCK)
+        if not CacheLock.acquire(lock_key, timeout=cls.FLUSH_LOCK_TIMEOUT):
+            return {'articles': 0, 'views': 0, 'events': 0}
+        try:
+            return cls._flush(batch_size or settings.VIEW_COUNTER_FLUSH_BATCH_SIZE)
+        finally:
+            CacheLock.release(lock_key)
+
+    @classmethod
+    def _flush(cls, batch_size: int) -> Dict[str, int]:
+        redis_conn = _get_redis()
+
+        articles_updated = 0
+        views_flushed = 0
+        for _ in range(cls.MAX_FLUSH_ROUNDS):
+            deltas = cls._drain_counts(redis_conn, batch_size)
+            if not deltas:
+                break
+            cls._apply_counts(redis_conn, deltas)
+            articles_updated += len(deltas)
+            views_flushed += sum(deltas.values())
+
+        events_saved = 0
+        for _ in range(cls.MAX_FLUSH_ROUNDS):
+            saved = cls._drain_events(redis_conn, batch_size)
+            events_saved += saved
+            if saved < batch_size:
+                break
+
+        redis_conn.set(cls._key(cls.LAST_FLUSH), time.time())
+
+        return {
+            'articles': articles_updated,
+            'views': views_flushed,
+            'events': events_saved,
+        }
+
+    @classmethod
+    def _drain_counts(cls, redis_conn, batch_size: int) -> Dict[int, int]:
+        """从脏集合中取出一批文章并原子地读取并清零其计数"""
+        article_ids = redis_conn.spop(cls._key(cls.DIRTY_SET), batch_size)
+        if not article_ids:
+            return {}
+
+        article_ids = [int(aid) for aid in article_ids]
+        pipe = redis_conn.pipeline(transaction=True)
+        for aid in article_ids:
+            key = cls.count_key(aid)
+            pipe.get(key)
+            pipe.delete(key)
+        results = pipe.execute()
+
+        # 结果按 (get, delete) 交替排列
+        deltas = {}
+        for aid, value in zip(article_ids, results[::2]):
+            if value and int(value) > 0:
+                deltas[aid] = int(value)
+        return deltas
+
+    @classmethod
+    def _apply_counts(cls, redis_conn, deltas: Dict[int, int]) -> None:
+        """单条 CASE UPDATE 批量写回阅读量，失败时将计数退回 Redis"""
+        from .models import Article
+
+        increment = Case(
+            *[When(pk=aid, then=Value(delta)) for aid, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+        try:
+            Article.objects.filter(pk__in=list(deltas)).update(
+                view_count=F('view_count') + increment
+            )
+        except Exception as e:
+            logger.error(f"阅读量写回 MySQL 失败，退回缓冲: {e}")
+            pipe = redis_conn.pipeline(transaction=False)
+            for aid, delta in deltas.items():
+                pipe.incrby(cls.count_key(aid), delta)
+                pipe.sadd(cls._key(cls.DIRTY_SET), aid)
+            pipe.execute()
+            raise
+
+        # 写回后统计缓存需要重新加载，热门 feed 同步累加，ES 计数字段待同步
+        delete_many([CacheKeyBuilder.article_stats(aid) for aid in deltas])
+
+        from .feeds import RankedFeed
+        from .indexing import SearchCounterSync
+        RankedFeed.incr_views(deltas)
+        SearchCounterSync.mark(deltas)
+
+    @classmethod
+    def _claim_events(cls, redis_conn) -> str:
+        """
+        处理中队列为空时，将待写回的阅读记录整体 RENAME 为处理中队列
+
+        上次写回未处理完（失败或进程退出）的记录留在处理中队列中，优先处理
+
+        Returns:
+            str: 处理中队列的键
+        """
+        from redis.exceptions import ResponseError
+
+        processing_key = cls._key(cls.EVENT_PROCESSING)
+        if not redis_conn.exists(processing_key):
+            try:
+                redis_conn.renamenx(cls._key(cls.EVENT_LIST), processing_key)
+            except ResponseError:
+                # 没有待写回的阅读记录
+                pass
+        return processing_key
+
+    @classmethod
+    def _drain_events(cls, redis_conn, batch_size: int) -> int:
+        """
+        取出一批阅读记录并批量插入 ArticleView
+
+        记录在插入提交后才从处理中队列删除：写库失败时保留到下次重试，
+        插入后、删除前进程退出时会重复写入这一批（至少一次）
+        """
+        from django.db import transaction
+        from .models import Article, ArticleView
+
+        processing_key = cls._claim_events(redis_conn)
+        raw_events = redis_conn.lrange(processing_key, 0, batch_size - 1)
+        if not raw_events:
+            return 0
+
+        events = []
+        for raw in raw_events:
+            try:
+                events.append(json.loads(raw))
+            except (TypeError, ValueError):
+                continue
+
+        # 过滤掉写回前已被删除的文章，避免外键错误
+        existing_ids = set(
+            Article.objects.filter(
+                pk__in={event['article_id'] for event in events}
+            ).values_list('pk', flat=True)
+        )
+
+        views = [
+            ArticleView(
+                article_id=event['article_id'],
+                ip_address=_normalize_ip(event.get('ip_address')),
+                user_agent=event.get('user_agent', ''),
+            )
+            for event in events
+            if event['article_id'] in existing_ids
+        ]
+        with transaction.atomic():
+            ArticleView.objects.bulk_create(views, batch_size=batch_size)
+
+        # 列表被取空时 Redis 自动删除该键
+        redis_conn.ltrim(processing_key, len(raw_events), -1)
+        return len(raw_events)
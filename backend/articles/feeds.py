@@ -0,0 +1,258 @@
+"""
+预计算的排行 feed（热门 / 精选）
+
+每个 feed 是一个 Redis 有序集合（成员为文章 ID）：
+- popular: 分数为阅读量，由阅读量写回任务增量更新
+- featured: 分数为发布时间戳，由文章保存/删除信号维护
+
+请求只需 ZREVRANGE 取出一页 ID，再按主键批量查询，不再对整张文章表排序。
+PopularArticles 表保存 feed 的持久化快照，Redis 数据丢失时先用快照响应，
+同时异步从 MySQL 重建。
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from utils.cache_utils import CacheKeyBuilder, CacheLock
+
+logger = logging.getLogger(__name__)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class RankedFeed:
+    """Redis 有序集合维护的文章排行"""
+
+    POPULAR = 'popular'
+    FEATURED = 'featured'
+    FEEDS = (POPULAR, FEATURED)
+
+    KEY_PREFIX = "ranked_feed"
+    REBUILD_LOCK_TIMEOUT = 300
+
+    @classmethod
+    def key(cls, name: str) -> str:
+        """feed 有序集合键"""
+        return CacheKeyBuilder.build(cls.KEY_PREFIX, name)
+
+    @classmethod
+    def snapshot_period(cls, name: str) -> str:
+        """feed 对应的 PopularArticles 快照周期"""
+        from stats.models import PopularArticles
+        return {
+            cls.POPULAR: PopularArticles.Period.FEED_POPULAR,
+            cls.FEATURED: PopularArticles.Period.FEED_FEATURED,
+        }[name]
+
+    @classmethod
+    def _featured_score(cls, article) -> float:
+        published = article.published_at or article.created_at
+        return published.timestamp() if published else 0
+
+    # ============================================
+    # 读取
+    # ============================================
+
+    @classmethod
+    def page(cls, name: str, offset: int, limit: int) -> Optional[Tuple[List[int], bool]]:
+        """
+        读取一页文章 ID
+
+        Args:
+            name: feed 名称
+            offset: 偏移量
+            limit: 数量
+
+        Returns:
+            tuple: (文章 ID 列表, 是否还有下一页)；feed 不可用时返回 None
+        """
+        try:
+            redis_conn = _get_redis()
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.exists(cls.key(name))
+            pipe.zrevrange(cls.key(name), offset, offset + limit)
+            exists, members = pipe.execute()
+        except Exception as e:
+            logger.warning(f"读取 {name} feed 失败: {e}")
+            return None
+
+        if not exists:
+            # Redis 中没有 feed：触发异步重建，先用持久化快照响应
+            cls._schedule_rebuild(name)
+            return cls._page_from_snapshot(name, offset, limit)
+
+        ids = [int(member) for member in members]
+        return ids[:limit], len(ids) > limit
+
+    @classmethod
+    def _page_from_snapshot(cls, name: str, offset: int, limit: int) -> Optional[Tuple[List[int], bool]]:
+        from stats.models import PopularArticles
+
+        snapshot = PopularArticles.objects.filter(period=cls.snapshot_period(name)).first()
+        if snapshot is None or not snapshot.article_ids:
+            return None
+
+        ids = snapshot.article_ids[offset:offset + limit + 1]
+        return ids[:limit], len(ids) > limit
+
+    # ============================================
+    # 增量维护
+    # ============================================
+
+    @classmethod
+    def sync_article(cls, article) -> None:
+        """
+        文章保存后更新 feed 成员（发布/撤回发布/取消精选）
+
+        Args:
+            article: Article 实例
+        """
+        try:
+            redis_conn = _get_redis()
+            popular_key = cls.key(cls.POPULAR)
+            featured_key = cls.key(cls.FEATURED)
+
+            # feed 尚未构建时不做增量写入，避免产生不完整的 feed
+            popular_exists, featured_exists = redis_conn.exists(popular_key), redis_conn.exists(featured_key)
+
+            pipe = redis_conn.pipeline(transaction=False)
+            if article.is_published:
+                if popular_exists:
+                    # 阅读量以 Redis 中较大的值为准（写回任务可能已先行累加）
+                    pipe.zadd(popular_key, {article.pk: article.view_count}, gt=True)
+                if featured_exists:
+                    if article.featured:
+                        pipe.zadd(featured_key, {article.pk: cls._featured_score(article)})
+                    else:
+                        pipe.zrem(featured_key, article.pk)
+            else:
+                pipe.zrem(popular_key, article.pk)
+                pipe.zrem(featured_key, article.pk)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"更新文章 {article.pk} 的排行 feed 失败: {e}")
+
+    @classmethod
+    def remove_article(cls, article_id: int) -> None:
+        """文章删除后从所有 feed 中移除"""
+        try:
+            pipe = _get_redis().pipeline(transaction=False)
+            for name in cls.FEEDS:
+                pipe.zrem(cls.key(name), article_id)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"从排行 feed 移除文章 {article_id} 失败: {e}")
+
+    @classmethod
+    def incr_views(cls, deltas: Dict[int, int]) -> None:
+        """
+        阅读量写回后同步增加热门 feed 分数（只更新已在 feed 中的文章）
+
+        Args:
+            deltas: {article_id: 新增阅读量}
+        """
+        if not deltas:
+            return
+
+        try:
+            pipe = _get_redis().pipeline(transaction=False)
+            key = cls.key(cls.POPULAR)
+            for article_id, delta in deltas.items():
+                pipe.zadd(key, {article_id: delta}, xx=True, incr=True)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"更新热门 feed 分数失败: {e}")
+
+    # ============================================
+    # 重建与快照
+    # ============================================
+
+    @classmethod
+    def _schedule_rebuild(cls, name: str) -> None:
+        lock_key = CacheKeyBuilder.build(cls.KEY_PREFIX, name, 'rebuild_lock')
+        if not CacheLock.acquire(lock_key, timeout=cls.REBUILD_LOCK_TIMEOUT):
+            return
+        try:
+            from .tasks import rebuild_ranked_feed
+            rebuild_ranked_feed.delay(name)
+        except Exception as e:
+            logger.warning(f"触发 {name} feed 重建失败: {e}")
+
+    @classmethod
+    def rebuild(cls, name: str) -> int:
+        """
+        从 MySQL 全量重建 feed（写入临时键后原子 RENAME）
+
+        Args:
+            name: feed 名称
+
+        Returns:
+            int: feed 中的文章数
+        """
+        from .models import Article
+
+        queryset = Article.objects.filter(status=Article.ArticleStatus.PUBLISHED)
+        if name == cls.POPULAR:
+            rows = queryset.values_list('id', 'view_count').iterator(chunk_size=2000)
+            scores = ((article_id, view_count) for article_id, view_count in rows)
+        elif name == cls.FEATURED:
+            rows = queryset.filter(featured=True).only('id', 'published_at', 'created_at')
+            scores = ((article.pk, cls._featured_score(article)) for article in rows.iterator(chunk_size=2000))
+        else:
+            raise ValueError(f'未知的 feed: {name}')
+
+        redis_conn = _get_redis()
+        key = cls.key(name)
+        tmp_key = f"{key}:rebuild"
+        redis_conn.delete(tmp_key)
+
+        total = 0
+        batch = {}
+        for article_id, score in scores:
+            batch[article_id] = score
+            if len(batch) >= 1000:
+                redis_conn.zadd(tmp_key, batch)
+                total += len(batch)
+                batch = {}
+        if batch:
+            redis_conn.zadd(tmp_key, batch)
+            total += len(batch)
+
+        if total:
+            redis_conn.rename(tmp_key, key)
+        else:
+            # 空 feed 无法用有序集合表示，删除旧键即可（下次请求回退到 MySQL）
+            redis_conn.delete(key)
+
+        return total
+
+    @classmethod
+    def snapshot(cls, name: str, size: Optional[int] = None) -> int:
+        """
+        将 feed 前 N 名写入 PopularArticles 作为持久化快照
+
+        Args:
+            name: feed 名称
+            size: 快照数量，默认使用 RANKED_FEED_SNAPSHOT_SIZE
+
+        Returns:
+            int: 快照中的文章数
+        """
+        from stats.models import PopularArticles
+
+        size = size or settings.RANKED_FEED_SNAPSHOT_SIZE
+        members = _get_redis().zrevrange(cls.key(name), 0, size - 1)
+        article_ids = [int(member) for member in members]
+        if not article_ids:
+            return 0
+
+        PopularArticles.objects.update_or_create(
+            period=cls.snapshot_period(name),
+            defaults={'article_ids': article_ids}
+        )
+        return len(article_ids)
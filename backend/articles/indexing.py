@@ -0,0 +1,553 @@
+"""
+文章搜索索引同步
+
+文章保存原先在请求线程中同步调用 ES（get + update，失败时 sleep 重试），
+ES 变慢会直接拖慢文章保存。这里改为事务性发件箱：
+1. 信号在保存所在的事务中写入 ArticleIndexOutbox 行
+2. 事务提交后（on_commit）投递 Celery 消费任务，定时任务兜底
+3. 消费者批量取出发件箱，同一文章的多次变更合并为一次，
+   按数据库中的最新状态生成 index / delete 动作，通过 bulk API 一次提交
+"""
+
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from search.cache import SearchResultCache
+from search.fallback import LocalSearchIndex
+from utils.cache_utils import CacheKeyBuilder, CacheLock
+
+logger = logging.getLogger(__name__)
+
+
+def suggest_weight(view_count: int, like_count: int, comment_count: int) -> int:
+    """搜索建议权重：热度取对数，避免少数爆款文章压过所有前缀匹配"""
+    popularity = (view_count or 0) + 5 * (like_count or 0) + 10 * (comment_count or 0)
+    return int(math.log1p(popularity) * 100)
+
+
+def build_title_suggest(instance, tag_names: List[str]) -> Dict[str, Any]:
+    """
+    搜索建议字段：标题和标签都可作为补全前缀，返回时取文档标题
+
+    Args:
+        instance: Article 模型实例
+        tag_names: 标签名称
+
+    Returns:
+        dict: completion 字段值 {'input': [...], 'weight': int}
+    """
+    inputs = [instance.title] if instance.title else []
+    inputs.extend(name for name in tag_names if name and name not in inputs)
+    return {
+        'input': inputs,
+        'weight': suggest_weight(instance.view_count, instance.like_count, instance.comment_count),
+    }
+
+
+def prepare_article_document(instance) -> Dict[str, Any]:
+    """
+    准备 ES 文档数据
+
+    Args:
+        instance: Article 模型实例
+
+    Returns:
+        dict: ES 文档数据
+    """
+    # 标签只查询一次（预取时不产生额外查询）
+    tags = list(instance.tags.all())
+
+    data = {
+        'id': instance.id,
+        'title': instance.title or '',
+        'title_suggest': build_title_suggest(instance, [tag.name for tag in tags]),
+        'description': instance.description or '',
+        'content': (instance.plain_text or '')[:50000],
+        'slug': instance.slug or '',
+        'author_username': instance.author.username if instance.author else '',
+        'author_nickname': instance.author.nickname if instance.author and hasattr(instance.author, 'nickname') else '',
+        'category_name': instance.category.name if instance.category else '',
+        'category_slug': instance.category.slug if instance.category else '',
+        'tags_names': [tag.name for tag in tags],
+        'tags_slugs': [tag.slug for tag in tags],
+        'locale': instance.locale or 'zh',
+        'status': instance.status,
+        'featured': instance.featured or False,
+        'reading_time': instance.reading_time or 0,
+        'cover_image': instance.cover_image or '',
+        'published_at': instance.published_at,
+        'created_at': instance.created_at,
+        'updated_at': instance.updated_at,
+        'stars': instance.stars or 0,
+        'forks': instance.forks or 0,
+        'repo': instance.repo or '',
+        'demo': instance.demo or '',
+        'tech_stack': instance.tech_stack or [],
+        'project_status': instance.project_status or '',
+        # 添加统计字段
+        'view_count': instance.view_count or 0,
+        'like_count': instance.like_count or 0,
+        'comment_count': instance.comment_count or 0,
+    }
+    return data
+
+
+def _get_es_client():
+    from search.models import ArticleDocument
+    return ArticleDocument._get_connection()
+
+
+def _index_name() -> str:
+    from search.models import ArticleDocument
+    return ArticleDocument._index._name
+
+
+def build_bulk_actions(article_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """
+    按数据库中的最新状态生成 bulk 动作
+
+    已发布的文章生成 index 动作，其余（未发布/已删除）生成 delete 动作
+
+    Args:
+        article_ids: 文章 ID
+
+    Returns:
+        list: bulk 动作列表
+    """
+    from .models import Article
+
+    article_ids = set(article_ids)
+    index_name = _index_name()
+
+    published = (
+        Article.objects.filter(pk__in=article_ids, status=Article.ArticleStatus.PUBLISHED)
+        .select_related('author', 'category')
+        .prefetch_related('tags')
+    )
+
+    actions = []
+    for article in published:
+        actions.append({
+            '_op_type': 'index',
+            '_index': index_name,
+            '_id': article.pk,
+            '_source': prepare_article_document(article),
+        })
+        article_ids.discard(article.pk)
+
+    for article_id in article_ids:
+        actions.append({
+            '_op_type': 'delete',
+            '_index': index_name,
+            '_id': article_id,
+        })
+
+    # 蓝绿重建进行中时同时写入新索引
+    from search.reindex import BlueGreenReindex
+    target = BlueGreenReindex.current_target()
+    if target:
+        actions += [dict(action, _index=target) for action in actions]
+
+    return actions
+
+
+def sync_articles(article_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    通过一次 bulk 请求同步文章到 ES
+
+    Args:
+        article_ids: 文章 ID
+
+    Returns:
+        dict: {'indexed': 写入数, 'deleted': 删除数, 'failed': 失败数, 'failed_ids': 失败的文章 ID}
+
+    Raises:
+        SearchUnavailable: ES 熔断中
+        Exception: ES 请求失败
+    """
+    from elasticsearch.helpers import bulk
+    from search.execution import call_es
+
+    all_actions = build_bulk_actions(article_ids)
+    if not all_actions:
+        return {'indexed': 0, 'deleted': 0, 'failed': 0, 'failed_ids': []}
+
+    live_index = _index_name()
+    actions = [action for action in all_actions if action['_index'] == live_index]
+    rebuild_actions = [action for action in all_actions if action['_index'] != live_index]
+
+    # wait_for：请求返回时变更已可被搜索到，随后递增的索引代数不会缓存到旧结果
+    _, errors = call_es(
+        bulk, _get_es_client(), actions,
+        raise_on_error=False, raise_on_exception=True, refresh='wait_for'
+    )
+
+    # 重建中的新索引关闭了 refresh，wait_for 会一直阻塞到超时，单独发送且不等待刷新；
+    # 写入失败只记录日志，由重建的补齐阶段重新写入
+    if rebuild_actions:
+        try:
+            _, rebuild_errors = call_es(
+                bulk, _get_es_client(), rebuild_actions,
+                raise_on_error=False, raise_on_exception=True
+            )
+            for error in rebuild_errors:
+                logger.warning(f"双写重建索引失败: {error}")
+        except Exception as e:
+            logger.warning(f"双写重建索引失败: {e}")
+
+    # 删除不存在的文档返回 404，视为成功
+    failed_ids = []
+    for error in errors:
+        op_type, info = next(iter(error.items()))
+        if op_type == 'delete' and info.get('status') == 404:
+            continue
+        logger.error(f"同步文章到 ES 失败: {error}")
+        failed_ids.append(int(info['_id']))
+
+    if len(failed_ids) < len(actions):
+        SearchResultCache.bump()
+
+    return {
+        'indexed': sum(1 for action in actions if action['_op_type'] == 'index'),
+        'deleted': sum(1 for action in actions if action['_op_type'] == 'delete'),
+        'failed': len(failed_ids),
+        'failed_ids': failed_ids,
+    }
+
+
+def indexing_queryset(article_ids: Optional[Iterable[int]] = None):
+    """
+    待索引的已发布文章查询集（按主键排序，预取关联对象）
+
+    Args:
+        article_ids: 只包含这些文章，None 表示全部
+    """
+    from .models import Article
+
+    queryset = Article.objects.filter(status=Article.ArticleStatus.PUBLISHED)
+    if article_ids is not None:
+        queryset = queryset.filter(pk__in=list(article_ids))
+    return queryset.select_related('author', 'category').prefetch_related('tags').order_by('pk')
+
+
+def iter_index_actions(queryset, index_name: Optional[str] = None,
+                       chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    流式生成 index 动作（iterator 分块读取，每块一次预取标签）
+
+    Args:
+        queryset: indexing_queryset 返回的查询集
+        index_name: 目标索引，默认为当前索引（别名）
+        chunk_size: 每次从数据库读取的行数
+    """
+    index_name = index_name or _index_name()
+    for article in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            '_op_type': 'index',
+            '_index': index_name,
+            '_id': article.pk,
+            '_source': prepare_article_document(article),
+        }
+
+
+def stream_index(queryset, index_name: Optional[str] = None, chunk_size: Optional[int] = None,
+                 thread_count: Optional[int] = None, **bulk_kwargs) -> Dict[str, Any]:
+    """
+    以流水线方式批量写入 ES：数据库分块读取 → 文档准备 → parallel_bulk 多线程提交
+
+    Args:
+        queryset: indexing_queryset 返回的查询集
+        index_name: 目标索引，默认为当前索引（别名）
+        chunk_size: 每个 bulk 请求的文档数，默认使用 ES_BULK_CHUNK_SIZE
+        thread_count: 并发 bulk 线程数，默认使用 ES_BULK_THREAD_COUNT
+        **bulk_kwargs: 透传给 parallel_bulk 的其他参数
+
+    Returns:
+        dict: {'indexed', 'failed', 'failed_ids', 'elapsed', 'docs_per_second'}
+    """
+    from elasticsearch.helpers import parallel_bulk
+
+    chunk_size = chunk_size or settings.ES_BULK_CHUNK_SIZE
+    thread_count = thread_count or settings.ES_BULK_THREAD_COUNT
+
+    actions = iter_index_actions(queryset, index_name=index_name, chunk_size=chunk_size)
+    results = parallel_bulk(
+        _get_es_client(),
+        actions,
+        thread_count=thread_count,
+        chunk_size=chunk_size,
+        raise_on_error=False,
+        raise_on_exception=False,
+        **bulk_kwargs
+    )
+
+    started = chunk_started = time.monotonic()
+    indexed = 0
+    failed_ids = []
+    processed = 0
+    for ok, info in results:
+        processed += 1
+        if ok:
+            indexed += 1
+        else:
+            failed_ids.append(int(next(iter(info.values())).get('_id')))
+            logger.error(f"批量索引失败: {info}")
+
+        if processed % chunk_size == 0:
+            now = time.monotonic()
+            logger.info(
+                f"已索引 {processed} 篇文章，当前批次 {chunk_size / max(now - chunk_started, 1e-6):.0f} 篇/秒"
+            )
+            chunk_started = now
+
+    elapsed = time.monotonic() - started
+
+    # 写入当前索引时刷新后递增索引代数，使搜索结果缓存失效（重建中的新索引在切换别名时处理）
+    if index_name is None and indexed:
+        _get_es_client().indices.refresh(index=_index_name())
+        SearchResultCache.bump()
+
+    return {
+        'indexed': indexed,
+        'failed': len(failed_ids),
+        'failed_ids': failed_ids,
+        'elapsed': round(elapsed, 2),
+        'docs_per_second': round(processed / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+class SearchIndexOutbox:
+    """搜索索引发件箱"""
+
+    DRAIN_LOCK = "search_outbox_drain"
+
+    @classmethod
+    def record(cls, article_ids: Iterable[int], schedule: bool = True) -> None:
+        """
+        在当前事务中记录文章变更，提交后触发消费
+
+        Args:
+            article_ids: 文章 ID
+            schedule: 是否注册提交后的消费任务（按事务合并时由调用方统一投递）
+        """
+        from .models import ArticleIndexOutbox
+
+        rows = [ArticleIndexOutbox(article_id=article_id) for article_id in set(article_ids)]
+        if not rows:
+            return
+
+        ArticleIndexOutbox.objects.bulk_create(rows)
+        if schedule:
+            transaction.on_commit(cls.schedule_drain)
+
+    @classmethod
+    def schedule_drain(cls) -> None:
+        """投递消费任务（失败时由定时任务兜底）"""
+        try:
+            from .tasks import drain_search_outbox
+            drain_search_outbox.delay()
+        except Exception as e:
+            logger.warning(f"触发索引发件箱消费失败: {e}")
+
+    @classmethod
+    def drain(cls, batch_size: int = None, max_batches: int = 20) -> Dict[str, int]:
+        """
+        批量消费发件箱
+
+        同一时间只有一个消费者；ES 请求失败时保留发件箱行并抛出异常
+
+        Args:
+            batch_size: 每批读取的发件箱行数
+            max_batches: 单次最多处理的批次数
+
+        Returns:
+            dict: 消费统计
+        """
+        from .models import ArticleIndexOutbox
+
+        batch_size = batch_size or settings.SEARCH_OUTBOX_BATCH_SIZE
+        lock_key = CacheKeyBuilder.build(cls.DRAIN_LOCK)
+        if not CacheLock.acquire(lock_key, timeout=300):
+            return {'rows': 0, 'articles': 0, 'skipped': 1}
+
+        totals = {'rows': 0, 'articles': 0, 'indexed': 0, 'deleted': 0, 'failed': 0}
+        try:
+            for _ in range(max_batches):
+                rows = list(
+                    ArticleIndexOutbox.objects.order_by('id').values_list('id', 'article_id')[:batch_size]
+                )
+                if not rows:
+                    break
+
+                # 合并同一文章的多次变更
+                article_ids = {article_id for _, article_id in rows}
+
+                # 先更新本地降级索引：ES 不可用时降级查询同样能看到最新内容
+                try:
+                    LocalSearchIndex.update(article_ids)
+                except Exception as e:
+                    logger.warning(f"更新本地全文索引失败: {e}")
+
+                result = sync_articles(article_ids)
+
+                # 按 ID 精确删除（不能用 id__lte：更小 ID 的行可能属于尚未提交的事务）
+                with transaction.atomic():
+                    ArticleIndexOutbox.objects.filter(id__in=[row_id for row_id, _ in rows]).delete()
+                    # 单个文档失败时重新入队，等待下次重试
+                    ArticleIndexOutbox.objects.bulk_create([
+                        ArticleIndexOutbox(article_id=article_id) for article_id in result['failed_ids']
+                    ])
+
+                totals['rows'] += len(rows)
+                totals['articles'] += len(article_ids)
+                for key in ('indexed', 'deleted', 'failed'):
+                    totals[key] += result[key]
+
+                if len(rows) < batch_size:
+                    break
+        finally:
+            CacheLock.release(lock_key)
+
+        return totals
+
+
+class SearchCounterSync:
+    """
+    统计字段的增量同步
+
+    阅读量/点赞数变化时只记录文章 ID，定时任务用 partial update 一次 bulk
+    只更新计数字段，无需重新提交包含正文的完整文档
+    """
+
+    DIRTY_SET = "es_counter_dirty"
+    COUNTER_FIELDS = ('view_count', 'like_count', 'comment_count')
+    # 与文章完整索引并发写入同一文档时的版本冲突重试次数
+    RETRY_ON_CONFLICT = 3
+
+    # 更新计数字段，同时刷新搜索建议的热度权重（completion 字段不能只提交 weight）
+    UPDATE_SCRIPT = (
+        "ctx._source.putAll(params.doc); "
+        "if (ctx._source.title_suggest != null) { ctx._source.title_suggest.weight = params.weight; }"
+    )
+
+    @classmethod
+    def _dirty_key(cls) -> str:
+        return CacheKeyBuilder.build(cls.DIRTY_SET)
+
+    @classmethod
+    def mark(cls, article_ids: Iterable[int]) -> None:
+        """记录计数发生变化的文章"""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return
+        try:
+            from django_redis import get_redis_connection
+            get_redis_connection("default").sadd(cls._dirty_key(), *article_ids)
+        except Exception as e:
+            logger.debug(f"记录计数变更失败: {e}")
+
+    @classmethod
+    def flush(cls, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        将计数变化同步到 ES（每批一次 bulk 请求）
+
+        写入失败的文章放回脏集合，由下一次同步重试；请求整体失败时放回整批
+
+        Returns:
+            dict: {'updated': 更新数, 'missing': 索引中不存在的文档数, 'failed': 失败的文章数}
+
+        Raises:
+            SearchUnavailable: ES 熔断中
+            Exception: ES 请求失败
+        """
+        from django_redis import get_redis_connection
+        from search.reindex import BlueGreenReindex
+
+        batch_size = batch_size or settings.ES_BULK_CHUNK_SIZE
+        redis_conn = get_redis_connection("default")
+        index_names = [_index_name()]
+        target = BlueGreenReindex.current_target()
+        if target:
+            index_names.append(target)
+
+        totals = {'updated': 0, 'missing': 0, 'failed': 0}
+        # 本轮失败的文章在循环结束后才放回，避免同一轮内反复取出
+        failed_ids = set()
+        while True:
+            members = redis_conn.spop(cls._dirty_key(), batch_size)
+            if not members:
+                break
+            article_ids = [int(member) for member in members]
+
+            try:
+                success, errors = cls._sync_batch(article_ids, index_names)
+            except Exception:
+                # 放回脏集合，下次重试
+                redis_conn.sadd(cls._dirty_key(), *article_ids, *failed_ids)
+                raise
+
+            # 文档不存在（尚未索引）时忽略，完整索引时会带上最新计数
+            for error in errors:
+                info = next(iter(error.values()))
+                if info.get('status') == 404:
+                    totals['missing'] += 1
+                    continue
+                logger.warning(f"同步计数到 ES 失败: {error}")
+                failed_ids.add(int(info['_id']))
+
+            totals['updated'] += success
+
+            if len(article_ids) < batch_size:
+                break
+
+        if failed_ids:
+            redis_conn.sadd(cls._dirty_key(), *failed_ids)
+        totals['failed'] = len(failed_ids)
+        return totals
+
+    @classmethod
+    def _sync_batch(cls, article_ids: List[int], index_names: List[str]):
+        """
+        读取一批文章的计数，通过熔断器发送 partial update
+
+        Returns:
+            tuple: (成功数, 失败条目)
+        """
+        from elasticsearch.helpers import bulk
+        from search.execution import call_es
+        from .models import Article
+
+        rows = Article.objects.filter(
+            pk__in=article_ids,
+            status=Article.ArticleStatus.PUBLISHED
+        ).values('id', *cls.COUNTER_FIELDS)
+
+        actions = [
+            {
+                '_op_type': 'update',
+                '_index': index_name,
+                '_id': row['id'],
+                'retry_on_conflict': cls.RETRY_ON_CONFLICT,
+                'script': {
+                    'source': cls.UPDATE_SCRIPT,
+                    'params': {
+                        'doc': {field: row[field] for field in cls.COUNTER_FIELDS},
+                        'weight': suggest_weight(*(row[field] for field in cls.COUNTER_FIELDS)),
+                    },
+                },
+            }
+            for row in rows
+            for index_name in index_names
+        ]
+        if not actions:
+            return 0, []
+
+        return call_es(
+            bulk, _get_es_client(), actions,
+            raise_on_error=False, raise_on_exception=True
+        )
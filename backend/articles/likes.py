@@ -0,0 +1,206 @@
+"""
+文章点赞
+
+点赞/取消点赞原先需要 exists 检查、插入、计数 UPDATE 和 refresh_from_db 四次往返，
+并发的重复点击会越过 exists 检查重复插入。这里改为幂等操作：
+1. 依赖 (article, user) / (article, ip_address) 唯一索引，冲突时忽略插入
+   （INSERT ... SELECT 同时校验文章存在且已发布）。唯一索引不约束 NULL，
+   无法识别 IP 的匿名请求直接拒绝
+2. 只有真正插入/删除了记录才在同一事务中更新计数
+3. MySQL 下通过 LAST_INSERT_ID(expr) 在 UPDATE 中直接取回新计数，无需再查询
+"""
+
+import logging
+from typing import Iterable, Optional, Set, Tuple
+
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from utils.cache_utils import CacheKeyBuilder, delete_many
+
+from .models import Article, ArticleLike
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleLikeService:
+    """文章点赞服务"""
+
+    @staticmethod
+    def _check_owner(user_id: Optional[int], ip_address: Optional[str]) -> None:
+        """
+        校验点赞归属
+
+        Raises:
+            ValueError: 匿名请求没有 IP（(article, ip_address) 唯一索引对 NULL 不生效）
+        """
+        if user_id is None and not ip_address:
+            raise ValueError('无法识别匿名用户的 IP')
+
+    @staticmethod
+    def _owner_filter(user_id: Optional[int], ip_address: Optional[str]) -> Tuple[str, list]:
+        """点赞归属条件：登录用户按用户，匿名用户按 IP"""
+        if user_id is not None:
+            return 'user_id = %s', [user_id]
+        return 'user_id IS NULL AND ip_address = %s', [ip_address]
+
+    @classmethod
+    def _apply_delta(cls, cursor, article_id: int, delta: int) -> int:
+        """
+        在当前事务中更新点赞数并返回新值
+
+        MySQL 使用 LAST_INSERT_ID(expr) 一次取回，其他数据库再查询一次
+        """
+        table = connection.ops.quote_name(Article._meta.db_table)
+        expression = 'like_count + 1' if delta > 0 else 'CASE WHEN like_count > 0 THEN like_count - 1 ELSE 0 END'
+
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                f'UPDATE {table} SET like_count = LAST_INSERT_ID({expression}) WHERE id = %s',
+                [article_id]
+            )
+            return cursor.lastrowid
+
+        cursor.execute(f'UPDATE {table} SET like_count = {expression} WHERE id = %s', [article_id])
+        cursor.execute(f'SELECT like_count FROM {table} WHERE id = %s', [article_id])
+        return cursor.fetchone()[0]
+
+    @classmethod
+    def _current_count(cls, article_id: int) -> Optional[int]:
+        """已发布文章的当前点赞数，文章不存在或未发布时返回 None"""
+        return Article.objects.filter(
+            pk=article_id,
+            status=Article.ArticleStatus.PUBLISHED
+        ).values_list('like_count', flat=True).first()
+
+    @classmethod
+    def _invalidate_stats(cls, article_id: int) -> None:
+        """点赞数变化后清除统计缓存，并等待同步到 ES"""
+        from .indexing import SearchCounterSync
+
+        try:
+            delete_many([CacheKeyBuilder.article_stats(article_id)])
+        except Exception as e:
+            logger.debug(f"清除文章 {article_id} 统计缓存失败: {e}")
+        SearchCounterSync.mark([article_id])
+
+    @classmethod
+    def like(cls, article_id: int, user_id: Optional[int] = None,
+             ip_address: Optional[str] = None) -> Optional[Tuple[bool, int]]:
+        """
+        点赞（重复点赞不报错）
+
+        Args:
+            article_id: 文章 ID
+            user_id: 登录用户 ID
+            ip_address: 匿名用户 IP
+
+        Returns:
+            tuple: (本次是否新增点赞, 当前点赞数)；文章不存在或未发布时返回 None
+
+        Raises:
+            ValueError: 匿名请求没有 IP
+        """
+        cls._check_owner(user_id, ip_address)
+        like_table = connection.ops.quote_name(ArticleLike._meta.db_table)
+        article_table = connection.ops.quote_name(Article._meta.db_table)
+        fields = ['article_id', 'user_id', 'ip_address', 'created_at']
+        insert = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+        suffix = connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{insert} {like_table} ({", ".join(fields)}) '
+                    f'SELECT id, %s, %s, %s FROM {article_table} WHERE id = %s AND status = %s {suffix}',
+                    [
+                        user_id,
+                        None if user_id is not None else ip_address,
+                        timezone.now(),
+                        article_id,
+                        Article.ArticleStatus.PUBLISHED,
+                    ]
+                )
+                if cursor.rowcount:
+                    like_count = cls._apply_delta(cursor, article_id, 1)
+                    created = True
+                else:
+                    created = False
+
+        if not created:
+            # 已点赞过或文章不可点赞
+            like_count = cls._current_count(article_id)
+            if like_count is None:
+                return None
+        else:
+            cls._invalidate_stats(article_id)
+
+        return created, like_count
+
+    @classmethod
+    def unlike(cls, article_id: int, user_id: Optional[int] = None,
+               ip_address: Optional[str] = None) -> Optional[Tuple[bool, int]]:
+        """
+        取消点赞（未点赞时不报错）
+
+        Args:
+            article_id: 文章 ID
+            user_id: 登录用户 ID
+            ip_address: 匿名用户 IP
+
+        Returns:
+            tuple: (本次是否删除点赞, 当前点赞数)；文章不存在或未发布时返回 None
+
+        Raises:
+            ValueError: 匿名请求没有 IP
+        """
+        cls._check_owner(user_id, ip_address)
+        like_table = connection.ops.quote_name(ArticleLike._meta.db_table)
+        owner_sql, owner_params = cls._owner_filter(user_id, ip_address)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {like_table} WHERE article_id = %s AND {owner_sql}',
+                    [article_id] + owner_params
+                )
+                if cursor.rowcount:
+                    like_count = cls._apply_delta(cursor, article_id, -1)
+                    deleted = True
+                else:
+                    deleted = False
+
+        if not deleted:
+            like_count = cls._current_count(article_id)
+            if like_count is None:
+                return None
+        else:
+            cls._invalidate_stats(article_id)
+
+        return deleted, like_count
+
+    @classmethod
+    def liked_ids(cls, article_ids: Iterable[int], user_id: Optional[int] = None,
+                  ip_address: Optional[str] = None) -> Set[int]:
+        """
+        批量查询点赞状态（列表页一次查询标记已点赞的文章）
+
+        Args:
+            article_ids: 文章 ID 列表
+            user_id: 登录用户 ID
+            ip_address: 匿名用户 IP
+
+        Returns:
+            set: 已点赞的文章 ID
+        """
+        article_ids = list(article_ids)
+        if not article_ids or (user_id is None and not ip_address):
+            return set()
+
+        queryset = ArticleLike.objects.filter(article_id__in=article_ids)
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        else:
+            queryset = queryset.filter(user__isnull=True, ip_address=ip_address)
+        return set(queryset.values_list('article_id', flat=True))
@@ -0,0 +1,315 @@
+"""
+文章 slug → ID 解析
+
+get_object 原先先按 slug 查询、失败后再按 ID 查询，随机 slug 的探测请求
+每次都要执行两次完整的关联查询。这里将查找拆为两层：
+1. 进程内 LRU（短 TTL）+ Redis 哈希表缓存 slug → ID 映射
+2. 不存在的 slug 写入负缓存，并由 Redis 位图实现的 Bloom 过滤器兜底：
+   过滤器判定不存在的 slug 无需访问 MySQL 即可直接返回 404
+
+映射在 slug 变更、文章删除时失效；Bloom 过滤器无法删除元素，
+在进程启动时及每天定时全量重建。
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.cache_utils import CacheKeyBuilder, CacheLock
+
+logger = logging.getLogger(__name__)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class SlugBloomFilter:
+    """基于 Redis 位图的 Bloom 过滤器"""
+
+    def __init__(self, key: str, capacity: int, error_rate: float):
+        """
+        Args:
+            key: Redis 位图键
+            capacity: 预期元素数量
+            error_rate: 期望误判率
+        """
+        self.key = key
+        self.size = max(1024, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.size / capacity * math.log(2)))
+        # 哨兵位：位于哈希位之后，仅在重建完成时置 1。
+        # 就绪标记与位图同键，位图被淘汰时标记随之消失，不会误判所有 slug 不存在
+        self.sentinel = self.size
+
+    def positions(self, value: str):
+        """双重哈希计算 k 个位位置"""
+        digest = hashlib.md5(value.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+
+    def add(self, pipe, value: str) -> None:
+        """在 pipeline 中写入一个元素"""
+        for position in self.positions(value):
+            pipe.setbit(self.key, position, 1)
+
+    def rebuild(self, redis_conn, values: Iterable[str]) -> int:
+        """
+        全量重建（写入临时键后原子 RENAME）
+
+        Returns:
+            int: 写入的元素数量
+        """
+        tmp_key = f"{self.key}:rebuild"
+        redis_conn.delete(tmp_key)
+
+        count = 0
+        pipe = redis_conn.pipeline(transaction=False)
+        for value in values:
+            for position in self.positions(value):
+                pipe.setbit(tmp_key, position, 1)
+            count += 1
+            if count % 1000 == 0:
+                pipe.execute()
+        # 写入哨兵位（空表时同时保证位图存在）
+        pipe.setbit(tmp_key, self.sentinel, 1)
+        pipe.execute()
+
+        redis_conn.rename(tmp_key, self.key)
+        return count
+
+
+class ArticleSlugResolver:
+    """文章 slug → ID 解析器"""
+
+    SLUG_MAP = "article_slug_map"
+    SLUG_MISS = "article_slug_miss"
+    BLOOM = "article_slug_bloom"
+    REBUILD_LOCK = "article_slug_bloom_rebuild"
+
+    # 进程内缓存中表示“不存在”的标记
+    _MISSING = -1
+
+    _local = OrderedDict()
+    _local_lock = threading.Lock()
+
+    @classmethod
+    def bloom(cls) -> SlugBloomFilter:
+        return SlugBloomFilter(
+            CacheKeyBuilder.build(cls.BLOOM),
+            capacity=settings.SLUG_BLOOM_CAPACITY,
+            error_rate=settings.SLUG_BLOOM_ERROR_RATE,
+        )
+
+    @classmethod
+    def _map_key(cls) -> str:
+        return CacheKeyBuilder.build(cls.SLUG_MAP)
+
+    @classmethod
+    def _miss_key(cls, slug: str) -> str:
+        return CacheKeyBuilder.build(cls.SLUG_MISS, slug)
+
+    # ============================================
+    # 进程内 LRU
+    # ============================================
+
+    @classmethod
+    def _local_get(cls, slug: str) -> Optional[int]:
+        with cls._local_lock:
+            entry = cls._local.get(slug)
+            if entry is None:
+                return None
+            article_id, expires_at = entry
+            if expires_at < time.monotonic():
+                del cls._local[slug]
+                return None
+            cls._local.move_to_end(slug)
+            return article_id
+
+    @classmethod
+    def _local_set(cls, slug: str, article_id: int) -> None:
+        with cls._local_lock:
+            cls._local[slug] = (article_id, time.monotonic() + settings.SLUG_LOCAL_CACHE_TTL)
+            cls._local.move_to_end(slug)
+            while len(cls._local) > settings.SLUG_LOCAL_CACHE_SIZE:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def forget_local(cls, slug: str) -> None:
+        """丢弃进程内的映射（发现映射过期时调用）"""
+        with cls._local_lock:
+            cls._local.pop(slug, None)
+
+    # ============================================
+    # 解析
+    # ============================================
+
+    @classmethod
+    def resolve(cls, lookup_value: str) -> Optional[int]:
+        """
+        将 URL 中的 slug 或 ID 解析为文章 ID
+
+        与原 get_object 的语义一致：优先按 slug 匹配，再按数字 ID 匹配
+
+        Args:
+            lookup_value: slug 或 ID
+
+        Returns:
+            int: 文章 ID；确定不存在时返回 None
+        """
+        article_id = cls._local_get(lookup_value)
+        if article_id is None:
+            article_id = cls._resolve_slug(lookup_value)
+            cls._local_set(lookup_value, article_id)
+
+        if article_id != cls._MISSING:
+            return article_id
+
+        # slug 不存在时按 ID 查找（ID 是否存在由调用方的主键查询确认）
+        if lookup_value.isdigit():
+            return int(lookup_value)
+        return None
+
+    @classmethod
+    def _resolve_slug(cls, slug: str) -> int:
+        """通过 Redis（一次往返）和必要时的 MySQL 主键查询解析 slug"""
+        bloom = cls.bloom()
+        try:
+            redis_conn = _get_redis()
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.hget(cls._map_key(), slug)
+            pipe.exists(cls._miss_key(slug))
+            pipe.getbit(bloom.key, bloom.sentinel)
+            for position in bloom.positions(slug):
+                pipe.getbit(bloom.key, position)
+            mapped, negative, bloom_ready, *bits = pipe.execute()
+        except Exception as e:
+            logger.warning(f"slug 映射不可用，直接查询 MySQL: {e}")
+            return cls._resolve_from_db(slug, redis_conn=None)
+
+        if mapped is not None:
+            return int(mapped)
+        if negative:
+            return cls._MISSING
+        if bloom_ready:
+            if not all(bits):
+                return cls._MISSING
+        else:
+            cls.schedule_rebuild()
+
+        return cls._resolve_from_db(slug, redis_conn)
+
+    @classmethod
+    def _resolve_from_db(cls, slug: str, redis_conn) -> int:
+        from .models import Article
+
+        article_id = Article.objects.filter(slug=slug).values_list('id', flat=True).first()
+
+        if redis_conn is not None:
+            try:
+                if article_id is not None:
+                    redis_conn.hset(cls._map_key(), slug, article_id)
+                else:
+                    redis_conn.set(cls._miss_key(slug), 1, ex=settings.SLUG_NEGATIVE_CACHE_TTL)
+            except Exception as e:
+                logger.debug(f"写入 slug 映射失败: {e}")
+
+        return article_id if article_id is not None else cls._MISSING
+
+    # ============================================
+    # 维护
+    # ============================================
+
+    @classmethod
+    def register(cls, slug: str, article_id: int) -> None:
+        """
+        文章保存后登记 slug（清除负缓存并加入 Bloom 过滤器）
+
+        在事务提交后执行：提交前并发的查找在 MySQL 中还查不到文章，
+        会写入负缓存，提交后登记时一并清除
+
+        Args:
+            slug: 文章 slug
+            article_id: 文章 ID
+        """
+        transaction.on_commit(lambda: cls._register(slug, article_id))
+
+    @classmethod
+    def _register(cls, slug: str, article_id: int) -> None:
+        cls._local_set(slug, article_id)
+        try:
+            pipe = _get_redis().pipeline(transaction=False)
+            pipe.hset(cls._map_key(), slug, article_id)
+            pipe.delete(cls._miss_key(slug))
+            cls.bloom().add(pipe, slug)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"登记文章 {article_id} 的 slug 失败: {e}")
+
+    @classmethod
+    def invalidate(cls, slug: str) -> None:
+        """
+        slug 变更或文章删除后移除映射
+
+        Args:
+            slug: 失效的 slug
+        """
+        cls.forget_local(slug)
+        try:
+            _get_redis().hdel(cls._map_key(), slug)
+        except Exception as e:
+            logger.warning(f"移除 slug {slug} 映射失败: {e}")
+
+    @classmethod
+    def schedule_rebuild(cls) -> None:
+        """异步全量重建映射和 Bloom 过滤器（同一时间只触发一次）"""
+        if not CacheLock.acquire(CacheKeyBuilder.build(cls.REBUILD_LOCK), timeout=600):
+            return
+        try:
+            from .tasks import rebuild_slug_index
+            rebuild_slug_index.delay()
+        except Exception as e:
+            logger.warning(f"触发 slug 索引重建失败: {e}")
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        从 MySQL 全量重建 slug 映射和 Bloom 过滤器
+
+        Returns:
+            int: 文章数量
+        """
+        from django.utils import timezone
+        from .models import Article
+
+        redis_conn = _get_redis()
+        started_at = timezone.now()
+        rows = list(Article.objects.values_list('slug', 'id'))
+
+        map_key = cls._map_key()
+        tmp_map_key = f"{map_key}:rebuild"
+        redis_conn.delete(tmp_map_key)
+        for start in range(0, len(rows), 1000):
+            redis_conn.hset(tmp_map_key, mapping=dict(rows[start:start + 1000]))
+        if rows:
+            redis_conn.rename(tmp_map_key, map_key)
+        else:
+            redis_conn.delete(map_key)
+
+        cls.bloom().rebuild(redis_conn, (slug for slug, _ in rows))
+
+        # 快照之后 register 写入的是旧键，已被替换覆盖，重新登记
+        for slug, article_id in Article.objects.filter(
+            updated_at__gte=started_at
+        ).values_list('slug', 'id'):
+            cls._register(slug, article_id)
+
+        return len(rows)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0003_add_article_like_model"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleRelated",
+            fields=[
+                (
+                    "article",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="related_list",
+                        serialize=False,
+                        to="articles.article",
+                        verbose_name="文章",
+                    ),
+                ),
+                (
+                    "related_ids",
+                    models.JSONField(default=list, verbose_name="相关文章 ID 列表"),
+                ),
+                (
+                    "signature",
+                    models.CharField(blank=True, max_length=32, verbose_name="内容签名"),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="计算时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "相关文章",
+                "verbose_name_plural": "相关文章",
+            },
+        ),
+    ]
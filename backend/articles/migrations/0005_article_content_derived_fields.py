@@ -0,0 +1,66 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+def backfill_content_fields(apps, schema_editor):
+    """为已有文章计算正文派生字段"""
+    from articles.content import process_content
+
+    Article = apps.get_model("articles", "Article")
+    fields = ["plain_text", "cjk_char_count", "word_count", "toc", "content_hash"]
+
+    batch = []
+    for article in Article.objects.only("id", "content").iterator(chunk_size=500):
+        processed = process_content(article.content)
+        for name in fields:
+            setattr(article, name, getattr(processed, name))
+        batch.append(article)
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Article.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0004_articlerelated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="plain_text",
+            field=models.TextField(blank=True, editable=False, verbose_name="纯文本"),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="cjk_char_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="中文字符数"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="word_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="英文单词数"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="toc",
+            field=models.JSONField(
+                blank=True, default=list, editable=False, verbose_name="目录"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=32, verbose_name="内容哈希"
+            ),
+        ),
+        migrations.RunPython(backfill_content_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:20
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_anonymous_likes(apps, schema_editor):
+    """删除同一 IP 对同一文章的重复匿名点赞，并修正点赞数"""
+    Article = apps.get_model("articles", "Article")
+    ArticleLike = apps.get_model("articles", "ArticleLike")
+
+    duplicates = (
+        ArticleLike.objects.filter(ip_address__isnull=False)
+        .values("article_id", "ip_address")
+        .annotate(keep_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    affected = set()
+    for row in duplicates:
+        ArticleLike.objects.filter(
+            article_id=row["article_id"], ip_address=row["ip_address"]
+        ).exclude(id=row["keep_id"]).delete()
+        affected.add(row["article_id"])
+
+    for article_id in affected:
+        Article.objects.filter(id=article_id).update(
+            like_count=ArticleLike.objects.filter(article_id=article_id).count()
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0005_article_content_derived_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_anonymous_likes, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="articlelike",
+            unique_together={("article", "user"), ("article", "ip_address")},
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0006_articlelike_unique_ip"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleIndexOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("article_id", models.BigIntegerField(verbose_name="文章 ID")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "索引发件箱",
+                "verbose_name_plural": "索引发件箱",
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -17,6 +17,9 @@ class Article(models.Model):
         PUBLISHED = 'published', _('已发布')
         ARCHIVED = 'archived', _('已归档')
 
+    # 由正文计算得到的字段
+    DERIVED_CONTENT_FIELDS = ('plain_text', 'cjk_char_count', 'word_count', 'toc', 'content_hash')
+
     # 基础字段
     title = models.CharField(_('标题'), max_length=500)
     slug = models.SlugField(_('URL 标识'), max_length=200, unique=True)
@@ -60,6 +63,13 @@ class Article(models.Model):
     # 阅读时间 (分钟)
     reading_time = models.PositiveIntegerField(_('阅读时间'), default=0)
 
+    # 正文派生字段（内容变化时由 articles/content.py 计算）
+    plain_text = models.TextField(_('纯文本'), blank=True, editable=False)
+    cjk_char_count = models.PositiveIntegerField(_('中文字符数'), default=0, editable=False)
+    word_count = models.PositiveIntegerField(_('英文单词数'), default=0, editable=False)
+    toc = models.JSONField(_('目录'), default=list, blank=True, editable=False)
+    content_hash = models.CharField(_('内容哈希'), max_length=32, blank=True, editable=False)
+
     # 状态
     status = models.CharField(
         _('状态'),
@@ -125,47 +135,55 @@ class Article(models.Model):
         if not self.slug and self.title:
             self.slug = slugify(self.title)
 
+        # 内容变化时重新计算派生字段
+        update_fields = kwargs.get('update_fields')
+        self._content_changed = False
+        if update_fields is None or 'content' in update_fields:
+            self._content_changed = self.process_content()
+            if self._content_changed and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_CONTENT_FIELDS)
+
         # 自动计算阅读时间
         if self.content and not self.reading_time:
             self.reading_time = self.calculate_reading_time()
 
         super().save(*args, **kwargs)
 
+    def process_content(self, force=False):
+        """
+        正文变化时计算派生字段
+
+        Returns:
+            bool: 是否重新计算
+        """
+        from .content import content_hash, process_content
+
+        if not force and self.content_hash and self.content_hash == content_hash(self.content):
+            return False
+
+        processed = process_content(self.content)
+        self.plain_text = processed.plain_text
+        self.cjk_char_count = processed.cjk_char_count
+        self.word_count = processed.word_count
+        self.toc = processed.toc
+        self.content_hash = processed.content_hash
+        return True
+
     def calculate_reading_time(self):
         """
         计算文章阅读时间（分钟）
         支持中英文混合内容
         """
-        import re
+        from .content import ProcessedContent
 
         if not self.content:
             return 1
 
-        # 移除 HTML 标签
-        content = re.sub(r'<[^>]+>', ' ', self.content)
-        # 移除代码块
-        content = re.sub(r'<code[^>]*>.*?</code>', ' ', content, flags=re.DOTALL)
-        content = re.sub(r'<pre[^>]*>.*?</pre>', ' ', content, flags=re.DOTALL)
-
-        # 移除多余的空白字符
-        content = re.sub(r'\s+', ' ', content).strip()
-
-        # 统计中文字符（包括 CJK 统一汉字）
-        chinese_chars = re.findall(r'[\u4e00-\u9fa5]', content)
-        chinese_count = len(chinese_chars)
-
-        # 统计英文单词（移除中文字符后按空格分词）
-        english_text = re.sub(r'[\u4e00-\u9fa5]', ' ', content)
-        english_words = re.findall(r'\b[a-zA-Z]+\b', english_text)
-        english_count = len(english_words)
-
-        # 阅读速度：中文 400字/分钟，英文 225词/分钟
-        chinese_time = chinese_count / 400
-        english_time = english_count / 225
-
-        # 总时间（至少 1 分钟）
-        total_time = chinese_time + english_time
-        return max(1, int(total_time) + (1 if total_time % 1 >= 0.5 else 0))
+        self.process_content()
+        return ProcessedContent(
+            cjk_char_count=self.cjk_char_count,
+            word_count=self.word_count,
+        ).reading_time
 
     def get_absolute_url(self):
         """获取绝对 URL"""
@@ -187,6 +205,53 @@ class Article(models.Model):
         return self.category.category_type if self.category else 'blog'
 
 
+class ArticleRelated(models.Model):
+    """预计算的相关文章列表（由 articles/related.py 离线计算）"""
+
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='related_list',
+        verbose_name=_('文章')
+    )
+
+    # 按相似度降序排列的文章 ID 列表
+    related_ids = models.JSONField(_('相关文章 ID 列表'), default=list)
+
+    # 计算时的标题/内容/分类/标签签名，未变化时跳过重算
+    signature = models.CharField(_('内容签名'), max_length=32, blank=True)
+
+    computed_at = models.DateTimeField(_('计算时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('相关文章')
+        verbose_name_plural = _('相关文章')
+
+    def __str__(self):
+        return f'{self.article_id} - {len(self.related_ids)} 篇'
+
+
+class ArticleIndexOutbox(models.Model):
+    """
+    搜索索引变更发件箱
+
+    文章变更时在同一事务中写入一行，由 Celery 批量消费并同步到 Elasticsearch
+    （不使用外键：文章删除后仍需要消费删除事件）
+    """
+
+    article_id = models.BigIntegerField(_('文章 ID'))
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('索引发件箱')
+        verbose_name_plural = _('索引发件箱')
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.article_id} @ {self.created_at}'
+
+
 class ArticleView(models.Model):
     """文章阅读记录 (用于异步统计)"""
 
@@ -237,7 +302,8 @@ class ArticleLike(models.Model):
         verbose_name = _('文章点赞')
         verbose_name_plural = _('文章点赞')
         ordering = ['-created_at']
-        unique_together = [['article', 'user']]
+        # 登录用户的点赞 ip_address 为空，匿名点赞 user 为空（唯一索引允许多个 NULL）
+        unique_together = [['article', 'user'], ['article', 'ip_address']]
         indexes = [
             models.Index(fields=['article', '-created_at']),
             models.Index(fields=['user', '-created_at']),
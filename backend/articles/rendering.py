@@ -0,0 +1,239 @@
+"""
+文章 Markdown 服务端渲染
+
+详情接口原先只返回 Markdown 原文，每个客户端都要自行渲染和高亮代码。
+这里在服务端渲染一次：
+1. Markdown → HTML，代码块由 Pygments 高亮（codehilite）
+2. 基于白名单的 HTML 清洗，移除脚本、事件属性和危险链接
+3. 渲染结果按内容哈希缓存在 Redis 和磁盘，内容不变则永不重复渲染
+4. 文章保存后由 Celery 异步预渲染，详情接口通过 ?content_format=html 获取
+"""
+
+import logging
+import os
+import tempfile
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache_utils import CacheKeyBuilder
+
+from .content import _unique_anchor, content_hash as compute_content_hash
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'codehilite', 'toc']
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'css_class': 'highlight',
+        'guess_lang': False,
+    },
+}
+
+# 渲染规则变化时递增，旧的渲染缓存不再命中
+RENDER_VERSION = 2
+
+
+def _toc_slugify():
+    """
+    标题 id 生成函数（每次渲染一个新实例）
+
+    与 Article.toc 的锚点使用同一规则（保留中文，重复标题追加 -N），
+    否则目录中的中文或重复标题链接不到渲染后的 id
+    """
+    anchors = {}
+
+    def slugify_heading(value: str, separator: str) -> str:
+        return _unique_anchor(value, anchors)
+
+    return slugify_heading
+
+
+class _HTMLSanitizer(HTMLParser):
+    """白名单 HTML 清洗"""
+
+    ALLOWED_TAGS = {
+        'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt',
+        'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'kbd', 'li', 'ol',
+        'p', 'pre', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot',
+        'th', 'thead', 'tr', 'ul',
+    }
+    VOID_TAGS = {'br', 'hr', 'img'}
+    # 连同内容一起丢弃的标签
+    DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+    ALLOWED_ATTRS = {
+        '*': {'class', 'id', 'title'},
+        'a': {'href'},
+        'img': {'src', 'alt', 'width', 'height'},
+        'td': {'align', 'colspan', 'rowspan'},
+        'th': {'align', 'colspan', 'rowspan'},
+    }
+    URL_ATTRS = {'href', 'src'}
+    ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._drop_depth = 0
+
+    def _safe_url(self, value: str) -> bool:
+        value = value.strip()
+        scheme, sep, _ = value.partition(':')
+        if not sep or '/' in scheme or '#' in scheme or '?' in scheme:
+            # 相对链接或锚点
+            return True
+        return scheme.lower() in self.ALLOWED_SCHEMES
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.DROP_CONTENT_TAGS:
+            self._drop_depth += 1
+            return
+        if self._drop_depth or tag not in self.ALLOWED_TAGS:
+            return
+
+        allowed = self.ALLOWED_ATTRS['*'] | self.ALLOWED_ATTRS.get(tag, set())
+        rendered = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in self.URL_ATTRS and not self._safe_url(value):
+                continue
+            rendered.append(f' {name}="{escape(value, quote=True)}"')
+        if tag == 'a':
+            rendered.append(' rel="nofollow noopener"')
+        self.parts.append(f'<{tag}{"".join(rendered)}>')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.DROP_CONTENT_TAGS:
+            self._drop_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in self.DROP_CONTENT_TAGS:
+            self._drop_depth = max(0, self._drop_depth - 1)
+            return
+        if self._drop_depth or tag not in self.ALLOWED_TAGS or tag in self.VOID_TAGS:
+            return
+        self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self._drop_depth:
+            self.parts.append(escape(data, quote=False))
+
+
+def sanitize_html(html: str) -> str:
+    """
+    按白名单清洗 HTML
+
+    Args:
+        html: 待清洗的 HTML
+
+    Returns:
+        str: 清洗后的 HTML
+    """
+    sanitizer = _HTMLSanitizer()
+    sanitizer.feed(html)
+    sanitizer.close()
+    return ''.join(sanitizer.parts)
+
+
+def render_markdown(content: str) -> str:
+    """
+    渲染 Markdown 并清洗
+
+    Args:
+        content: Markdown 原文
+
+    Returns:
+        str: 安全的 HTML
+    """
+    import markdown
+
+    extension_configs = {
+        **MARKDOWN_EXTENSION_CONFIGS,
+        'toc': {'slugify': _toc_slugify()},
+    }
+    html = markdown.markdown(
+        content or '',
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=extension_configs,
+        output_format='html',
+    )
+    return sanitize_html(html)
+
+
+class RenderedContentCache:
+    """按内容哈希缓存的渲染结果（Redis + 磁盘两级）"""
+
+    PREFIX = "article_html"
+
+    @classmethod
+    def _cache_key(cls, digest: str) -> str:
+        return CacheKeyBuilder.build(cls.PREFIX, RENDER_VERSION, digest)
+
+    @classmethod
+    def _disk_path(cls, digest: str) -> Path:
+        return Path(settings.MARKDOWN_RENDER_CACHE_DIR) / f'v{RENDER_VERSION}' / digest[:2] / f'{digest}.html'
+
+    @classmethod
+    def get(cls, digest: str) -> Optional[str]:
+        """读取渲染结果，磁盘命中时回填 Redis"""
+        try:
+            html = cache.get(cls._cache_key(digest))
+            if html is not None:
+                return html
+        except Exception as e:
+            logger.debug(f"读取渲染缓存失败: {e}")
+
+        try:
+            html = cls._disk_path(digest).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+        cls._set_redis(digest, html)
+        return html
+
+    @classmethod
+    def _set_redis(cls, digest: str, html: str) -> None:
+        try:
+            cache.set(cls._cache_key(digest), html, settings.MARKDOWN_RENDER_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"写入渲染缓存失败: {e}")
+
+    @classmethod
+    def set(cls, digest: str, html: str) -> None:
+        """写入 Redis 和磁盘（磁盘写入临时文件后原子替换）"""
+        cls._set_redis(digest, html)
+
+        path = cls._disk_path(digest)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入渲染磁盘缓存失败: {e}")
+
+
+def get_rendered_content(content: str, digest: Optional[str] = None) -> str:
+    """
+    获取正文的 HTML（未命中缓存时同步渲染并写入缓存）
+
+    Args:
+        content: Markdown 原文
+        digest: 内容哈希，缺省时现算
+
+    Returns:
+        str: 安全的 HTML
+    """
+    digest = digest or compute_content_hash(content)
+    html = RenderedContentCache.get(digest)
+    if html is None:
+        html = render_markdown(content)
+        RenderedContentCache.set(digest, html)
+    return html
@@ -2,6 +2,7 @@
 文章序列化器
 """
 
+from django.db import transaction
 from rest_framework import serializers
 from .models import Article, ArticleView, ArticleVersion
 from categories.models import Category
@@ -67,11 +68,12 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
             'locale', 'reading_time', 'status', 'featured',
             'cover_image', 'keywords', 'view_count', 'like_count',
             'comment_count', 'stars', 'forks', 'repo', 'demo',
-            'tech_stack', 'project_status', 'created_at',
-            'updated_at', 'published_at'
+            'tech_stack', 'project_status', 'toc', 'word_count',
+            'cjk_char_count', 'created_at', 'updated_at', 'published_at'
         )
         read_only_fields = ('id', 'slug', 'view_count', 'like_count',
-                           'comment_count', 'created_at', 'updated_at')
+                           'comment_count', 'toc', 'word_count', 'cjk_char_count',
+                           'created_at', 'updated_at')
 
 
 class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
@@ -140,14 +142,15 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
                 counter += 1
             validated_data['slug'] = slug
 
-        article = Article.objects.create(**validated_data)
-        article.tags.set(tags)
-
-        # 如果是发布状态，记录发布时间
-        if article.status == Article.ArticleStatus.PUBLISHED and not article.published_at:
+        # 如果是发布状态，记录发布时间（创建前设置，避免再保存一次）
+        if validated_data.get('status') == Article.ArticleStatus.PUBLISHED and not validated_data.get('published_at'):
             from django.utils import timezone
-            article.published_at = timezone.now()
-            article.save()
+            validated_data['published_at'] = timezone.now()
+
+        # 创建和标签写入在同一事务中，信号产生的索引同步/缓存失效在提交后合并执行一次
+        with transaction.atomic():
+            article = Article.objects.create(**validated_data)
+            article.tags.set(tags)
 
         return article
 
@@ -169,19 +172,12 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
-
-        # 更新标签
-        if tag_ids is not None:
-            # 获取或创建标签
-            tags = []
-            for tag_id in tag_ids:
-                try:
-                    tag = Tag.objects.get(id=tag_id)
-                    tags.append(tag)
-                except Tag.DoesNotExist:
-                    pass
-            instance.tags.set(tags)
+        with transaction.atomic():
+            instance.save()
+
+            # 更新标签（忽略不存在的标签）
+            if tag_ids is not None:
+                instance.tags.set(Tag.objects.filter(id__in=tag_ids))
 
         return instance
 
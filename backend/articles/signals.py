@@ -1,164 +1,42 @@
 """
-文章数据同步到 Elasticsearch 的 Signals
+文章变更的 Signals
 
-优化要点：
-1. 添加重试机制
-2. 异步处理避免阻塞主线程
-3. 详细的错误处理和日志
-4. 批量操作支持
+ES 同步通过事务性发件箱异步完成（见 articles/indexing.py），
+信号处理器中只写入发件箱行和清理缓存，不再直接请求 ES。
+同一事务内的多次变更按文章 ID 合并，提交后统一处理（见 articles/batching.py）。
 """
 
 import logging
-from typing import Dict, Any, Optional
-from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.db import transaction
 from django.dispatch import receiver
-from django.core.exceptions import ImproperlyConfigured
 
 from .models import Article
+from .batching import record_article_changes
+from .feeds import RankedFeed
+from .indexing import SearchIndexOutbox
+from .lookup import ArticleSlugResolver
 
 logger = logging.getLogger(__name__)
 
-# 最大重试次数
-MAX_RETRY_TIMES = 3
-
-# ES 是否可用标志
-ES_AVAILABLE = True
-
-
-def _prepare_article_data(instance: Article) -> Dict[str, Any]:
-    """
-    准备 ES 文档数据
-
-    Args:
-        instance: Article 模型实例
-
-    Returns:
-        dict: ES 文档数据
-    """
-    data = {
-        'id': instance.id,
-        'title': instance.title or '',
-        'description': instance.description or '',
-        'content': instance.content or '',
-        'slug': instance.slug or '',
-        'author_username': instance.author.username if instance.author else '',
-        'author_nickname': instance.author.nickname if instance.author and hasattr(instance.author, 'nickname') else '',
-        'category_name': instance.category.name if instance.category else '',
-        'category_slug': instance.category.slug if instance.category else '',
-        'tags_names': [tag.name for tag in instance.tags.all()],
-        'tags_slugs': [tag.slug for tag in instance.tags.all()],
-        'locale': instance.locale or 'zh',
-        'status': instance.status,
-        'featured': instance.featured or False,
-        'reading_time': instance.reading_time or 0,
-        'cover_image': instance.cover_image or '',
-        'published_at': instance.published_at,
-        'created_at': instance.created_at,
-        'updated_at': instance.updated_at,
-        'stars': instance.stars or 0,
-        'forks': instance.forks or 0,
-        'repo': instance.repo or '',
-        'demo': instance.demo or '',
-        'tech_stack': instance.tech_stack or [],
-        'project_status': instance.project_status or '',
-        # 添加统计字段
-        'view_count': instance.view_count or 0,
-        'like_count': instance.like_count or 0,
-        'comment_count': instance.comment_count or 0,
-    }
-    return data
-
-
-def _sync_to_es_with_retry(article_id: int, data: Dict[str, Any], retry_count: int = 0) -> bool:
-    """
-    带重试机制的 ES 同步
-
-    Args:
-        article_id: 文章 ID
-        data: 要同步的数据
-        retry_count: 当前重试次数
-
-    Returns:
-        bool: 是否成功
-    """
-    global ES_AVAILABLE
-
-    if not ES_AVAILABLE:
-        logger.debug(f"ES 标记为不可用，跳过同步文章 {article_id}")
-        return False
 
+def _schedule_render(article_id: int) -> None:
     try:
-        from search.models import ArticleDocument
-
-        # 尝试更新现有文档
-        try:
-            doc = ArticleDocument.get(id=article_id)
-            doc.update(**data)
-            logger.info(f"成功更新文章 {article_id} 到 Elasticsearch")
-        except Exception:
-            # 文档不存在，创建新文档
-            doc = ArticleDocument(**data)
-            doc.save()
-            logger.info(f"成功创建文章 {article_id} 到 Elasticsearch")
-
-        return True
-
-    except ImportError:
-        logger.warning("Elasticsearch 模块未安装，跳过索引同步")
-        ES_AVAILABLE = False
-        return False
-
+        from .tasks import render_article_content
+        render_article_content.delay(article_id)
     except Exception as e:
-        logger.warning(f"同步文章 {article_id} 到 ES 失败 (尝试 {retry_count + 1}/{MAX_RETRY_TIMES}): {e}")
-
-        # 重试逻辑
-        if retry_count < MAX_RETRY_TIMES - 1:
-            import time
-            time.sleep(0.5 * (retry_count + 1))  # 指数退避
-            return _sync_to_es_with_retry(article_id, data, retry_count + 1)
+        logger.warning(f"触发文章 {article_id} 正文预渲染失败: {e}")
 
-        # 重试失败，标记 ES 可能不可用
-        logger.error(f"文章 {article_id} 同步到 ES 失败，已达到最大重试次数")
-        return False
 
-
-def _delete_from_es_with_retry(article_id: int, retry_count: int = 0) -> bool:
+@receiver(pre_save, sender=Article)
+def remember_previous_slug(sender, instance, **kwargs):
     """
-    带重试机制的 ES 删除
-
-    Args:
-        article_id: 文章 ID
-        retry_count: 当前重试次数
-
-    Returns:
-        bool: 是否成功
+    保存前记录原 slug，slug 变更后需要让旧 slug 的映射和缓存失效
     """
-    global ES_AVAILABLE
-
-    if not ES_AVAILABLE:
-        return False
-
-    try:
-        from search.models import ArticleDocument
-
-        doc = ArticleDocument.get(id=article_id)
-        doc.delete()
-        logger.info(f"成功从 Elasticsearch 删除文章 {article_id}")
-        return True
-
-    except ImportError:
-        ES_AVAILABLE = False
-        return False
-
-    except Exception as e:
-        logger.debug(f"从 ES 删除文章 {article_id} 失败 (尝试 {retry_count + 1}/{MAX_RETRY_TIMES}): {e}")
-
-        if retry_count < MAX_RETRY_TIMES - 1:
-            import time
-            time.sleep(0.5 * (retry_count + 1))
-            return _delete_from_es_with_retry(article_id, retry_count + 1)
-
-        return False
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = Article.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
 
 
 @receiver(post_save, sender=Article)
@@ -166,28 +44,27 @@ def sync_article_to_es(sender, instance, **kwargs):
     """
     文章保存时同步到 Elasticsearch
 
-    - 已发布的文章：更新/创建 ES 索引
-    - 未发布的文章：从 ES 删除索引
-
-    注意：同步失败不会影响文章保存操作
+    写入发件箱，事务提交后由 Celery 按最新状态写入或删除 ES 文档；
+    详情缓存（撤回发布时同样需要清除）和相关文章标记在事务提交后统一处理
     """
     article_id = instance.id
 
-    if instance.status == 'published':
-        # 已发布文章，同步到 ES
-        data = _prepare_article_data(instance)
-        _sync_to_es_with_retry(article_id, data)
+    # slug 映射：登记当前 slug，旧 slug 失效
+    slugs = [instance.slug]
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug and previous_slug != instance.slug:
+        ArticleSlugResolver.invalidate(previous_slug)
+        slugs.append(previous_slug)
+    ArticleSlugResolver.register(instance.slug, article_id)
 
-        # 清除相关缓存
-        try:
-            from utils.cache_utils import CacheWarmer
-            CacheWarmer.invalidate_article(article_id)
-        except Exception as e:
-            logger.warning(f"清除文章 {article_id} 缓存失败: {e}")
+    record_article_changes([article_id], slugs=slugs)
 
-    else:
-        # 未发布文章，从 ES 删除
-        _delete_from_es_with_retry(article_id)
+    # 更新热门/精选排行 feed
+    RankedFeed.sync_article(instance)
+
+    # 正文变化后异步预渲染 HTML（事务提交后再投递，避免任务读到旧内容）
+    if getattr(instance, '_content_changed', False) and instance.content:
+        transaction.on_commit(lambda: _schedule_render(article_id))
 
 
 @receiver(post_delete, sender=Article)
@@ -197,29 +74,64 @@ def delete_article_from_es(sender, instance, **kwargs):
     """
     article_id = instance.id
 
-    # 从 ES 删除
-    _delete_from_es_with_retry(article_id)
-
-    # 清除相关缓存
-    try:
-        from utils.cache_utils import CacheWarmer
-        CacheWarmer.invalidate_article(article_id)
-    except Exception as e:
-        logger.warning(f"清除文章 {article_id} 缓存失败: {e}")
+    # 发件箱消费时文章已不存在，生成 delete 动作；提交后清除相关缓存
+    record_article_changes([article_id], slugs=[instance.slug], related=False)
+    ArticleSlugResolver.invalidate(instance.slug)
+    RankedFeed.remove_article(article_id)
 
 
 @receiver(m2m_changed, sender=Article.tags.through)
-def sync_article_tags_change(sender, instance, action, **kwargs):
+def sync_article_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
     """
     文章标签变更时同步到 ES
 
-    m2m_changed 信号在多对多关系变更时触发
+    m2m_changed 信号在多对多关系变更时触发（reverse 为 True 时 instance 是标签）
     """
-    # 只在标签添加或移除后同步
-    if action not in ('post_add', 'post_remove'):
+    # 只在标签添加、移除或清空后同步
+    if action not in ('post_add', 'post_remove', 'post_clear'):
         return
 
-    if instance.status == 'published':
-        data = _prepare_article_data(instance)
-        _sync_to_es_with_retry(instance.id, data)
+    if reverse:
+        articles = list(Article.objects.filter(pk__in=pk_set or []).only('id', 'slug'))
+    else:
+        articles = [instance]
+
+    # 详情缓存中包含标签，需要失效
+    for article in articles:
+        record_article_changes([article.id], slugs=[article.slug])
+
+
+def _record_published_articles(queryset) -> None:
+    """将查询集中已发布的文章写入发件箱"""
+    article_ids = list(
+        queryset.filter(status=Article.ArticleStatus.PUBLISHED).values_list('id', flat=True)
+    )
+    if article_ids:
+        SearchIndexOutbox.record(article_ids)
+
+
+# 分类、标签、作者变更后重新索引其下已发布的文章
+# （替代 django_elasticsearch_dsl 的同步信号处理，ELASTICSEARCH_DSL_AUTOSYNC 已关闭）
+
+@receiver(post_save, sender='categories.Category')
+@receiver(pre_delete, sender='categories.Category')
+def sync_category_articles(sender, instance, **kwargs):
+    """分类变更/删除时重新索引该分类下的文章"""
+    _record_published_articles(Article.objects.filter(category=instance))
 
+
+@receiver(post_save, sender='tags.Tag')
+@receiver(pre_delete, sender='tags.Tag')
+def sync_tag_articles(sender, instance, **kwargs):
+    """标签变更/删除时重新索引带该标签的文章"""
+    _record_published_articles(Article.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_author_articles(sender, instance, created, update_fields=None, **kwargs):
+    """作者用户名/昵称变更时重新索引其文章（登录等只更新其他字段的保存跳过）"""
+    if created:
+        return
+    if update_fields is not None and not {'username', 'nickname'} & set(update_fields):
+        return
+    _record_published_articles(Article.objects.filter(author=instance))
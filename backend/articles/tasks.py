@@ -20,84 +20,344 @@ def sync_article_to_es_async(self, article_id: int) -> bool:
     """
     异步同步文章到 Elasticsearch
 
+    已发布的文章写入索引，未发布或已删除的文章从索引删除
+
     Args:
         article_id: 文章 ID
 
     Returns:
         bool: 是否成功
     """
+    from .indexing import sync_articles
+
     try:
-        article = Article.objects.get(id=article_id)
+        result = sync_articles([article_id])
+    except Exception as e:
+        logger.error(f"异步同步文章 {article_id} 到 ES 失败: {e}")
+        raise self.retry(exc=e)
 
-        if article.status != 'published':
-            logger.info(f"文章 {article_id} 状态不是已发布，跳过 ES 同步")
-            return True
+    if result['failed']:
+        raise self.retry(exc=Exception(f"同步文章 {article_id} 到 ES 失败"))
 
-        # 导入并同步
-        from articles.signals import _prepare_article_data, _sync_to_es_with_retry
+    return True
 
-        data = _prepare_article_data(article)
-        success = _sync_to_es_with_retry(article_id, data)
 
-        if not success:
-            raise self.retry(exc=Exception(f"同步文章 {article_id} 到 ES 失败"))
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def drain_search_outbox(self) -> dict:
+    """
+    消费搜索索引发件箱，批量同步到 Elasticsearch
 
-        return True
+    ES 不可用时任务重试，发件箱行保留到同步成功为止
+    """
+    from search.execution import SearchUnavailable
+    from .indexing import SearchIndexOutbox
+
+    try:
+        result = SearchIndexOutbox.drain()
+    except SearchUnavailable:
+        # 熔断中不重试，发件箱行保留到下一次定时消费
+        return {'status': 'skipped', 'reason': 'circuit_open'}
+    except Exception as e:
+        logger.warning(f"消费索引发件箱失败: {e}")
+        raise self.retry(exc=e)
+
+    if result.get('rows'):
+        logger.info(
+            f"索引发件箱消费完成: {result['rows']} 条记录, {result['articles']} 篇文章, "
+            f"写入 {result['indexed']}, 删除 {result['deleted']}, 失败 {result['failed']}"
+        )
+    return result
 
-    except Article.DoesNotExist:
-        logger.warning(f"文章 {article_id} 不存在，跳过 ES 同步")
-        return True
 
+@shared_task
+def flush_view_counters() -> dict:
+    """
+    将 Redis 中缓冲的阅读量批量写回 MySQL
+
+    由 Celery Beat 按 VIEW_COUNTER_FLUSH_INTERVAL 定期执行，
+    写回滞后超过 VIEW_COUNTER_MAX_LAG 时也会由读路径触发
+
+    Returns:
+        dict: 写回结果统计
+    """
+    from .counters import ViewCounterBuffer
+
+    try:
+        result = ViewCounterBuffer.flush()
     except Exception as e:
-        logger.error(f"异步同步文章 {article_id} 到 ES 失败: {e}")
-        raise
+        logger.error(f"阅读量写回失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+    if result['articles'] or result['events']:
+        logger.info(f"阅读量写回完成: {result}")
+
+    return {
+        'status': 'success',
+        **result
+    }
 
 
 @shared_task
-def batch_sync_articles_to_es(article_ids: List[int]) -> dict:
+def rebuild_ranked_feed(name: str) -> dict:
     """
-    批量同步文章到 Elasticsearch
+    从 MySQL 全量重建排行 feed
 
     Args:
-        article_ids: 文章 ID 列表
+        name: feed 名称（popular / featured）
 
     Returns:
-        dict: 同步结果统计
+        dict: 重建结果
     """
-    from articles.signals import _prepare_article_data, _sync_to_es_with_retry
+    from .feeds import RankedFeed
 
-    success_count = 0
-    failed_count = 0
-    failed_ids = []
+    try:
+        total = RankedFeed.rebuild(name)
+        logger.info(f"排行 feed {name} 重建完成，共 {total} 篇文章")
+        return {
+            'status': 'success',
+            'feed': name,
+            'total': total
+        }
+    except Exception as e:
+        logger.error(f"重建排行 feed {name} 失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
 
-    for article_id in article_ids:
+
+@shared_task
+def snapshot_ranked_feeds() -> dict:
+    """
+    将排行 feed 写入 PopularArticles 持久化快照
+
+    Redis 中 feed 丢失时会顺带触发重建
+    """
+    from .feeds import RankedFeed
+
+    results = {}
+    for name in RankedFeed.FEEDS:
         try:
-            article = Article.objects.get(id=article_id)
+            results[name] = RankedFeed.snapshot(name)
+            if not results[name]:
+                RankedFeed.rebuild(name)
+                results[name] = RankedFeed.snapshot(name)
+        except Exception as e:
+            logger.error(f"快照排行 feed {name} 失败: {e}")
+            results[name] = None
 
-            if article.status != 'published':
-                continue
+    return {
+        'status': 'success',
+        'feeds': results
+    }
 
-            data = _prepare_article_data(article)
-            if _sync_to_es_with_retry(article_id, data):
-                success_count += 1
-            else:
-                failed_count += 1
-                failed_ids.append(article_id)
 
-        except Article.DoesNotExist:
-            failed_count += 1
-            failed_ids.append(article_id)
+@shared_task
+def rebuild_slug_index() -> dict:
+    """
+    全量重建 slug → ID 映射和 slug Bloom 过滤器
 
-        except Exception as e:
-            logger.error(f"批量同步文章 {article_id} 失败: {e}")
-            failed_count += 1
-            failed_ids.append(article_id)
+    Bloom 过滤器不支持删除，定期重建以清除已删除/已变更的 slug
+    """
+    from .lookup import ArticleSlugResolver
+
+    try:
+        total = ArticleSlugResolver.rebuild()
+        logger.info(f"slug 索引重建完成，共 {total} 篇文章")
+        return {
+            'status': 'success',
+            'total': total
+        }
+    except Exception as e:
+        logger.error(f"重建 slug 索引失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def rebuild_search_fallback_index() -> dict:
+    """
+    全量重建本地全文降级索引（SQLite FTS5）
+
+    日常由发件箱消费增量更新，定期重建以修正遗漏并整理索引
+    """
+    from search.fallback import LocalSearchIndex
+
+    try:
+        total = LocalSearchIndex.rebuild()
+        return {
+            'status': 'success',
+            'total': total
+        }
+    except Exception as e:
+        logger.error(f"重建本地全文索引失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def compute_related_articles(full: bool = False) -> dict:
+    """
+    计算相关文章列表
+
+    Args:
+        full: 是否全量重算；默认只重算脏集合中签名变化的文章
+
+    Returns:
+        dict: 计算结果
+    """
+    from .related import RelatedArticleEngine
+
+    article_ids = None
+    try:
+        if not full:
+            article_ids = RelatedArticleEngine.pop_dirty()
+            if not article_ids:
+                return {
+                    'status': 'success',
+                    'updated': 0
+                }
+
+        updated = RelatedArticleEngine.compute(article_ids)
+        logger.info(f"相关文章计算完成，更新 {updated} 篇文章")
+        return {
+            'status': 'success',
+            'updated': updated
+        }
+    except ImportError as e:
+        logger.warning(f"缺少相关文章计算依赖 (numpy/scipy)，跳过: {e}")
+        return {
+            'status': 'skipped',
+            'message': str(e)
+        }
+    except Exception as e:
+        logger.error(f"计算相关文章失败: {e}")
+        # 放回脏集合，下次重试
+        for article_id in article_ids or []:
+            RelatedArticleEngine.mark_dirty(article_id)
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def render_article_content(article_id: int) -> dict:
+    """
+    预渲染文章正文 HTML（按内容哈希缓存，已渲染过的内容直接跳过）
+
+    Args:
+        article_id: 文章 ID
+
+    Returns:
+        dict: 渲染结果
+    """
+    from .rendering import RenderedContentCache, get_rendered_content
+
+    article = Article.objects.filter(pk=article_id).only('id', 'content', 'content_hash').first()
+    if article is None:
+        return {
+            'status': 'skipped',
+            'message': '文章不存在'
+        }
+
+    if RenderedContentCache.get(article.content_hash) is not None:
+        return {
+            'status': 'cached',
+            'article_id': article_id
+        }
+
+    try:
+        get_rendered_content(article.content, article.content_hash)
+        return {
+            'status': 'success',
+            'article_id': article_id
+        }
+    except Exception as e:
+        logger.error(f"渲染文章 {article_id} 正文失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def sync_search_counters() -> dict:
+    """
+    将阅读量/点赞数/评论数的变化以 partial update 批量同步到 ES
+
+    排序字段保持新鲜，无需重新索引正文
+    """
+    from .indexing import SearchCounterSync
+
+    try:
+        result = SearchCounterSync.flush()
+    except Exception as e:
+        logger.warning(f"同步计数到 ES 失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
 
     return {
-        'total': len(article_ids),
-        'success': success_count,
-        'failed': failed_count,
-        'failed_ids': failed_ids
+        'status': 'success',
+        **result
+    }
+
+
+@shared_task
+def batch_sync_articles_to_es(article_ids: Optional[List[int]] = None,
+                              chunk_size: Optional[int] = None,
+                              thread_count: Optional[int] = None) -> dict:
+    """
+    批量同步文章到 Elasticsearch
+
+    流式读取已发布文章并通过 parallel_bulk 多线程写入，每个 bulk 批次记录吞吐量
+
+    Args:
+        article_ids: 文章 ID 列表，None 表示全部已发布文章
+        chunk_size: 每个 bulk 请求的文档数
+        thread_count: 并发 bulk 线程数
+
+    Returns:
+        dict: 同步结果统计
+    """
+    from .indexing import indexing_queryset, stream_index
+
+    try:
+        result = stream_index(
+            indexing_queryset(article_ids),
+            chunk_size=chunk_size,
+            thread_count=thread_count,
+        )
+    except Exception as e:
+        logger.error(f"批量同步文章失败: {e}")
+        return {
+            'total': len(article_ids) if article_ids is not None else None,
+            'success': 0,
+            'failed': None,
+            'failed_ids': [],
+            'message': str(e)
+        }
+
+    logger.info(
+        f"批量同步完成: {result['indexed']} 篇成功, {result['failed']} 篇失败, "
+        f"耗时 {result['elapsed']}s ({result['docs_per_second']} 篇/秒)"
+    )
+    return {
+        'total': result['indexed'] + result['failed'],
+        'success': result['indexed'],
+        'failed': result['failed'],
+        'failed_ids': result['failed_ids'],
+        'elapsed': result['elapsed'],
+        'docs_per_second': result['docs_per_second']
     }
 
 
@@ -191,55 +451,117 @@ def invalidate_article_caches(article_id: int):
 
 
 @shared_task
-def rebuild_es_index():
+def rebuild_es_index(slices: Optional[int] = None) -> dict:
     """
-    重建 Elasticsearch 索引
+    零停机重建 Elasticsearch 索引
 
-    警告：这是一个耗时操作，应该离线执行
+    创建新版本索引，按 ID 区间切片由多个 worker 并行写入，
+    全部完成后由 finalize_es_reindex 切换别名
+
+    Args:
+        slices: 并行切片数，默认使用 ES_REINDEX_SLICES
     """
-    try:
-        from search.models import ArticleDocument
-        from django_elasticsearch_dsl.registries import registry
+    from celery import chord
+    from django.conf import settings
+    from django.utils import timezone
+    from search.reindex import BlueGreenReindex
 
-        # 获取所有文档类
-        documents = registry.get_documents()
+    try:
+        started_at = timezone.now()
+        index_name = BlueGreenReindex.create_index()
+        ranges = BlueGreenReindex.plan_slices(slices or settings.ES_REINDEX_SLICES)
+
+        # 任一切片重试耗尽时回调不会执行，由 abort_es_reindex 停止双写并删除新索引
+        callback = finalize_es_reindex.s(index_name, started_at.isoformat())
+        callback.on_error(abort_es_reindex.s(index_name))
+        chord(
+            reindex_es_slice.s(index_name, start_id, end_id) for start_id, end_id in ranges
+        )(callback)
+
+        logger.info(f"开始重建索引 {index_name}，共 {len(ranges)} 个切片")
+        return {
+            'status': 'started',
+            'index': index_name,
+            'slices': len(ranges)
+        }
 
-        for doc in documents:
-            doc_class = doc[0]
-            index_name = doc_class._index._name
+    except Exception as e:
+        logger.error(f"重建 ES 索引失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
 
-            logger.info(f"开始重建索引: {index_name}")
 
-            # 获取需要索引的 queryset
-            queryset = doc_class().get_indexing_queryset()
+@shared_task(bind=True, max_retries=2, default_retry_delay=30)
+def reindex_es_slice(self, index_name: str, start_id: int, end_id: int) -> dict:
+    """将一个 ID 区间的文章写入新索引"""
+    from search.reindex import BlueGreenReindex
 
-            # 批量索引
-            count = 0
-            for obj in queryset.iterator(chunk_size=100):
-                try:
-                    doc_class().update(obj)
-                    count += 1
+    try:
+        result = BlueGreenReindex.index_slice(index_name, start_id, end_id)
+    except Exception as e:
+        logger.warning(f"切片 [{start_id}, {end_id}) 写入失败: {e}")
+        raise self.retry(exc=e)
 
-                    if count % 100 == 0:
-                        logger.info(f"已索引 {count} 条记录")
+    return {
+        'start_id': start_id,
+        'end_id': end_id,
+        'indexed': result['indexed'],
+        'failed': result['failed'],
+        'failed_ids': result['failed_ids']
+    }
 
-                except Exception as e:
-                    logger.error(f"索引对象 {obj} 失败: {e}")
 
-            logger.info(f"索引 {index_name} 重建完成，共 {count} 条记录")
+@shared_task
+def abort_es_reindex(request, exc, traceback, index_name: str) -> dict:
+    """切片任务最终失败时的 chord 错误回调：停止双写并删除新索引"""
+    from search.reindex import BlueGreenReindex
 
+    logger.error(f"索引重建 {index_name} 的切片失败，放弃重建: {exc}")
+    try:
+        BlueGreenReindex.abort(index_name)
+    except Exception as e:
+        logger.error(f"放弃索引重建 {index_name} 失败: {e}")
         return {
-            'status': 'success',
-            'message': '索引重建完成'
+            'status': 'error',
+            'message': str(e)
         }
 
+    return {
+        'status': 'aborted',
+        'index': index_name
+    }
+
+
+@shared_task
+def finalize_es_reindex(slice_results: List[dict], index_name: str, started_at: str) -> dict:
+    """全部切片完成后恢复索引设置、补齐变更并切换别名"""
+    from django.utils.dateparse import parse_datetime
+    from search.reindex import BlueGreenReindex
+
+    failed_ids = [article_id for result in slice_results for article_id in result.get('failed_ids', [])]
+    if failed_ids:
+        logger.warning(f"索引 {index_name} 有 {len(failed_ids)} 篇文章写入失败，将在补齐阶段重试")
+
+    try:
+        result = BlueGreenReindex.finalize(index_name, parse_datetime(started_at), failed_ids)
     except Exception as e:
-        logger.error(f"重建 ES 索引失败: {e}")
+        # finalize 只在别名切换前的步骤失败时抛出异常，此时可以安全放弃新索引
+        logger.error(f"切换索引 {index_name} 失败: {e}")
+        BlueGreenReindex.abort(index_name)
         return {
             'status': 'error',
             'message': str(e)
         }
 
+    logger.info(f"索引重建完成，别名已切换到 {index_name}")
+    return {
+        'status': 'success',
+        'indexed': sum(r['indexed'] for r in slice_results),
+        **result
+    }
+
 
 @shared_task
 def calculate_article_hot_scores(article_ids: Optional[List[int]] = None):
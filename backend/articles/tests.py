@@ -1,3 +1,252 @@
-from django.test import TestCase
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from users.models import User
+from utils.pagination import KeysetPaginator, encode_cursor
+from utils.testing import RedisTestMixin
+
+from .caching import ArticleDetailCache
+from .content import process_content
+from .counters import ViewCounterBuffer
+from .likes import ArticleLikeService
+from .models import Article, ArticleLike, ArticleView
+from .rendering import render_markdown
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('articles.indexing.SearchIndexOutbox.schedule_drain')
+class ArticleChangeBatchTests(TransactionTestCase):
+    """文章变更副作用：自动提交时立即处理，事务中提交后处理"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password')
+
+    def _create_article(self):
+        return Article.objects.create(
+            title='标题', slug='batch-article', description='描述', content='正文', author=self.author
+        )
+
+    def test_save_outside_atomic_bumps_detail_cache_version(self, schedule_drain):
+        article = self._create_article()
+        version = ArticleDetailCache.get_version(article.pk)
+
+        article.title = '新标题'
+        article.save()
+
+        self.assertGreater(ArticleDetailCache.get_version(article.pk), version)
+        self.assertTrue(schedule_drain.called)
+
+    def test_save_in_atomic_defers_until_commit(self, schedule_drain):
+        article = self._create_article()
+        version = ArticleDetailCache.get_version(article.pk)
+        schedule_drain.reset_mock()
+
+        with transaction.atomic():
+            article.title = '新标题'
+            article.save()
+            article.save()
+            self.assertEqual(ArticleDetailCache.get_version(article.pk), version)
+
+        self.assertGreater(ArticleDetailCache.get_version(article.pk), version)
+        schedule_drain.assert_called_once()
+
+
+class RenderedHeadingAnchorTests(SimpleTestCase):
+    """渲染后的标题 id 与 Article.toc 中的锚点一致"""
+
+    CONTENT = (
+        '# 简介\n\n正文\n\n'
+        '## Setup\n\n'
+        '## Setup\n\n'
+        '## 安装 依赖\n\n'
+        '```python\n# 代码中的注释不是标题\n```\n\n'
+        '## 简介\n'
+    )
+
+    def test_toc_anchors_match_rendered_ids(self):
+        anchors = [item['anchor'] for item in process_content(self.CONTENT).toc]
+        html = render_markdown(self.CONTENT)
+        ids = re.findall(r'<h[1-6][^>]*\bid="([^"]+)"', html)
+
+        self.assertEqual(anchors, ['简介', 'setup', 'setup-1', '安装-依赖', '简介-1'])
+        self.assertEqual(ids, anchors)
+
+    def test_crlf_content_matches_lf(self):
+        crlf = process_content(self.CONTENT.replace('\n', '\r\n'))
+        lf = process_content(self.CONTENT)
+
+        self.assertEqual(crlf.toc, lf.toc)
+        self.assertEqual(crlf.content_hash, lf.content_hash)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('articles.indexing.SearchIndexOutbox.schedule_drain')
+class KeysetPaginatorTests(TestCase):
+    """按 (排序字段, id) 的 keyset 分页"""
+
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='password')
+        # 前三篇阅读量相同，翻页依赖 id 区分
+        self.articles = [
+            Article.objects.create(
+                title=f'文章 {i}', slug=f'keyset-{i}', description='描述', content='正文',
+                author=author, view_count=view_count
+            )
+            for i, view_count in enumerate([10, 10, 10, 5])
+        ]
+
+    def _paginator(self, page_size=2):
+        return KeysetPaginator(Article.objects.all(), 'view_count', page_size=page_size)
+
+    def _ids(self, result):
+        return [article.pk for article in result['items']]
+
+    def test_next_cursor_across_ties(self, schedule_drain):
+        tied = sorted((article.pk for article in self.articles[:3]), reverse=True)
+
+        first = self._paginator().paginate()
+        second = self._paginator().paginate(cursor=first['next_cursor'])
+
+        self.assertEqual(self._ids(first), tied[:2])
+        self.assertEqual(self._ids(second), [tied[2], self.articles[3].pk])
+
+    def test_last_page_has_no_next_cursor(self, schedule_drain):
+        first = self._paginator(page_size=3).paginate()
+        last = self._paginator(page_size=3).paginate(cursor=first['next_cursor'])
+
+        self.assertEqual(self._ids(last), [self.articles[3].pk])
+        self.assertIsNone(last['next_cursor'])
+        self.assertIsNone(self._paginator(page_size=4).paginate()['next_cursor'])
+
+    def test_tampered_cursor_raises_value_error(self, schedule_drain):
+        cursor = self._paginator().paginate()['next_cursor']
+
+        for tampered in (cursor[:-3] + '!!!', 'not-a-cursor', encode_cursor(['db'])):
+            with self.assertRaises(ValueError):
+                self._paginator().paginate(cursor=tampered)
+
+        other_field = encode_cursor({'kind': 'db', 'field': 'like_count', 'desc': True, 'value': 1, 'id': 1})
+        with self.assertRaises(ValueError):
+            self._paginator().paginate(cursor=other_field)
+
+    def test_wrong_type_cursor_raises_value_error(self, schedule_drain):
+        base = {'kind': 'db', 'field': 'view_count', 'desc': True}
+
+        for state in (
+            {'value': 10, 'id': 'abc'},
+            {'value': 10, 'id': True},
+            {'value': 'abc', 'id': 1},
+            {'value': {'$gt': 1}, 'id': 1},
+        ):
+            with self.assertRaises(ValueError):
+                self._paginator().paginate(cursor=encode_cursor({**base, **state}))
+
+        published = KeysetPaginator(Article.objects.all(), 'published_at', page_size=2)
+        with self.assertRaises(ValueError):
+            published.paginate(cursor=encode_cursor({
+                'kind': 'db', 'field': 'published_at', 'desc': True, 'value': 12345, 'id': 1
+            }))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('articles.indexing.SearchIndexOutbox.schedule_drain')
+class ArticleLikeServiceTests(TestCase):
+    """点赞幂等且点赞数与点赞记录一致"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='liker', password='password')
+        self.article = Article.objects.create(
+            title='标题', slug='like-article', description='描述', content='正文',
+            author=self.user, status=Article.ArticleStatus.PUBLISHED
+        )
+
+    def _assert_count_consistent(self, expected):
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, expected)
+        self.assertEqual(ArticleLike.objects.filter(article=self.article).count(), expected)
+
+    def test_double_like_counts_once(self, schedule_drain):
+        self.assertEqual(ArticleLikeService.like(self.article.pk, user_id=self.user.pk), (True, 1))
+        self.assertEqual(ArticleLikeService.like(self.article.pk, user_id=self.user.pk), (False, 1))
+        self.assertEqual(ArticleLikeService.like(self.article.pk, ip_address='10.0.0.1'), (True, 2))
+        self.assertEqual(ArticleLikeService.like(self.article.pk, ip_address='10.0.0.1'), (False, 2))
+        self._assert_count_consistent(2)
+
+    def test_unlike_removes_only_own_like(self, schedule_drain):
+        ArticleLikeService.like(self.article.pk, user_id=self.user.pk)
+        ArticleLikeService.like(self.article.pk, ip_address='10.0.0.1')
+
+        self.assertEqual(ArticleLikeService.unlike(self.article.pk, ip_address='10.0.0.1'), (True, 1))
+        self.assertEqual(ArticleLikeService.unlike(self.article.pk, ip_address='10.0.0.1'), (False, 1))
+        self.assertEqual(ArticleLikeService.liked_ids([self.article.pk], user_id=self.user.pk), {self.article.pk})
+        self._assert_count_consistent(1)
+
+        self.assertEqual(ArticleLikeService.unlike(self.article.pk, user_id=self.user.pk), (True, 0))
+        self._assert_count_consistent(0)
+
+    def test_anonymous_like_without_ip_is_rejected(self, schedule_drain):
+        for ip_address in (None, ''):
+            with self.assertRaises(ValueError):
+                ArticleLikeService.like(self.article.pk, ip_address=ip_address)
+            with self.assertRaises(ValueError):
+                ArticleLikeService.unlike(self.article.pk, ip_address=ip_address)
+
+        self.assertEqual(ArticleLikeService.liked_ids([self.article.pk]), set())
+        self._assert_count_consistent(0)
+
+
+@mock.patch('articles.counters.ViewCounterBuffer._maybe_trigger_flush')
+@mock.patch('articles.indexing.SearchIndexOutbox.schedule_drain')
+class ViewCounterBufferTests(RedisTestMixin, TestCase):
+    """阅读量缓冲写回：写库失败时阅读记录保留到下次写回"""
+
+    def setUp(self):
+        super().setUp()
+        author = User.objects.create_user(username='reader', password='password')
+        self.article = Article.objects.create(
+            title='标题', slug='view-article', description='描述', content='正文',
+            author=author, status=Article.ArticleStatus.PUBLISHED
+        )
+
+    def test_flush_round_trip(self, schedule_drain, trigger_flush):
+        for ip_address in ('10.0.0.1', '10.0.0.2', 'not-an-ip'):
+            ViewCounterBuffer.record(self.article.pk, ip_address=ip_address)
+
+        result = ViewCounterBuffer.flush()
+
+        self.assertEqual(result, {'articles': 1, 'views': 3, 'events': 3})
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 3)
+        self.assertEqual(
+            sorted(ArticleView.objects.filter(article=self.article).values_list('ip_address', flat=True), key=str),
+            sorted(['10.0.0.1', '10.0.0.2', None], key=str)
+        )
+        self.assertEqual(ViewCounterBuffer.get_pending([self.article.pk]), {})
+
+    def test_failed_event_write_is_retried(self, schedule_drain, trigger_flush):
+        for _ in range(3):
+            ViewCounterBuffer.record(self.article.pk)
+
+        with mock.patch.object(ArticleView.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                ViewCounterBuffer.flush()
+        self.assertEqual(ArticleView.objects.count(), 0)
+
+        ViewCounterBuffer.record(self.article.pk)
+        ViewCounterBuffer.flush()
+        # 上次失败的 3 条先写回，新记录在下一轮写回
+        self.assertEqual(ArticleView.objects.count(), 3)
+        ViewCounterBuffer.flush()
+        self.assertEqual(ArticleView.objects.count(), 4)
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 4)
@@ -2,6 +2,8 @@
 文章视图
 """
 
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -23,8 +25,17 @@ from utils.cache_utils import (
     CacheWarmer,
     RateLimiter
 )
+from utils.pagination import encode_cursor, decode_cursor, KeysetPaginator
+from utils.timing import timed
 
 from .models import Article, ArticleVersion
+from .caching import ArticleDetailCache
+from .counters import ViewCounterBuffer
+from .feeds import RankedFeed
+from .likes import ArticleLikeService
+from .lookup import ArticleSlugResolver
+from .related import RelatedArticleEngine
+from .rendering import get_rendered_content
 from .serializers import (
     ArticleListSerializer,
     ArticleDetailSerializer,
@@ -32,6 +43,17 @@ from .serializers import (
     ArticleVersionSerializer
 )
 
+logger = logging.getLogger(__name__)
+
+# 列表分页配置
+MAX_PAGE_SIZE = 100
+ES_MAX_RESULT_WINDOW = 10000  # 与 ES 默认 index.max_result_window 一致
+ES_PIT_KEEP_ALIVE = '2m'  # 游标翻页时 point-in-time 的保持时间
+ES_SHARD_DOC_MAX = 2 ** 63 - 1  # _shard_doc 排序值上限
+KEYSET_SORT_FIELDS = ('published_at', 'created_at', 'view_count', 'like_count')  # MySQL 降级时支持的排序字段
+MAX_BATCH_QUERIES = 10  # 批量接口单次最多子查询数
+FEED_FILTER_PARAMS = ('category', 'tag', 'locale', 'status', 'author', 'search')  # 存在时不使用预计算 feed
+
 
 class ArticleViewSet(ModelViewSet):
     """文章视图集"""
@@ -43,30 +65,38 @@ class ArticleViewSet(ModelViewSet):
         重写 get_object 方法支持 slug 和 ID 查找
         使用 self.queryset 以利用 select_related/prefetch_related
         """
+        from django.http import Http404
+
         lookup_value = self.kwargs.get(self.lookup_field)
-        queryset = self.get_queryset()
 
-        # 尝试 slug 查询
+        # 先通过 slug → ID 映射解析（不存在的 slug 由负缓存/Bloom 过滤器直接拒绝）
+        article_id = ArticleSlugResolver.resolve(lookup_value)
+        if article_id is None:
+            raise Http404('文章不存在')
+
         try:
-            return queryset.get(slug=lookup_value)
+            article = self.get_queryset().get(pk=article_id)
         except Article.DoesNotExist:
-            pass
-
-        # 尝试 ID 查询
-        if lookup_value.isdigit():
+            raise Http404('文章不存在')
+
+        if article.slug != lookup_value and str(article.pk) != lookup_value:
+            # 进程内映射已过期（slug 在其他进程中被修改），丢弃后重新解析一次
+            ArticleSlugResolver.forget_local(lookup_value)
+            article_id = ArticleSlugResolver.resolve(lookup_value)
+            if article_id is None or article_id == article.pk:
+                raise Http404('文章不存在')
             try:
-                return queryset.get(pk=int(lookup_value))
+                article = self.get_queryset().get(pk=article_id)
             except Article.DoesNotExist:
-                pass
+                raise Http404('文章不存在')
 
-        from django.http import Http404
-        raise Http404('文章不存在')
+        return article
 
     # 根据操作选择不同的序列化器
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'featured', 'popular']:
             return ArticleListSerializer
-        elif self.action in ['retrieve', 'featured', 'popular']:
+        elif self.action == 'retrieve':
             return ArticleDetailSerializer
         return ArticleCreateUpdateSerializer
 
@@ -114,29 +144,227 @@ class ArticleViewSet(ModelViewSet):
         if author_id:
             queryset = queryset.filter(author_id=author_id)
 
-        # 搜索
+        # 搜索（ES 降级路径）：使用本地全文索引，避免对正文 icontains 全表扫描
         search = params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(content__icontains=search)
-            )
+            from search.fallback import LocalSearchIndex
+
+            article_ids = LocalSearchIndex.search(search)
+            if article_ids is not None:
+                queryset = queryset.filter(pk__in=article_ids)
+            else:
+                # 本地索引尚未建立，只匹配标题和描述
+                queryset = queryset.filter(
+                    Q(title__icontains=search) |
+                    Q(description__icontains=search)
+                )
 
         return queryset.distinct()
 
     @swagger_auto_schema(
         operation_summary='获取文章列表',
-        operation_description='支持分页、过滤、排序和搜索。使用 Elasticsearch 查询 + MySQL 统计数据',
+        operation_description='支持分页、过滤、排序和搜索。使用 Elasticsearch 查询 + MySQL 统计数据。传入 cursor 参数（首页为空）使用游标翻页',
         responses={200: ArticleListSerializer}
     )
     def list(self, request, *args, **kwargs):
         """文章列表 - 从 ES 查询 + MySQL 批量查询统计"""
-        from search.models import ArticleDocument
+        from search.execution import SearchUnavailable, run_search
 
         params = request.query_params
+        user = request.user
 
         # 1. 从 ES 构建搜索查询
+        search = self._build_es_search(request)
+
+        # 排序
+        sort_by = params.get('sort', '-published_at')
+
+        # 分页
+        page = int(params.get('page', 1))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', 20))))
+
+        # 游标模式：search_after + point-in-time，深分页每页成本恒定
+        cursor = params.get('cursor')
+        if cursor is not None:
+            return self._list_with_cursor(request, search, cursor, sort_by, page_size)
+
+        start = (page - 1) * page_size
+        end = start + page_size
+        if end > ES_MAX_RESULT_WINDOW:
+            return Response({
+                'code': 400,
+                'message': f'页码过大，超过 {ES_MAX_RESULT_WINDOW} 条请使用 cursor 参数翻页',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        search = search.sort(sort_by)[start:end]
+
+        # 执行搜索
+        try:
+            # 对于管理员请求，强制刷新索引以确保获取最新数据
+            # 对于普通用户请求，使用默认设置以提高性能
+            if user.is_authenticated and user.is_staff:
+                search = search.params(refresh=True)
+            response = run_search(search)
+        except SearchUnavailable:
+            # 熔断器打开，直接降级，不等待 ES 超时
+            return self._list_from_mysql(request, *args, **kwargs)
+        except Exception as e:
+            # ES 查询失败，降级到 MySQL
+            logger.error(f"ES 查询失败，降级到 MySQL: {e}")
+            return self._list_from_mysql(request, *args, **kwargs)
+
+        # 2. 批量获取统计并转换格式
+        results = self._format_es_hits(response)
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'results': results,
+                'count': response.hits.total.value,
+                'page': page,
+                'page_size': page_size
+            }
+        })
+
+    def _list_with_cursor(self, request, search, cursor, sort_by, page_size):
+        """
+        游标分页：使用 point-in-time + search_after 翻页
+
+        首次请求传入空的 cursor 参数，后续请求传入上一页返回的 next_cursor。
+        排序在游标中固定，并以 id 作为稳定的次级排序，保证翻页不重复、不遗漏。
+
+        第一页是普通查询（可参与 single-flight 合并），不打开 PIT：大部分请求只看第一页，
+        为每个请求打开的 PIT 会在 ES 中保留到过期。请求第二页时才打开 PIT，
+        之后的页面使用同一快照
+
+        Args:
+            request: 请求对象
+            search: 已应用过滤条件的 ES 查询
+            cursor: 游标字符串（空字符串表示第一页）
+            sort_by: 排序字段（仅第一页生效）
+            page_size: 每页数量
+
+        Returns:
+            Response: 包含 next_cursor 的分页结果
+        """
+        from search.models import ArticleDocument
+        from search.execution import SearchUnavailable, call_es, run_search
+
+        try:
+            state = decode_cursor(cursor) if cursor else {}
+            if state.get('kind') == KeysetPaginator.CURSOR_KIND:
+                # ES 故障期间由 MySQL 降级接口签发的游标，继续走 MySQL
+                return self._list_from_mysql(request)
+            if state and state.get('kind') != 'es':
+                raise ValueError('cursor kind mismatch')
+        except ValueError:
+            return Response({
+                'code': 400,
+                'message': '无效的游标',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        es = ArticleDocument._get_connection()
+        sort_by = state.get('sort', sort_by)
+        pit_id = state.get('pit')
+
+        try:
+            after = state.get('after')
+            if state:
+                if not pit_id:
+                    pit_id = call_es(
+                        es.open_point_in_time,
+                        index=ArticleDocument._index._name,
+                        keep_alive=ES_PIT_KEEP_ALIVE
+                    )['id']
+                    # 第一页的排序值没有 _shard_doc；(排序字段, id) 已唯一，
+                    # 取最大值即可从上一页最后一篇之后继续
+                    after = list(after) + [ES_SHARD_DOC_MAX]
+                # 使用 PIT 时不能指定索引，显式使用 _shard_doc 作为末位排序，各页排序值长度一致
+                search = search.index().sort(sort_by, {'id': {'order': 'asc'}}, {'_shard_doc': 'asc'})
+                search = search.extra(pit={'id': pit_id, 'keep_alive': ES_PIT_KEEP_ALIVE})
+            else:
+                search = search.sort(sort_by, {'id': {'order': 'asc'}})
+            search = search.extra(
+                size=page_size,
+                # 只有第一页需要统计总数
+                track_total_hits=not state
+            )
+            if after:
+                search = search.extra(search_after=after)
+
+            response = run_search(search)
+        except SearchUnavailable:
+            if state:
+                return Response({
+                    'code': 503,
+                    'message': '搜索服务暂时不可用，请稍后重试',
+                    'data': None
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            return self._list_from_mysql(request)
+        except Exception as e:
+            if state:
+                # PIT 过期或 ES 故障，游标无法继续使用
+                logger.warning(f"ES 游标查询失败: {e}")
+                return Response({
+                    'code': 400,
+                    'message': '游标已失效，请从第一页重新开始',
+                    'data': None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            logger.error(f"ES 查询失败，降级到 MySQL: {e}")
+            return self._list_from_mysql(request)
+
+        hits = list(response)
+        results = self._format_es_hits(hits)
+
+        # ES 每次查询可能返回新的 PIT id，后续请求应使用最新的 id
+        if pit_id:
+            pit_id = getattr(response, 'pit_id', None) or pit_id
+
+        next_cursor = None
+        if len(hits) == page_size:
+            next_state = {
+                'kind': 'es',
+                'sort': sort_by,
+                'after': list(hits[-1].meta.sort),
+            }
+            if pit_id:
+                next_state['pit'] = pit_id
+            next_cursor = encode_cursor(next_state)
+        elif pit_id:
+            # 已到最后一页，释放 PIT
+            try:
+                es.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logger.debug(f"释放 PIT 失败: {e}")
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'results': results,
+                'count': response.hits.total.value if not state else None,
+                'page_size': page_size,
+                'next_cursor': next_cursor
+            }
+        })
+
+    def _build_es_search(self, request, params=None):
+        """
+        根据查询参数构建 ES 查询（过滤 + 全文搜索，不含排序和分页）
+
+        Args:
+            request: 请求对象
+            params: 查询参数，默认使用 request.query_params（批量接口传入子查询参数）
+
+        Returns:
+            Search: elasticsearch_dsl 查询对象
+        """
+        from search.models import ArticleDocument
+
+        params = request.query_params if params is None else params
         search = ArticleDocument.search()
 
         # 权限过滤
@@ -152,7 +380,8 @@ class ArticleViewSet(ModelViewSet):
             # 需要查询 MySQL 获取对应的 slug
             from categories.models import Category
             try:
-                category = Category.objects.get(category_type=category_param)
+                with timed('category'):
+                    category = Category.objects.get(category_type=category_param)
                 search = search.filter('term', category_slug=category.slug)
             except Category.DoesNotExist:
                 # 如果分类不存在，返回空结果
@@ -198,82 +427,63 @@ class ArticleViewSet(ModelViewSet):
             )
             search = search.query(q)
 
-        # 排序
-        sort_by = params.get('sort', '-published_at')
-        search = search.sort(sort_by)
-
-        # 分页
-        page = int(params.get('page', 1))
-        page_size = int(params.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
-        search = search[start:end]
+        return search
 
-        # 执行搜索
-        try:
-            # 对于管理员请求，强制刷新索引以确保获取最新数据
-            # 对于普通用户请求，使用默认设置以提高性能
-            if user.is_authenticated and user.is_staff:
-                search = search.params(refresh=True)
-            response = search.execute()
-        except Exception as e:
-            # ES 查询失败，降级到 MySQL
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"ES 查询失败，降级到 MySQL: {e}")
-            return self._list_from_mysql(request, *args, **kwargs)
-
-        # 2. 批量获取统计（避免 N+1 查询）
-        article_ids = [hit.id for hit in response]
-        stats_dict = self._get_batch_stats(article_ids)
-
-        # 3. 合并数据并转换为前端期望的格式
-        results = []
-        for hit in response:
-            data = hit.to_dict()
-
-            # 构造嵌套的 author 对象（适配前端期望的 Article 格式）
-            data['author'] = {
-                'id': 0,  # ES 中没有 author_id
-                'username': data.pop('author_username', ''),
-                'nickname': data.pop('author_nickname', ''),
-                'avatar': ''
-            }
-
-            # 构造嵌套的 category 对象
-            category_name = data.pop('category_name', '')
-            category_slug = data.pop('category_slug', '')
-            data['category'] = {
-                'id': 0,
-                'slug': category_slug,
-                'name': category_name,
-                'category_type': category_slug  # ES 中 category_slug 就是 category_type
-            }
-            # 保留 category_type 字段（前端适配器需要）
-            data['category_type'] = category_slug
-
-            # 构造嵌套的 tags 数组
-            tags_names = data.pop('tags_names', [])
-            data['tags'] = [{'name': name, 'slug': name.lower()} for name in tags_names]
-
-            # 合并统计
-            stats = stats_dict.get(hit.id, {})
-            data['view_count'] = stats.get('view_count', 0)
-            data['like_count'] = stats.get('like_count', 0)
-            data['comment_count'] = stats.get('comment_count', 0)
-            results.append(data)
+    def _format_es_hits(self, response, stats_dict=None):
+        """
+        将 ES 结果转换为前端期望的文章格式，并合并统计数据
 
-        return Response({
-            'code': 200,
-            'message': 'success',
-            'data': {
-                'results': results,
-                'count': response.hits.total.value,
-                'page': page,
-                'page_size': page_size
-            }
-        })
+        Args:
+            response: ES 查询结果
+            stats_dict: 已查询的统计数据（批量接口对所有子查询只查询一次）
 
+        Returns:
+            list: 文章数据列表
+        """
+        # 批量获取统计（避免 N+1 查询）
+        if stats_dict is None:
+            stats_dict = self._get_batch_stats([hit.id for hit in response])
+
+        # 合并数据并转换为前端期望的格式
+        with timed('format'):
+            return [self._format_es_hit(hit, stats_dict) for hit in response]
+
+    def _format_es_hit(self, hit, stats_dict):
+        """转换单条 ES 结果"""
+        data = hit.to_dict()
+
+        # 构造嵌套的 author 对象（适配前端期望的 Article 格式）
+        data['author'] = {
+            'id': 0,  # ES 中没有 author_id
+            'username': data.pop('author_username', ''),
+            'nickname': data.pop('author_nickname', ''),
+            'avatar': ''
+        }
+
+        # 构造嵌套的 category 对象
+        category_name = data.pop('category_name', '')
+        category_slug = data.pop('category_slug', '')
+        data['category'] = {
+            'id': 0,
+            'slug': category_slug,
+            'name': category_name,
+            'category_type': category_slug  # ES 中 category_slug 就是 category_type
+        }
+        # 保留 category_type 字段（前端适配器需要）
+        data['category_type'] = category_slug
+
+        # 构造嵌套的 tags 数组
+        tags_names = data.pop('tags_names', [])
+        data['tags'] = [{'name': name, 'slug': name.lower()} for name in tags_names]
+
+        # 合并统计
+        stats = stats_dict.get(hit.id, {})
+        data['view_count'] = stats.get('view_count', 0)
+        data['like_count'] = stats.get('like_count', 0)
+        data['comment_count'] = stats.get('comment_count', 0)
+        return data
+
+    @timed('stats')
     def _get_batch_stats(self, article_ids):
         """
         批量查询统计（单次 SQL + Redis 缓存 60 秒）
@@ -349,55 +559,139 @@ class ArticleViewSet(ModelViewSet):
         return result
 
     def _list_from_mysql(self, request, *args, **kwargs):
-        """降级方案：从 MySQL 查询（ES 查询失败时）"""
+        """
+        降级方案：从 MySQL 查询（ES 查询失败时）
+
+        使用 keyset 分页代替 Paginator：不再每页执行 COUNT(*)，
+        传入 cursor 时第 N 页与第 1 页成本相同，总数使用缓存的近似值
+        """
         queryset = self.filter_queryset(self.get_queryset())
+        params = request.query_params
 
         # 作者过滤在 MySQL 中处理
-        author_id = request.query_params.get('author')
+        author_id = params.get('author')
         if author_id:
             queryset = queryset.filter(author_id=author_id)
 
-        # 手动分页（与 ES 格式保持一致）
-        from django.core.paginator import Paginator
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
+        # 排序（仅支持可用于 keyset 分页的字段）
+        sort_by = params.get('sort', '-published_at')
+        field = sort_by.lstrip('-')
+        if field not in KEYSET_SORT_FIELDS:
+            field, sort_by = 'published_at', '-published_at'
+
+        page = max(1, int(params.get('page', 1)))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', 20))))
 
-        paginator = Paginator(queryset, page_size)
+        paginator = KeysetPaginator(
+            queryset, field, page_size=page_size, descending=sort_by.startswith('-')
+        )
         try:
-            page_obj = paginator.page(page)
-        except:
-            page_obj = paginator.page(1)
+            with timed('mysql'):
+                result = paginator.paginate(
+                    cursor=params.get('cursor') or None,
+                    offset=(page - 1) * page_size
+                )
+        except ValueError:
+            return Response({
+                'code': 400,
+                'message': '无效的游标',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = self.get_serializer(page_obj.object_list, many=True)
+        with timed('serialize'):
+            data = self.get_serializer(result['items'], many=True).data
 
         return Response({
             'code': 200,
             'message': 'success',
             'data': {
-                'results': serializer.data,
-                'count': paginator.count,
+                'results': data,
+                'count': paginator.approximate_count(),
                 'page': page,
-                'page_size': page_size
+                'page_size': page_size,
+                'next_cursor': result['next_cursor']
             }
         })
 
+    def _get_limit(self, request, default: int = 20) -> int:
+        """解析 limit 参数（限制在 1 ~ MAX_PAGE_SIZE，无效时使用默认值）"""
+        try:
+            return max(1, min(MAX_PAGE_SIZE, int(request.query_params.get('limit', default))))
+        except ValueError:
+            return default
+
+    def _paginate_action(self, request, queryset, field, page_size):
+        """
+        featured / popular 等附加接口的 keyset 分页
+
+        Args:
+            request: 请求对象
+            queryset: 已过滤的查询集
+            field: 降序排序字段
+            page_size: 每页数量
+
+        Returns:
+            tuple: (当前页对象列表, 下一页游标)
+
+        Raises:
+            ValueError: 游标无效
+        """
+        paginator = KeysetPaginator(queryset, field, page_size=page_size)
+        result = paginator.paginate(cursor=request.query_params.get('cursor') or None)
+        return result['items'], result['next_cursor']
+
     @swagger_auto_schema(
         operation_summary='获取文章详情',
         operation_description='根据 ID 或 slug 获取文章详细信息',
+        manual_parameters=[
+            openapi.Parameter(
+                'content_format', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='传 html 时额外返回服务端渲染的 content_html'
+            ),
+        ],
         responses={200: ArticleDetailSerializer}
     )
     def retrieve(self, request, *args, **kwargs):
         """文章详情 - 支持 ID 或 slug 查找"""
-        article = self.get_object()
+        lookup_value = self.kwargs.get(self.lookup_field)
 
-        # 增加阅读量
-        Article.objects.filter(pk=article.pk).update(view_count=F('view_count') + 1)
+        # 优先读取已发布文章的详情缓存（命中时无需查询 MySQL 和序列化）
+        with timed('detail_cache'):
+            data = ArticleDetailCache.get(lookup_value)
+        if data is None:
+            with timed('mysql'):
+                cache_version = ArticleDetailCache.get_version(lookup_value)
+                article = self.get_object()
+            with timed('serialize'):
+                data = self.get_serializer(article).data
+            if article.is_published:
+                ArticleDetailCache.set(lookup_value, cache_version, data)
+
+        article_id = data['id']
+
+        # 增加阅读量（先写入 Redis 缓冲，由 Celery 批量写回 MySQL）
+        with timed('view_counter'):
+            pending_views = ViewCounterBuffer.record(
+                article_id,
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            )
+
+        # 统计字段使用统计缓存中的实时数据覆盖
+        stats = self._get_batch_stats([article_id])[article_id]
+        data['view_count'] = stats['view_count'] + pending_views
+        data['like_count'] = stats['like_count']
+        data['comment_count'] = stats['comment_count']
+
+        # 可选返回服务端渲染的 HTML（DRF 保留了 format 参数，这里使用 content_format）
+        if request.query_params.get('content_format') == 'html':
+            with timed('render'):
+                data['content_html'] = get_rendered_content(data.get('content') or '')
 
-        serializer = self.get_serializer(article)
         return Response({
             'code': 200,
             'message': 'success',
-            'data': serializer.data
+            'data': data
         })
 
     @swagger_auto_schema(
@@ -481,37 +775,302 @@ class ArticleViewSet(ModelViewSet):
         })
 
     @swagger_auto_schema(
-        operation_summary='获取精选文章',
-        operation_description='获取所有精选文章列表',
-        responses={200: ArticleDetailSerializer(many=True)}
+        operation_summary='批量查询',
+        operation_description=(
+            '一次请求执行多个命名子查询（一次 ES msearch），按名称返回结果。'
+            'type: list 使用文章列表参数（不支持 cursor），search 使用 /search/ 参数，suggest 使用 /search/suggest/ 参数'
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['queries'],
+            properties={
+                'queries': openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    description='{名称: {"type": "list|search|suggest", "params": {...}}}',
+                    additional_properties=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'type': openapi.Schema(type=openapi.TYPE_STRING, enum=['list', 'search', 'suggest']),
+                            'params': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        }
+                    )
+                ),
+            }
+        ),
+        responses={200: '按名称返回的子查询结果'}
     )
-    @action(detail=False, methods=['get'])
-    def featured(self, request):
-        """精选文章"""
-        queryset = self.get_queryset().filter(featured=True)
-        serializer = self.get_serializer(queryset, many=True)
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """批量查询：所有子查询一次 msearch，统计数据一次批量查询"""
+        from elasticsearch.exceptions import ApiError, TransportError
+        from elasticsearch_dsl import MultiSearch
+        from search.execution import SearchUnavailable, call_es, es_breaker
+        from search.models import ArticleDocument
+        from search.views import DEFAULT_SEARCH_TIMEOUT
+
+        queries = request.data.get('queries') if isinstance(request.data, dict) else None
+        if not isinstance(queries, dict) or not queries:
+            return Response({
+                'code': 400,
+                'message': 'queries 必须是非空对象',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(queries) > MAX_BATCH_QUERIES:
+            return Response({
+                'code': 400,
+                'message': f'单次最多 {MAX_BATCH_QUERIES} 个子查询',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        plans = {}
+        errors = {}
+        for name, spec in queries.items():
+            spec = spec if isinstance(spec, dict) else {}
+            params = spec.get('params') or {}
+            if not isinstance(params, dict):
+                errors[name] = 'params 必须是对象'
+                continue
+            # 与 query string 一致，参数值统一为字符串
+            params = {key: str(value) for key, value in params.items()}
+            try:
+                plans[name] = self._plan_batch_query(request, spec.get('type', 'list'), params)
+            except ValueError as e:
+                errors[name] = str(e)
+
+        if errors:
+            return Response({
+                'code': 400,
+                'message': '子查询参数无效',
+                'data': {'errors': errors}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        multi_search = MultiSearch(index=ArticleDocument._index._name).params(
+            request_timeout=DEFAULT_SEARCH_TIMEOUT
+        )
+        for plan in plans.values():
+            multi_search = multi_search.add(plan['search'])
+
+        try:
+            with timed('es'):
+                responses = call_es(multi_search.execute, raise_on_error=False)
+        except SearchUnavailable:
+            response = Response({
+                'code': 503,
+                'message': '搜索服务暂时不可用，请改用单独的接口',
+                'data': None
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = es_breaker.open_seconds
+            return response
+        except (ApiError, TransportError) as e:
+            logger.error(f"批量查询失败: {e}")
+            return Response({
+                'code': 503,
+                'message': '搜索服务暂时不可用，请改用单独的接口',
+                'data': None
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        # 所有子查询返回的文章只查询一次统计
+        article_ids = {
+            hit.id
+            for plan, response in zip(plans.values(), responses)
+            if response is not None and plan['type'] != 'suggest'
+            for hit in response
+        }
+        stats_dict = self._get_batch_stats(list(article_ids))
+
+        data = {}
+        for (name, plan), response in zip(plans.items(), responses):
+            if response is None:
+                data[name] = {'error': '查询失败'}
+                continue
+            data[name] = self._format_batch_result(plan, response, stats_dict)
+
         return Response({
             'code': 200,
             'message': 'success',
-            'data': serializer.data
+            'data': data
         })
 
+    def _plan_batch_query(self, request, kind, params):
+        """
+        构建批量接口的单个子查询
+
+        Returns:
+            dict: {'type', 'search', ...格式化所需参数}
+
+        Raises:
+            ValueError: 参数无效
+        """
+        from search.views import (
+            HIGHLIGHT_FULL, MAX_SUGGEST_SIZE, SearchSuggestView, SearchView, normalize_suggest_query
+        )
+
+        if kind == 'list':
+            if 'cursor' in params:
+                raise ValueError('批量接口不支持 cursor 翻页')
+            page = max(1, int(params.get('page', 1)))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', 20))))
+            if page * page_size > ES_MAX_RESULT_WINDOW:
+                raise ValueError(f'页码过大，超过 {ES_MAX_RESULT_WINDOW} 条')
+            start = (page - 1) * page_size
+            search = self._build_es_search(request, params)
+            search = search.sort(params.get('sort', '-published_at'))[start:start + page_size]
+            return {'type': kind, 'search': search, 'page': page, 'page_size': page_size}
+
+        if kind == 'search':
+            view = SearchView()
+            query = params.get('q', '').strip()
+            highlight = params.get('highlight', HIGHLIGHT_FULL)
+            facets = sorted({f.strip() for f in params.get('facets', '').split(',') if f.strip()})
+            page = max(1, int(params.get('page', 1)))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', 20))))
+            # 与 list 子查询一致：超出 ES 结果窗口的分页会使 msearch 中该项失败
+            error = view._validate_params(query, highlight, facets, page, page_size)
+            if error:
+                raise ValueError(error)
+            search = view._build_search(
+                query, params, page, page_size, params.get('sort', '-published_at'), highlight, facets
+            )
+            return {
+                'type': kind, 'search': search, 'view': view, 'query': query,
+                'page': page, 'page_size': page_size, 'facets': facets,
+            }
+
+        if kind == 'suggest':
+            view = SearchSuggestView()
+            query = normalize_suggest_query(params.get('q', ''))
+            if not query:
+                raise ValueError('请输入建议前缀')
+            size = max(1, min(MAX_SUGGEST_SIZE, int(params.get('size', 10))))
+            return {'type': kind, 'search': view._build_suggest_search(query, size), 'view': view, 'size': size}
+
+        raise ValueError('type 只支持 list、search、suggest')
+
+    def _format_batch_result(self, plan, response, stats_dict):
+        """按子查询类型格式化结果（与对应的单独接口格式一致）"""
+        if plan['type'] == 'list':
+            return {
+                'results': self._format_es_hits(response, stats_dict),
+                'count': response.hits.total.value,
+                'page': plan['page'],
+                'page_size': plan['page_size']
+            }
+
+        if plan['type'] == 'search':
+            result = plan['view']._format_result(
+                response, plan['query'], plan['page'], plan['page_size'], plan['facets']
+            )
+            for item in result['items']:
+                item.update(stats_dict.get(item['id'], {}))
+            return result
+
+        return {'suggestions': plan['view']._extract_suggestions(response, plan['size'])}
+
+    @swagger_auto_schema(
+        operation_summary='获取精选文章',
+        operation_description='获取精选文章列表，支持 limit（默认 20）和 cursor 分页',
+        responses={200: ArticleListSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def featured(self, request):
+        """精选文章（支持 limit 和 cursor 分页）"""
+        queryset = self.get_queryset().filter(featured=True)
+        return self._ranked_feed_response(request, RankedFeed.FEATURED, queryset, 'published_at')
+
     @swagger_auto_schema(
         operation_summary='获取热门文章',
-        operation_description='按阅读量排序获取热门文章',
-        responses={200: ArticleDetailSerializer(many=True)}
+        operation_description='按阅读量排序获取热门文章，支持 limit（默认 20）和 cursor 分页',
+        responses={200: ArticleListSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
     def popular(self, request):
-        """热门文章"""
-        queryset = self.get_queryset().order_by('-view_count')
-        serializer = self.get_serializer(queryset, many=True)
+        """热门文章（支持 limit 和 cursor 分页）"""
+        queryset = self.get_queryset()
+        return self._ranked_feed_response(request, RankedFeed.POPULAR, queryset, 'view_count')
+
+    def _ranked_feed_response(self, request, feed_name, queryset, field):
+        """
+        featured / popular 的公共实现
+
+        无过滤条件的公开请求直接读取 Redis 中预计算的排行 feed；
+        带过滤条件、管理员请求或 feed 不可用时，回退到 MySQL keyset 分页
+
+        Args:
+            request: 请求对象
+            feed_name: feed 名称
+            queryset: 回退时使用的查询集
+            field: 回退时的降序排序字段
+        """
+        limit = self._get_limit(request)
+        result = None
+        try:
+            if self._can_use_ranked_feed(request):
+                result = self._page_from_ranked_feed(request, feed_name, limit)
+            if result is None:
+                result = self._paginate_action(request, queryset, field, limit)
+        except ValueError:
+            return Response({
+                'code': 400,
+                'message': '无效的游标',
+                'data': None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        articles, next_cursor = result
+        serializer = self.get_serializer(articles, many=True)
         return Response({
             'code': 200,
             'message': 'success',
-            'data': serializer.data
+            'data': serializer.data,
+            'next_cursor': next_cursor
         })
 
+    def _can_use_ranked_feed(self, request):
+        """预计算 feed 只包含已发布文章且不支持过滤"""
+        user = request.user
+        if user.is_authenticated and user.is_staff:
+            return False
+        return not any(request.query_params.get(param) for param in FEED_FILTER_PARAMS)
+
+    def _page_from_ranked_feed(self, request, feed_name, limit):
+        """
+        从排行 feed 读取一页文章
+
+        Returns:
+            tuple: (文章列表, 下一页游标)；feed 不可用或游标不属于 feed 时返回 None
+
+        Raises:
+            ValueError: feed 游标中的 offset 不是整数
+        """
+        offset = 0
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                state = decode_cursor(cursor)
+            except ValueError:
+                return None
+            if state.get('kind') != 'feed' or state.get('feed') != feed_name:
+                return None
+            offset = state.get('offset', 0)
+            if type(offset) is not int:
+                raise ValueError('invalid feed cursor offset')
+            offset = max(0, offset)
+
+        page = RankedFeed.page(feed_name, offset, limit)
+        if page is None:
+            return None
+        article_ids, has_next = page
+
+        articles_by_id = Article.objects.filter(
+            pk__in=article_ids,
+            status=Article.ArticleStatus.PUBLISHED
+        ).select_related('author', 'category').prefetch_related('tags').in_bulk()
+        articles = [articles_by_id[aid] for aid in article_ids if aid in articles_by_id]
+
+        next_cursor = None
+        if has_next:
+            next_cursor = encode_cursor({'kind': 'feed', 'feed': feed_name, 'offset': offset + limit})
+        return articles, next_cursor
+
     @swagger_auto_schema(
         operation_summary='创建文章版本',
         operation_description='为文章创建新版本（版本控制）',
@@ -581,91 +1140,118 @@ class ArticleViewSet(ModelViewSet):
             'data': serializer.data
         })
 
+    def _like_owner(self, request):
+        """点赞归属：登录用户按用户 ID，匿名用户按 IP"""
+        if request.user.is_authenticated:
+            return request.user.pk, None
+        return None, get_client_ip(request)
+
+    def _unknown_owner_response(self):
+        """匿名请求无法识别 IP 时拒绝点赞"""
+        return Response({
+            'code': 400,
+            'message': '无法识别客户端 IP，请登录后点赞',
+            'data': None
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def _resolve_article_id(self):
+        """解析 URL 中的 slug / ID（不加载文章对象）"""
+        from django.http import Http404
+
+        article_id = ArticleSlugResolver.resolve(self.kwargs.get(self.lookup_field))
+        if article_id is None:
+            raise Http404('文章不存在')
+        return article_id
+
     @swagger_auto_schema(
         operation_summary='点赞文章',
-        operation_description='点赞指定的文章',
+        operation_description='点赞指定的文章（重复点赞不会重复计数）',
         responses={200: 'Success'},
     )
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """点赞文章"""
-        article = self.get_object()
-
-        # 检查是否已经点赞
-        if request.user.is_authenticated:
-            like_exists = article.likes.filter(user=request.user).exists()
-            if like_exists:
-                return Response({
-                    'code': 400,
-                    'message': '已经点赞过了',
-                    'data': None
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # 创建点赞记录
-            from .models import ArticleLike
-            ArticleLike.objects.create(article=article, user=request.user)
-        else:
-            # 匿名用户基于 IP 点赞
-            ip_address = self.get_client_ip(request)
-            like_exists = article.likes.filter(ip_address=ip_address).exists()
-            if like_exists:
-                return Response({
-                    'code': 400,
-                    'message': '已经点赞过了',
-                    'data': None
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            from .models import ArticleLike
-            ArticleLike.objects.create(article=article, ip_address=ip_address)
+        from django.http import Http404
 
-        # 更新点赞数
-        Article.objects.filter(pk=article.pk).update(like_count=F('like_count') + 1)
-        article.refresh_from_db()
+        user_id, ip_address = self._like_owner(request)
+        try:
+            result = ArticleLikeService.like(self._resolve_article_id(), user_id=user_id, ip_address=ip_address)
+        except ValueError:
+            return self._unknown_owner_response()
+        if result is None:
+            raise Http404('文章不存在')
 
+        created, like_count = result
         return Response({
             'code': 200,
-            'message': '点赞成功',
+            'message': '点赞成功' if created else '已经点赞过了',
             'data': {
-                'like_count': article.like_count,
+                'like_count': like_count,
                 'liked': True
             }
         })
 
     @swagger_auto_schema(
         operation_summary='取消点赞文章',
-        operation_description='取消点赞指定的文章',
+        operation_description='取消点赞指定的文章（未点赞时直接返回当前状态）',
         responses={200: 'Success'},
     )
     @action(detail=True, methods=['post'])
     def unlike(self, request, pk=None):
         """取消点赞文章"""
-        article = self.get_object()
+        from django.http import Http404
 
-        if request.user.is_authenticated:
-            # 删除用户点赞记录
-            deleted_count, _ = article.likes.filter(user=request.user).delete()
-        else:
-            # 匿名用户基于 IP 删除点赞
-            ip_address = self.get_client_ip(request)
-            deleted_count, _ = article.likes.filter(ip_address=ip_address).delete()
+        user_id, ip_address = self._like_owner(request)
+        try:
+            result = ArticleLikeService.unlike(self._resolve_article_id(), user_id=user_id, ip_address=ip_address)
+        except ValueError:
+            return self._unknown_owner_response()
+        if result is None:
+            raise Http404('文章不存在')
+
+        deleted, like_count = result
+        return Response({
+            'code': 200,
+            'message': '取消点赞成功' if deleted else '还未点赞过',
+            'data': {
+                'like_count': like_count,
+                'liked': False
+            }
+        })
 
-        if deleted_count == 0:
+    @swagger_auto_schema(
+        operation_summary='批量查询点赞状态',
+        operation_description='返回当前用户（匿名用户按 IP）已点赞的文章 ID，供列表页标记',
+        manual_parameters=[
+            openapi.Parameter(
+                'ids', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='文章 ID，逗号分隔（最多 100 个）'
+            ),
+        ],
+        responses={200: 'Success'},
+    )
+    @action(detail=False, methods=['get'], url_path='liked')
+    def liked(self, request):
+        """批量查询点赞状态"""
+        try:
+            article_ids = [
+                int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()
+            ][:MAX_PAGE_SIZE]
+        except ValueError:
             return Response({
                 'code': 400,
-                'message': '还未点赞过',
+                'message': 'ids 参数格式错误',
                 'data': None
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 更新点赞数
-        Article.objects.filter(pk=article.pk).update(like_count=F('like_count') - 1)
-        article.refresh_from_db()
+        user_id, ip_address = self._like_owner(request)
+        liked_ids = ArticleLikeService.liked_ids(article_ids, user_id=user_id, ip_address=ip_address)
 
         return Response({
             'code': 200,
-            'message': '取消点赞成功',
+            'message': 'success',
             'data': {
-                'like_count': article.like_count,
-                'liked': False
+                'liked_ids': [aid for aid in article_ids if aid in liked_ids]
             }
         })
 
@@ -678,8 +1264,24 @@ class ArticleViewSet(ModelViewSet):
     def related(self, request, pk=None):
         """获取相关文章"""
         article = self.get_object()
-        limit = int(request.query_params.get('limit', 4))
+        limit = self._get_limit(request, default=4)
+
+        # 优先读取离线计算的相关文章列表（一次主键查询 + 一次批量查询）
+        related_ids = RelatedArticleEngine.get_related_ids(article.pk)
+        if related_ids:
+            articles = Article.objects.filter(
+                status='published'
+            ).select_related('author', 'category').prefetch_related('tags').in_bulk(related_ids[:limit * 2])
+            related = [articles[aid] for aid in related_ids if aid in articles][:limit]
+            if related:
+                serializer = ArticleListSerializer(related, many=True)
+                return Response({
+                    'code': 200,
+                    'message': 'success',
+                    'data': serializer.data
+                })
 
+        # 尚未计算时回退到实时查询
         # 获取当前文章的所有标签 ID
         article_tag_ids = list(article.tags.values_list('id', flat=True))
 
@@ -5,6 +5,7 @@ Celery 配置
 import os
 from celery import Celery
 from celery.schedules import crontab
+from decouple import config
 
 # 设置默认 Django settings 模块
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.base')
@@ -34,6 +35,62 @@ app.conf.beat_schedule = {
         'task': 'stats.tasks.sync_popular_articles_cache',
         'schedule': crontab(minute='*/15'),  # 每 15 分钟
     },
+    # 定期将 Redis 中缓冲的阅读量写回 MySQL
+    'flush-view-counters': {
+        'task': 'articles.tasks.flush_view_counters',
+        'schedule': config('VIEW_COUNTER_FLUSH_INTERVAL', default=30, cast=int),  # 秒
+    },
+    # 每 15 分钟将热门/精选 feed 写入持久化快照
+    'snapshot-ranked-feeds': {
+        'task': 'articles.tasks.snapshot_ranked_feeds',
+        'schedule': crontab(minute='*/15'),  # 每 15 分钟
+    },
+    # 每天重建 slug 映射和 Bloom 过滤器
+    'rebuild-slug-index': {
+        'task': 'articles.tasks.rebuild_slug_index',
+        'schedule': crontab(hour=4, minute=30),  # 每天 04:30
+    },
+    # 每 10 分钟重算内容/标签变化的文章的相关文章
+    'compute-related-articles': {
+        'task': 'articles.tasks.compute_related_articles',
+        'schedule': crontab(minute='*/10'),  # 每 10 分钟
+    },
+    # 每天全量重算相关文章
+    'compute-related-articles-full': {
+        'task': 'articles.tasks.compute_related_articles',
+        'schedule': crontab(hour=3, minute=0),  # 每天 03:00
+        'kwargs': {'full': True},
+    },
+    # 每分钟消费搜索索引发件箱（on_commit 投递失败时兜底）
+    'drain-search-outbox': {
+        'task': 'articles.tasks.drain_search_outbox',
+        'schedule': crontab(minute='*'),  # 每分钟
+    },
+    # 定期将计数变化以 partial update 同步到 ES
+    'sync-search-counters': {
+        'task': 'articles.tasks.sync_search_counters',
+        'schedule': config('ES_COUNTER_SYNC_INTERVAL', default=60, cast=int),  # 秒
+    },
+    # 每天全量重建本地全文降级索引
+    'rebuild-search-fallback-index': {
+        'task': 'articles.tasks.rebuild_search_fallback_index',
+        'schedule': crontab(hour=5, minute=0),  # 每天 05:00
+    },
+    # 每分钟将缓冲的搜索事件批量写入数据库
+    'flush-search-events': {
+        'task': 'stats.tasks.flush_search_events',
+        'schedule': crontab(minute='*'),  # 每分钟
+    },
+    # 每 10 分钟衰减热门查询得分
+    'decay-trending-queries': {
+        'task': 'stats.tasks.decay_trending_queries',
+        'schedule': crontab(minute='*/10'),  # 每 10 分钟
+    },
+    # 热门查询结果缓存过期前重新预热
+    'warm-trending-search-cache': {
+        'task': 'stats.tasks.warm_trending_search_cache',
+        'schedule': crontab(minute='*/5'),  # 每 5 分钟
+    },
 }
 
 
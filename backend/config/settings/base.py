@@ -63,6 +63,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # 中间件配置
 # ============================================
 MIDDLEWARE = [
+    'utils.timing.ServerTimingMiddleware',  # 分阶段耗时（Server-Timing 响应头），需放在最前面
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS 中间件
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -160,6 +161,15 @@ CACHES = {
     },
 }
 
+# 自定义缓存键前缀（CacheKeyBuilder 与直接访问 Redis 的模块共用）
+REDIS_CACHE_PREFIX = config('REDIS_CACHE_PREFIX', default='banana_cache')
+
+# 文章详情响应缓存时间（秒），失效由文章保存/标签变更信号触发
+ARTICLE_DETAIL_CACHE_TTL = config('ARTICLE_DETAIL_CACHE_TTL', default=600, cast=int)
+
+# keyset 分页近似总数的缓存时间（秒）
+KEYSET_COUNT_CACHE_TTL = config('KEYSET_COUNT_CACHE_TTL', default=300, cast=int)
+
 # 会话缓存
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -299,6 +309,76 @@ ELASTICSEARCH_DSL = {
 
 ELASTICSEARCH_INDEX_PREFIX = config('ELASTICSEARCH_INDEX_PREFIX', default='banana_')
 
+# 关闭 django_elasticsearch_dsl 的同步信号处理，索引由发件箱异步同步（见 articles/indexing.py）
+ELASTICSEARCH_DSL_AUTOSYNC = False
+
+# 发件箱每批读取的记录数
+SEARCH_OUTBOX_BATCH_SIZE = config('SEARCH_OUTBOX_BATCH_SIZE', default=500, cast=int)
+
+# 搜索结果缓存时间（秒），索引变化后通过代数号立即失效
+SEARCH_RESULT_CACHE_TTL = config('SEARCH_RESULT_CACHE_TTL', default=300, cast=int)
+
+# ES 不可用时使用的本地全文索引（SQLite FTS5，多机部署时放在共享目录）
+SEARCH_FALLBACK_INDEX_PATH = BASE_DIR / config('SEARCH_FALLBACK_INDEX_PATH', default='cache/search_fallback.sqlite3')
+
+# 搜索行为统计（见 search/analytics.py）
+# 未写入数据库的搜索事件缓冲上限，超出时丢弃最旧的事件
+SEARCH_EVENT_BUFFER_MAX = config('SEARCH_EVENT_BUFFER_MAX', default=100000, cast=int)
+# 热门查询每次衰减的系数（每 10 分钟一次）、保留的最低得分和最大数量
+SEARCH_TRENDING_DECAY = config('SEARCH_TRENDING_DECAY', default=0.9, cast=float)
+SEARCH_TRENDING_MIN_SCORE = config('SEARCH_TRENDING_MIN_SCORE', default=0.1, cast=float)
+SEARCH_TRENDING_SIZE = config('SEARCH_TRENDING_SIZE', default=5000, cast=int)
+# 搜索建议从前 N 个热门查询中按前缀筛选
+SEARCH_TRENDING_SUGGEST_POOL = config('SEARCH_TRENDING_SUGGEST_POOL', default=200, cast=int)
+# 预热搜索结果缓存的热门查询数
+SEARCH_WARM_TOP_N = config('SEARCH_WARM_TOP_N', default=20, cast=int)
+
+# 批量索引：每个 bulk 请求的文档数和并发线程数
+ES_BULK_CHUNK_SIZE = config('ES_BULK_CHUNK_SIZE', default=500, cast=int)
+ES_BULK_THREAD_COUNT = config('ES_BULK_THREAD_COUNT', default=4, cast=int)
+
+# 蓝绿重建：并行切片数和保留的旧索引数量
+ES_REINDEX_SLICES = config('ES_REINDEX_SLICES', default=4, cast=int)
+ES_REINDEX_KEEP_INDICES = config('ES_REINDEX_KEEP_INDICES', default=2, cast=int)
+
+# 计数字段 partial update 同步间隔（秒）
+ES_COUNTER_SYNC_INTERVAL = config('ES_COUNTER_SYNC_INTERVAL', default=60, cast=int)
+
+# 请求分阶段耗时（见 utils/timing.py）
+# 是否输出 Server-Timing 响应头：会向所有访客暴露内部阶段名和耗时（可据此判断缓存命中等），
+# 默认只在 DEBUG 下开启；生产环境排查时设置环境变量 SERVER_TIMING_HEADER=True 临时开启
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=DEBUG, cast=bool)
+# 是否按接口、阶段在 Redis 中汇总耗时直方图，以及保留的小时数
+REQUEST_TIMING_HISTOGRAMS = config('REQUEST_TIMING_HISTOGRAMS', default=True, cast=bool)
+REQUEST_TIMING_RETENTION_HOURS = config('REQUEST_TIMING_RETENTION_HOURS', default=48, cast=int)
+
+# ES 查询请求合并（见 utils/single_flight.py）
+SINGLE_FLIGHT = {
+    'elasticsearch': {
+        # 等待者最长等待 leader 的时间（秒），超时后独立执行
+        'max_wait': config('ES_SINGLE_FLIGHT_MAX_WAIT', default=0.5, cast=float),
+        'poll_interval': 0.01,
+        # 结果只需覆盖等待窗口
+        'result_ttl': 2.0,
+        'lock_ttl': 10.0,
+    },
+}
+
+# 熔断器（状态保存在 Redis，所有进程共享，见 utils/circuit_breaker.py）
+CIRCUIT_BREAKERS = {
+    'elasticsearch': {
+        # 统计窗口（秒）内请求数达到 min_requests 且失败率超过 failure_rate 时打开
+        'window': config('ES_BREAKER_WINDOW', default=30, cast=int),
+        'min_requests': config('ES_BREAKER_MIN_REQUESTS', default=10, cast=int),
+        'failure_rate': config('ES_BREAKER_FAILURE_RATE', default=0.5, cast=float),
+        # 超过该耗时的调用计为失败（秒）
+        'slow_call_seconds': config('ES_BREAKER_SLOW_CALL', default=2.0, cast=float),
+        # 打开后经过 open_seconds 进入半开状态，放行 half_open_probes 个探测请求
+        'open_seconds': config('ES_BREAKER_OPEN_SECONDS', default=30, cast=int),
+        'half_open_probes': config('ES_BREAKER_HALF_OPEN_PROBES', default=3, cast=int),
+    },
+}
+
 # ============================================
 # Celery 配置
 # ============================================
@@ -366,8 +446,94 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'stats.tasks.sync_popular_articles_cache',
         'schedule': crontab(minute='*/15'),  # 每 15 分钟
     },
+    # 定期将 Redis 中缓冲的阅读量写回 MySQL
+    'flush-view-counters': {
+        'task': 'articles.tasks.flush_view_counters',
+        'schedule': config('VIEW_COUNTER_FLUSH_INTERVAL', default=30, cast=int),  # 秒
+    },
+    # 每 15 分钟将热门/精选 feed 写入持久化快照
+    'snapshot-ranked-feeds': {
+        'task': 'articles.tasks.snapshot_ranked_feeds',
+        'schedule': crontab(minute='*/15'),  # 每 15 分钟
+    },
+    # 每天重建 slug 映射和 Bloom 过滤器
+    'rebuild-slug-index': {
+        'task': 'articles.tasks.rebuild_slug_index',
+        'schedule': crontab(hour=4, minute=30),  # 每天 04:30
+    },
+    # 每 10 分钟重算内容/标签变化的文章的相关文章
+    'compute-related-articles': {
+        'task': 'articles.tasks.compute_related_articles',
+        'schedule': crontab(minute='*/10'),  # 每 10 分钟
+    },
+    # 每天全量重算相关文章
+    'compute-related-articles-full': {
+        'task': 'articles.tasks.compute_related_articles',
+        'schedule': crontab(hour=3, minute=0),  # 每天 03:00
+        'kwargs': {'full': True},
+    },
+    # 每分钟消费搜索索引发件箱（on_commit 投递失败时兜底）
+    'drain-search-outbox': {
+        'task': 'articles.tasks.drain_search_outbox',
+        'schedule': crontab(minute='*'),  # 每分钟
+    },
+    # 定期将计数变化以 partial update 同步到 ES
+    'sync-search-counters': {
+        'task': 'articles.tasks.sync_search_counters',
+        'schedule': config('ES_COUNTER_SYNC_INTERVAL', default=60, cast=int),  # 秒
+    },
+    # 每天全量重建本地全文降级索引
+    'rebuild-search-fallback-index': {
+        'task': 'articles.tasks.rebuild_search_fallback_index',
+        'schedule': crontab(hour=5, minute=0),  # 每天 05:00
+    },
+    # 每分钟将缓冲的搜索事件批量写入数据库
+    'flush-search-events': {
+        'task': 'stats.tasks.flush_search_events',
+        'schedule': crontab(minute='*'),  # 每分钟
+    },
+    # 每 10 分钟衰减热门查询得分
+    'decay-trending-queries': {
+        'task': 'stats.tasks.decay_trending_queries',
+        'schedule': crontab(minute='*/10'),  # 每 10 分钟
+    },
+    # 热门查询结果缓存过期前重新预热
+    'warm-trending-search-cache': {
+        'task': 'stats.tasks.warm_trending_search_cache',
+        'schedule': crontab(minute='*/5'),  # 每 5 分钟
+    },
 }
 
+# ============================================
+# 阅读量写回缓冲配置
+# ============================================
+# 文章详情的阅读量先累加到 Redis，再由 Celery 批量写回 MySQL
+VIEW_COUNTER_FLUSH_INTERVAL = config('VIEW_COUNTER_FLUSH_INTERVAL', default=30, cast=int)  # 定时写回间隔（秒）
+VIEW_COUNTER_MAX_LAG = config('VIEW_COUNTER_MAX_LAG', default=120, cast=int)  # 超过该时间未写回则由读路径触发写回（秒）
+VIEW_COUNTER_FLUSH_BATCH_SIZE = config('VIEW_COUNTER_FLUSH_BATCH_SIZE', default=500, cast=int)  # 每批写回的文章数
+VIEW_EVENT_BUFFER_MAX = config('VIEW_EVENT_BUFFER_MAX', default=100000, cast=int)  # 缓冲的阅读记录上限
+
+# 热门/精选排行 feed 持久化快照的文章数
+RANKED_FEED_SNAPSHOT_SIZE = config('RANKED_FEED_SNAPSHOT_SIZE', default=200, cast=int)
+
+# ============================================
+# 文章 slug 解析缓存配置
+# ============================================
+SLUG_LOCAL_CACHE_SIZE = config('SLUG_LOCAL_CACHE_SIZE', default=5000, cast=int)  # 进程内缓存的 slug 数量
+SLUG_LOCAL_CACHE_TTL = config('SLUG_LOCAL_CACHE_TTL', default=60, cast=int)  # 进程内缓存时间（秒），决定 slug 变更在其他进程的最大延迟
+SLUG_NEGATIVE_CACHE_TTL = config('SLUG_NEGATIVE_CACHE_TTL', default=300, cast=int)  # 不存在的 slug 缓存时间（秒）
+SLUG_BLOOM_CAPACITY = config('SLUG_BLOOM_CAPACITY', default=100000, cast=int)  # Bloom 过滤器预期容量
+SLUG_BLOOM_ERROR_RATE = config('SLUG_BLOOM_ERROR_RATE', default=0.01, cast=float)  # Bloom 过滤器误判率
+
+# 每篇文章预计算的相关文章数量
+RELATED_ARTICLES_TOP_K = config('RELATED_ARTICLES_TOP_K', default=12, cast=int)
+
+# ============================================
+# Markdown 渲染缓存配置
+# ============================================
+MARKDOWN_RENDER_CACHE_DIR = BASE_DIR / config('MARKDOWN_RENDER_CACHE_DIR', default='cache/rendered')  # 磁盘缓存目录
+MARKDOWN_RENDER_CACHE_TTL = config('MARKDOWN_RENDER_CACHE_TTL', default=604800, cast=int)  # Redis 缓存时间（秒），默认 7 天
+
 # ============================================
 # 日志配置
 # ============================================
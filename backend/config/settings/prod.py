@@ -22,6 +22,9 @@ SECURE_HSTS_SECONDS = 31536000
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
+# base 中的默认值按 base 的 DEBUG 计算，这里重新按生产环境默认关闭
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=False, cast=bool)
+
 # ============================================
 # 生产环境日志
 # ============================================
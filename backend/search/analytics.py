@@ -0,0 +1,261 @@
+"""
+搜索行为统计
+
+每次搜索同步写一行 UserAction 成本过高。这里只在 Redis 中记录：
+1. 搜索事件追加到 Redis 列表，由 Celery 定时批量写入 UserAction（SEARCH）
+   （写入时间即 created_at，与搜索时间相差不超过一个写入周期）；
+   事件先整体移入处理中队列，写库提交后才删除，写入失败时保留到下次重试
+2. 规范化后的查询词累加到有序集合，定时按衰减系数整体缩放得到热门查询
+   （越近的搜索权重越高），用于预热搜索结果缓存和搜索建议排序
+
+Redis 不可用时丢弃事件，不影响搜索本身
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from utils.cache_utils import CacheKeyBuilder, CacheLock
+
+logger = logging.getLogger(__name__)
+
+# 参与热门统计的查询词最大长度
+MAX_TRENDING_QUERY_LENGTH = 50
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询词：合并空白、转小写"""
+    return ' '.join(query.split()).lower()
+
+
+class SearchAnalytics:
+    """搜索事件缓冲与热门查询"""
+
+    EVENT_LIST = "search_events"
+    EVENT_PROCESSING = "search_events_processing"
+    TRENDING_ZSET = "search_trending"
+    FLUSH_LOCK = "search_events_flush"
+
+    # 写入锁超时（秒），上一次写入未结束时跳过本次
+    FLUSH_LOCK_TIMEOUT = 300
+
+    @classmethod
+    def _key(cls, name: str) -> str:
+        return CacheKeyBuilder.build(name)
+
+    # ============================================
+    # 记录
+    # ============================================
+
+    @classmethod
+    def record(cls, query: str, user_id: Optional[int] = None, ip_address: str = '',
+               result_count: int = 0) -> None:
+        """
+        记录一次搜索
+
+        Args:
+            query: 原始查询词
+            user_id: 登录用户 ID
+            ip_address: 客户端 IP
+            result_count: 结果总数
+        """
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+
+        event = json.dumps({
+            'query': query[:200],
+            'normalized': normalized[:200],
+            'user_id': user_id,
+            'ip_address': ip_address or '',
+            'result_count': result_count,
+        })
+        events_key = cls._key(cls.EVENT_LIST)
+
+        try:
+            pipe = _get_redis().pipeline(transaction=False)
+            pipe.rpush(events_key, event)
+            # 写入严重滞后时丢弃最旧的事件
+            pipe.ltrim(events_key, -settings.SEARCH_EVENT_BUFFER_MAX, -1)
+            # 无结果的查询不计入热门
+            if result_count and len(normalized) <= MAX_TRENDING_QUERY_LENGTH:
+                pipe.zincrby(cls._key(cls.TRENDING_ZSET), 1, normalized)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"记录搜索事件失败: {e}")
+
+    # ============================================
+    # 写入数据库
+    # ============================================
+
+    @classmethod
+    def flush(cls, batch_size: int = 1000, max_batches: int = 20) -> int:
+        """
+        批量写入 UserAction
+
+        事件在插入提交后才从处理中队列删除：写库失败时保留到下次重试，
+        插入后、删除前进程退出时会重复写入这一批（至少一次）
+
+        Returns:
+            int: 写入的事件数（上一次写入仍在进行时为 0）
+        """
+        lock_key = cls._key(cls.FLUSH_LOCK)
+        if not CacheLock.acquire(lock_key, timeout=cls.FLUSH_LOCK_TIMEOUT):
+            return 0
+        try:
+            return cls._flush(batch_size, max_batches)
+        finally:
+            CacheLock.release(lock_key)
+
+    @classmethod
+    def _claim_events(cls, redis_conn) -> str:
+        """
+        处理中队列为空时，将缓冲的事件整体 RENAME 为处理中队列
+
+        上次写入未处理完的事件留在处理中队列中，优先处理
+
+        Returns:
+            str: 处理中队列的键
+        """
+        from redis.exceptions import ResponseError
+
+        processing_key = cls._key(cls.EVENT_PROCESSING)
+        if not redis_conn.exists(processing_key):
+            try:
+                redis_conn.renamenx(cls._key(cls.EVENT_LIST), processing_key)
+            except ResponseError:
+                # 没有缓冲的事件
+                pass
+        return processing_key
+
+    @classmethod
+    def _flush(cls, batch_size: int, max_batches: int) -> int:
+        from django.db import transaction
+        from stats.models import UserAction
+        from users.models import User
+
+        redis_conn = _get_redis()
+        total = 0
+
+        for _ in range(max_batches):
+            processing_key = cls._claim_events(redis_conn)
+            raw_events = redis_conn.lrange(processing_key, 0, batch_size - 1)
+            if not raw_events:
+                break
+
+            events = []
+            for raw in raw_events:
+                try:
+                    events.append(json.loads(raw))
+                except (TypeError, ValueError):
+                    continue
+
+            # 写入前已删除的用户置空，避免外键错误
+            user_ids = {event['user_id'] for event in events if event.get('user_id')}
+            existing_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+
+            actions = []
+            for event in events:
+                action = UserAction(
+                    user_id=event.get('user_id') if event.get('user_id') in existing_users else None,
+                    action_type=UserAction.ActionType.SEARCH,
+                    metadata={
+                        'query': event.get('query', ''),
+                        'normalized': event.get('normalized', ''),
+                        'result_count': event.get('result_count', 0),
+                    },
+                    ip_address=event.get('ip_address') or None,
+                )
+                actions.append(action)
+            with transaction.atomic():
+                UserAction.objects.bulk_create(actions, batch_size=batch_size)
+
+            # 列表被取空时 Redis 自动删除该键
+            redis_conn.ltrim(processing_key, len(raw_events), -1)
+            total += len(actions)
+            if len(raw_events) < batch_size:
+                break
+
+        return total
+
+    # ============================================
+    # 热门查询
+    # ============================================
+
+    @classmethod
+    def decay(cls) -> int:
+        """
+        按衰减系数整体缩放热门查询得分，并清理低分和超出数量上限的查询
+
+        Returns:
+            int: 保留的查询数
+        """
+        key = cls._key(cls.TRENDING_ZSET)
+        redis_conn = _get_redis()
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.zunionstore(key, {key: settings.SEARCH_TRENDING_DECAY})
+        pipe.zremrangebyscore(key, '-inf', settings.SEARCH_TRENDING_MIN_SCORE)
+        pipe.zremrangebyrank(key, 0, -settings.SEARCH_TRENDING_SIZE - 1)
+        pipe.zcard(key)
+        return pipe.execute()[-1]
+
+    @classmethod
+    def trending(cls, limit: int = 20) -> List[Dict[str, float]]:
+        """
+        热门查询
+
+        Returns:
+            list: [{'query': 查询词, 'score': 衰减后的得分}, ...]
+        """
+        try:
+            members = _get_redis().zrevrange(cls._key(cls.TRENDING_ZSET), 0, limit - 1, withscores=True)
+        except Exception as e:
+            logger.debug(f"读取热门查询失败: {e}")
+            return []
+
+        return [
+            {
+                'query': member.decode() if isinstance(member, bytes) else member,
+                'score': round(score, 2),
+            }
+            for member, score in members
+        ]
+
+    @classmethod
+    def trending_with_prefix(cls, prefix: str, limit: int = 5) -> List[str]:
+        """以指定前缀开头的热门查询（用于搜索建议排序）"""
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        return [
+            item['query']
+            for item in cls.trending(settings.SEARCH_TRENDING_SUGGEST_POOL)
+            if item['query'].startswith(prefix) and item['query'] != prefix
+        ][:limit]
+
+    @classmethod
+    def warm_cache(cls, limit: Optional[int] = None) -> int:
+        """
+        预热热门查询第一页的搜索结果缓存（默认参数）
+
+        Returns:
+            int: 预热的查询数
+        """
+        from .views import DEFAULT_PAGE_SIZE, MIN_QUERY_LENGTH, SearchView
+
+        view = SearchView()
+        warmed = 0
+        for item in cls.trending(limit or settings.SEARCH_WARM_TOP_N):
+            query = item['query']
+            if len(query) < MIN_QUERY_LENGTH:
+                continue
+            view.cached_search(query, {}, 1, DEFAULT_PAGE_SIZE, '-published_at')
+            warmed += 1
+        return warmed
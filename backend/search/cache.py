@@ -0,0 +1,69 @@
+"""
+搜索结果缓存
+
+缓存键由规范化后的查询参数和全局索引代数组成。ES 同步写入成功后递增代数，
+旧代数下的缓存自然不可达（等待过期），无需按模式删除
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache_utils import CacheKeyBuilder, CacheKeyPrefix, bump_version, get_or_set
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResultCache:
+    """基于索引代数的搜索结果缓存"""
+
+    GENERATION_KEY = "search_index_generation"
+
+    @classmethod
+    def _generation_key(cls) -> str:
+        return CacheKeyBuilder.build(cls.GENERATION_KEY)
+
+    @classmethod
+    def generation(cls) -> int:
+        """当前索引代数"""
+        return cache.get(cls._generation_key()) or 0
+
+    @classmethod
+    def bump(cls) -> None:
+        """索引内容变化后递增代数，使所有已缓存的搜索结果失效"""
+        try:
+            bump_version(cls._generation_key())
+        except Exception as e:
+            logger.warning(f"递增搜索索引代数失败: {e}")
+
+    @classmethod
+    def build_key(cls, params: Dict[str, Any]) -> str:
+        """
+        构建缓存键
+
+        Args:
+            params: 规范化后的查询参数（查询词、过滤条件、排序、分页）
+        """
+        digest = hashlib.md5(
+            json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return CacheKeyBuilder.build(CacheKeyPrefix.SEARCH_RESULTS, cls.generation(), digest)
+
+    @classmethod
+    def get_or_search(cls, params: Dict[str, Any], search_func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        读取缓存，未命中时执行搜索并写入缓存
+
+        Redis 不可用时直接执行搜索
+        """
+        try:
+            cache_key = cls.build_key(params)
+        except Exception as e:
+            logger.warning(f"读取搜索缓存失败: {e}")
+            return search_func()
+
+        return get_or_set(cache_key, search_func, ttl=settings.SEARCH_RESULT_CACHE_TTL)
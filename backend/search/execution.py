@@ -0,0 +1,88 @@
+"""
+Elasticsearch 调用入口
+
+所有在线请求路径上的 ES 调用都经过共享熔断器：ES 故障期间熔断器打开，
+请求直接走降级逻辑，不必每次都等待超时。
+查询经过 single-flight 合并：热点时刻大量相同的并发查询只有一个真正发往 ES
+"""
+
+import hashlib
+import json
+import logging
+
+from elasticsearch.exceptions import ApiError, TransportError
+
+from utils.circuit_breaker import CircuitOpenError, get_breaker
+from utils.single_flight import get_single_flight
+from utils.timing import record_phase, timed
+
+logger = logging.getLogger(__name__)
+
+es_breaker = get_breaker('elasticsearch')
+es_flight = get_single_flight('elasticsearch')
+
+# 对外统一使用的异常名
+SearchUnavailable = CircuitOpenError
+
+
+def is_es_failure(exc: Exception) -> bool:
+    """
+    判断异常是否说明 ES 不可用
+
+    连接错误、超时和 5xx/429 计为失败；查询语法等 4xx 错误是请求本身的问题，不触发熔断
+    """
+    if isinstance(exc, TransportError):
+        return True
+    if isinstance(exc, ApiError):
+        return exc.meta.status >= 500 or exc.meta.status == 429
+    return False
+
+
+def call_es(func, *args, **kwargs):
+    """
+    通过熔断器执行任意 ES 调用
+
+    Raises:
+        SearchUnavailable: 熔断器打开
+    """
+    return es_breaker.call(func, *args, is_failure=is_es_failure, **kwargs)
+
+
+def _flight_key(search) -> str:
+    """规范化的请求标识：索引 + 请求参数 + 查询体"""
+    body = json.dumps(
+        {'index': search._index, 'params': search._params, 'body': search.to_dict()},
+        sort_keys=True, default=str, ensure_ascii=False
+    )
+    return hashlib.md5(body.encode('utf-8')).hexdigest()
+
+
+def run_search(search):
+    """
+    执行 elasticsearch_dsl 查询
+
+    完全相同的并发查询经 single-flight 合并为一次 ES 请求；
+    强制刷新（管理员）和 point-in-time 查询不参与合并
+
+    Args:
+        search: Search 对象
+
+    Returns:
+        Response: 查询结果
+
+    Raises:
+        SearchUnavailable: 熔断器打开
+    """
+    # es 为含网络和合并等待的总耗时，es_took 为 ES 内部执行耗时，两者之差即网络/排队开销
+    with timed('es'):
+        if search._params.get('refresh') or 'pit' in search._extra:
+            response = call_es(search.execute)
+        else:
+            def execute():
+                return call_es(search.execute).to_dict()
+
+            raw = es_flight.do(_flight_key(search), execute)
+            response = search._response_class(search, raw)
+
+    record_phase('es_took', getattr(response, 'took', 0))
+    return response
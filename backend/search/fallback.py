@@ -0,0 +1,259 @@
+"""
+本地全文检索降级索引
+
+ES 不可用时，文章列表和搜索接口原先降级为 MySQL 的 icontains 查询，
+对所有正文做全表扫描，在 ES 故障时反而压垮 MySQL。这里维护一个 SQLite FTS5 索引：
+1. 文档内容与 ES 文档一致（prepare_article_document 清洗后的标题/描述/纯文本）
+2. 中文预先切分为相邻二元组（与相关文章计算的分词一致），英文按单词
+3. 发件箱消费时增量更新，每天全量重建一次（写入临时文件后原子替换）；
+   索引文件不存在时（新部署、文件丢失）在首次查询/更新时触发重建
+
+索引只包含已发布的文章。索引文件位于本机磁盘，多台机器部署时应放在共享目录
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+from utils.cache_utils import CacheKeyBuilder, CacheLock
+
+logger = logging.getLogger(__name__)
+
+# bm25 字段权重：标题 > 描述 > 正文
+_BM25_WEIGHTS = (5.0, 2.0, 1.0)
+
+_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    "title, description, content, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def _tokens(text: str) -> List[str]:
+    from articles.related import tokenize
+    return tokenize(text or '')
+
+
+def _analyze(text: str) -> str:
+    """预分词：FTS5 按空白切分，中文二元组作为独立词项"""
+    return ' '.join(_tokens(text))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    将用户查询转换为 FTS5 MATCH 表达式（所有词项都需命中）
+
+    单个汉字无法组成二元组，使用前缀匹配；没有可索引的词项时返回 None
+    """
+    terms = []
+    for token in dict.fromkeys(_tokens(query)):
+        token = token.replace('"', '')
+        if not token:
+            continue
+        terms.append(f'"{token}"*' if len(token) == 1 else f'"{token}"')
+    return ' '.join(terms) or None
+
+
+class LocalSearchIndex:
+    """SQLite FTS5 降级索引"""
+
+    REBUILD_LOCK = "search_fallback_rebuild"
+
+    _local = threading.local()
+
+    @classmethod
+    def path(cls) -> str:
+        return str(settings.SEARCH_FALLBACK_INDEX_PATH)
+
+    @classmethod
+    def _open(cls, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn.execute(_SCHEMA)
+        return conn
+
+    @classmethod
+    def _connection(cls) -> Optional[sqlite3.Connection]:
+        """
+        当前线程的连接
+
+        全量重建会替换索引文件，文件 inode 变化时重新打开
+        """
+        path = cls.path()
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+
+        cached = getattr(cls._local, 'conn', None)
+        if cached and cached[0] == inode:
+            return cached[1]
+        if cached:
+            cached[1].close()
+
+        conn = cls._open(path)
+        cls._local.conn = (inode, conn)
+        return conn
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return os.path.exists(cls.path())
+
+    @classmethod
+    def schedule_rebuild(cls) -> None:
+        """异步全量重建（同一时间只触发一次）"""
+        try:
+            if not CacheLock.acquire(CacheKeyBuilder.build(cls.REBUILD_LOCK), timeout=600):
+                return
+            from articles.tasks import rebuild_search_fallback_index
+            rebuild_search_fallback_index.delay()
+        except Exception as e:
+            logger.warning(f"触发本地全文索引重建失败: {e}")
+
+    # ============================================
+    # 查询
+    # ============================================
+
+    @classmethod
+    def search(cls, query: str, limit: int = 1000) -> Optional[List[int]]:
+        """
+        按相关度返回匹配的文章 ID
+
+        Args:
+            query: 用户输入的查询
+            limit: 最多返回数量
+
+        Returns:
+            list: 文章 ID（相关度降序）；索引不可用时返回 None
+        """
+        match = build_match_query(query)
+        if match is None:
+            return cls._search_titles(query, limit)
+
+        try:
+            conn = cls._connection()
+            if conn is None:
+                cls.schedule_rebuild()
+                return None
+            rows = conn.execute(
+                f"SELECT rowid FROM articles_fts WHERE articles_fts MATCH ? "
+                f"ORDER BY bm25(articles_fts, {', '.join(map(str, _BM25_WEIGHTS))}) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"本地全文索引查询失败: {e}")
+            return None
+
+        return [row[0] for row in rows]
+
+    @classmethod
+    def _search_titles(cls, query: str, limit: int) -> List[int]:
+        """
+        查询中没有可索引的词项（如 c++、单个字母）时按标题匹配
+
+        分词会丢弃单个英文字符，这类查询在 FTS 中无法命中，直接返回空结果会被当作“没有相关文章”
+        """
+        from articles.models import Article
+
+        query = query.strip()
+        if not query:
+            return []
+        return list(
+            Article.objects.filter(
+                status=Article.ArticleStatus.PUBLISHED,
+                title__icontains=query
+            ).order_by('-published_at').values_list('pk', flat=True)[:limit]
+        )
+
+    # ============================================
+    # 写入
+    # ============================================
+
+    @classmethod
+    def _write(cls, conn: sqlite3.Connection, article_ids: List[int]) -> int:
+        from articles.indexing import indexing_queryset, prepare_article_document
+
+        indexed = 0
+        conn.executemany('DELETE FROM articles_fts WHERE rowid = ?', [(article_id,) for article_id in article_ids])
+        for article in indexing_queryset(article_ids).iterator(chunk_size=500):
+            document = prepare_article_document(article)
+            conn.execute(
+                'INSERT INTO articles_fts (rowid, title, description, content) VALUES (?, ?, ?, ?)',
+                (
+                    article.pk,
+                    _analyze(document['title']),
+                    _analyze(document['description']),
+                    _analyze(document['content']),
+                )
+            )
+            indexed += 1
+        return indexed
+
+    @classmethod
+    def update(cls, article_ids: Iterable[int]) -> int:
+        """
+        增量更新（已删除或未发布的文章从索引中移除）
+
+        索引文件尚不存在时跳过并触发全量重建（重建会包含这些文章）
+
+        Returns:
+            int: 写入的文章数
+        """
+        article_ids = list(article_ids)
+        if not article_ids:
+            return 0
+
+        conn = cls._connection()
+        if conn is None:
+            cls.schedule_rebuild()
+            return 0
+
+        with conn:
+            return cls._write(conn, article_ids)
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        全量重建：写入临时文件后原子替换，查询不受影响
+
+        Returns:
+            int: 索引的文章数
+        """
+        from django.utils import timezone
+        from articles.models import Article
+
+        started_at = timezone.now()
+        path = cls.path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute(_SCHEMA)
+            article_ids = list(
+                Article.objects.filter(
+                    status=Article.ArticleStatus.PUBLISHED
+                ).order_by('pk').values_list('pk', flat=True)
+            )
+            indexed = 0
+            with conn:
+                for start in range(0, len(article_ids), 500):
+                    indexed += cls._write(conn, article_ids[start:start + 500])
+            conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('optimize')")
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, path)
+
+        # 重建期间的增量更新写入了旧文件，替换后补齐
+        cls.update(
+            Article.objects.filter(updated_at__gte=started_at).values_list('pk', flat=True)
+        )
+
+        logger.info(f"本地全文索引重建完成: {indexed} 篇文章")
+        return indexed
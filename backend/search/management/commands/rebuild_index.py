@@ -1,5 +1,8 @@
 """
 Elasticsearch 索引重建命令
+
+--blue-green 使用零停机的别名切换重建（见 search/reindex.py），
+其余参数保持 django_elasticsearch_dsl search_index 的行为
 """
 
 from django_elasticsearch_dsl.management.commands import search_index
@@ -8,8 +11,59 @@ from django_elasticsearch_dsl.management.commands import search_index
 class Command(search_index.Command):
     """重建 Elasticsearch 索引"""
 
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--blue-green',
+            action='store_true',
+            dest='blue_green',
+            help='创建新版本索引并行写入，完成后原子切换别名（旧索引保留用于回滚）'
+        )
+        parser.add_argument(
+            '--slices',
+            type=int,
+            default=None,
+            help='蓝绿重建的并行切片数（默认 ES_REINDEX_SLICES）'
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='在当前进程中执行蓝绿重建，不投递 Celery 任务'
+        )
+        parser.add_argument(
+            '--rollback',
+            action='store_true',
+            help='将别名切回上一个版本的索引'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='删除多余的旧版本索引'
+        )
+
     def handle(self, *args, **options):
         """执行重建"""
+        if options.get('rollback'):
+            from search.reindex import BlueGreenReindex
+
+            target = BlueGreenReindex.rollback()
+            if target:
+                self.stdout.write(self.style.SUCCESS(f'别名已回滚到 {target}'))
+            else:
+                self.stdout.write(self.style.WARNING('没有可回滚的旧版本索引'))
+            return
+
+        if options.get('prune'):
+            from search.reindex import BlueGreenReindex
+
+            removed = BlueGreenReindex.prune()
+            self.stdout.write(self.style.SUCCESS(f'已删除 {len(removed)} 个旧索引'))
+            return
+
+        if options.get('blue_green'):
+            self._handle_blue_green(options)
+            return
+
         action = options.get('action', None)
 
         if action == 'delete':
@@ -26,3 +80,29 @@ class Command(search_index.Command):
 
         # 默认行为
         super().handle(*args, **options)
+
+    def _handle_blue_green(self, options):
+        """蓝绿重建"""
+        from django.conf import settings
+
+        slices = options.get('slices') or settings.ES_REINDEX_SLICES
+
+        if options.get('sync'):
+            from search.reindex import BlueGreenReindex
+
+            self.stdout.write(self.style.SUCCESS('开始蓝绿重建（同步执行）...'))
+            result = BlueGreenReindex.run(slices=slices)
+            self.stdout.write(self.style.SUCCESS(
+                f"索引重建完成，别名已切换到 {result['index']}（旧索引: {', '.join(result['previous']) or '无'}）"
+            ))
+            return
+
+        from articles.tasks import rebuild_es_index
+
+        result = rebuild_es_index(slices=slices)
+        if result['status'] == 'started':
+            self.stdout.write(self.style.SUCCESS(
+                f"已投递 {result['slices']} 个切片任务，新索引 {result['index']} 完成后自动切换别名"
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f"启动重建失败: {result['message']}"))
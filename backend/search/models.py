@@ -22,16 +22,22 @@ class ArticleDocument(Document):
     id = fields.IntegerField()
 
     # 使用支持中文分词的 TextField
+    # 正文类字段在倒排索引中记录偏移量（index_options=offsets），
+    # unified 高亮器直接使用 postings，无需在查询时重新分析原文
     title = fields.TextField(
+        index_options='offsets',
         fields={
             'keyword': fields.KeywordField(),
             'suggest': fields.TextField(),
         }
     )
 
-    description = fields.TextField()
+    # 搜索建议（completion suggester，基于 FST 的前缀补全），输入为标题和标签，权重来自热度
+    title_suggest = fields.CompletionField()
 
-    content = fields.TextField()
+    description = fields.TextField(index_options='offsets')
+
+    content = fields.TextField(index_options='offsets')
 
     slug = fields.KeywordField()
 
@@ -79,7 +85,7 @@ class ArticleDocument(Document):
         settings = {
             'number_of_shards': 1,
             'number_of_replicas': 0,  # 单节点环境设为 0
-            # 高亮配置
+            # 高亮配置（字段已记录偏移量，高亮不再依赖重新分析原文）
             'highlight': {
                 'max_analyzed_offset': 1000000
             }
@@ -138,18 +144,16 @@ class ArticleDocument(Document):
         """提取标签 slug 列表"""
         return [tag.slug for tag in instance.tags.all()]
 
+    def prepare_title_suggest(self, instance):
+        """搜索建议输入（标题 + 标签）和热度权重"""
+        from articles.indexing import build_title_suggest
+        return build_title_suggest(instance, [tag.name for tag in instance.tags.all()])
+
     def prepare_content(self, instance):
-        """处理内容 - 移除 HTML 标签和代码块"""
-        import re
-        content = instance.content or ''
-
-        # 移除 HTML 标签
-        content = re.sub(r'<[^>]+>', ' ', content)
-        # 移除代码块
-        content = re.sub(r'<code[^>]*>.*?</code>', ' ', content, flags=re.DOTALL)
-        content = re.sub(r'<pre[^>]*>.*?</pre>', ' ', content, flags=re.DOTALL)
-        # 移除多余空白
-        content = re.sub(r'\s+', ' ', content).strip()
+        """处理内容 - 使用保存时计算好的纯文本（已移除 HTML 标签和代码块）"""
+        if instance.content and not instance.plain_text:
+            instance.process_content()
+        content = instance.plain_text
 
         # 限制内容长度（ES 性能优化）
         return content[:50000] if content else ''
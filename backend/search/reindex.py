@@ -0,0 +1,361 @@
+"""
+零停机索引重建（蓝绿部署）
+
+原先的重建在原索引上逐条 update，重建期间搜索会看到不完整的索引。这里改为：
+1. 创建带版本号的新索引（关闭 refresh、副本数为 0，加快写入）
+2. 按 ID 区间切片，由多个 Celery worker 并行写入新索引
+   （重建期间发件箱同时写入新旧两个索引）
+3. 全部切片完成后恢复 refresh/副本设置，补齐重建期间的变更
+4. 原子切换别名到新索引，旧索引保留用于回滚
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils.cache_utils import CacheKeyBuilder
+
+logger = logging.getLogger(__name__)
+
+# 重建期间的写入设置
+BULK_WRITE_SETTINGS = {
+    'refresh_interval': '-1',
+    'number_of_replicas': 0,
+}
+
+
+def _document():
+    from .models import ArticleDocument
+    return ArticleDocument
+
+
+def _client():
+    return _document()._get_connection()
+
+
+class BlueGreenReindex:
+    """基于别名切换的索引重建"""
+
+    # 重建进行中的目标索引（发件箱据此双写）
+    TARGET_KEY = "es_reindex_target"
+    TARGET_TTL = 6 * 3600
+
+    @classmethod
+    def alias(cls) -> str:
+        """搜索和写入使用的别名（即文档定义中的索引名）"""
+        return _document()._index._name
+
+    @classmethod
+    def current_target(cls) -> Optional[str]:
+        """正在重建的新索引名，没有进行中的重建时返回 None"""
+        try:
+            return cache.get(CacheKeyBuilder.build(cls.TARGET_KEY))
+        except Exception:
+            return None
+
+    @classmethod
+    def versioned_indices(cls) -> List[str]:
+        """所有带版本号的索引（按版本升序）"""
+        pattern = f"{cls.alias()}_v*"
+        indices = _client().indices.get(index=pattern, ignore_unavailable=True, allow_no_indices=True)
+        return sorted(indices.keys())
+
+    @classmethod
+    def aliased_indices(cls) -> List[str]:
+        """别名当前指向的索引"""
+        client = _client()
+        if not client.indices.exists_alias(name=cls.alias()):
+            return []
+        return list(client.indices.get_alias(name=cls.alias()).keys())
+
+    # ============================================
+    # 重建步骤
+    # ============================================
+
+    @classmethod
+    def create_index(cls) -> str:
+        """
+        创建带版本号的新索引（映射和分析器与文档定义一致）
+
+        Returns:
+            str: 新索引名
+        """
+        index_name = f"{cls.alias()}_v{timezone.now():%Y%m%d%H%M%S}"
+        index = _document()._index.clone(name=index_name)
+        index.settings(**BULK_WRITE_SETTINGS)
+        index.create()
+
+        cache.set(CacheKeyBuilder.build(cls.TARGET_KEY), index_name, cls.TARGET_TTL)
+        logger.info(f"创建新索引 {index_name}")
+        return index_name
+
+    @classmethod
+    def plan_slices(cls, slices: int) -> List[Tuple[int, int]]:
+        """
+        按 ID 区间均分已发布文章
+
+        Args:
+            slices: 切片数
+
+        Returns:
+            list: [(起始 ID, 结束 ID（不含）), ...]
+        """
+        from django.db.models import Max, Min
+        from articles.models import Article
+
+        bounds = Article.objects.filter(
+            status=Article.ArticleStatus.PUBLISHED
+        ).aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            return []
+
+        low, high = bounds['low'], bounds['high'] + 1
+        step = max(1, -(-(high - low) // max(1, slices)))
+        return [(start, min(start + step, high)) for start in range(low, high, step)]
+
+    @classmethod
+    def index_slice(cls, index_name: str, start_id: int, end_id: int) -> Dict[str, Any]:
+        """将 [start_id, end_id) 区间内的已发布文章写入新索引"""
+        from articles.indexing import indexing_queryset, stream_index
+
+        queryset = indexing_queryset().filter(pk__gte=start_id, pk__lt=end_id)
+        result = stream_index(queryset, index_name=index_name)
+        logger.info(
+            f"切片 [{start_id}, {end_id}) 写入 {index_name} 完成: "
+            f"{result['indexed']} 篇, {result['docs_per_second']} 篇/秒"
+        )
+        return result
+
+    @classmethod
+    def catch_up(cls, index_name: str, started_at, retry_ids: Iterable[int] = ()) -> Dict[str, int]:
+        """
+        补齐重建期间的变更
+
+        1. 重新写入重建开始后更新过的文章，以及切片中写入失败的文章
+        2. 删除新索引中已不再发布的文章（切片读取后才被删除/撤回的）
+
+        Args:
+            index_name: 新索引
+            started_at: 重建开始时间
+            retry_ids: 切片中写入失败的文章 ID
+        """
+        from django.db.models import Q
+        from elasticsearch.helpers import bulk, scan
+        from articles.indexing import indexing_queryset, stream_index
+        from articles.models import Article
+
+        updated = indexing_queryset().filter(
+            Q(updated_at__gte=started_at - timedelta(minutes=1)) | Q(pk__in=list(retry_ids))
+        )
+        result = stream_index(updated, index_name=index_name)
+
+        client = _client()
+        client.indices.refresh(index=index_name)
+        indexed_ids = {
+            int(hit['_id'])
+            for hit in scan(client, index=index_name, query={'query': {'match_all': {}}}, _source=False)
+        }
+        published_ids = set(
+            Article.objects.filter(
+                status=Article.ArticleStatus.PUBLISHED
+            ).values_list('id', flat=True)
+        )
+        stale_ids = indexed_ids - published_ids
+        if stale_ids:
+            bulk(client, (
+                {'_op_type': 'delete', '_index': index_name, '_id': article_id}
+                for article_id in stale_ids
+            ), raise_on_error=False)
+
+        return {
+            'updated': result['indexed'],
+            'failed': result['failed'],
+            'deleted': len(stale_ids),
+        }
+
+    @classmethod
+    def restore_settings(cls, index_name: str) -> None:
+        """恢复文档定义中的 refresh/副本设置"""
+        index_settings = _document()._index._settings
+        client = _client()
+        client.indices.put_settings(index=index_name, settings={
+            'refresh_interval': index_settings.get('refresh_interval', '1s'),
+            'number_of_replicas': index_settings.get('number_of_replicas', 1),
+        })
+        client.indices.refresh(index=index_name)
+
+    @classmethod
+    def swap_alias(cls, index_name: str) -> List[str]:
+        """
+        原子切换别名到新索引
+
+        首次切换时同名的实体索引需要删除（别名不能与索引同名），删除前先复制为
+        最早的版本号索引，回滚时可以切回
+
+        Returns:
+            list: 切换前别名指向的索引
+        """
+        client = _client()
+        alias = cls.alias()
+        previous = cls.aliased_indices()
+
+        actions = [{'remove': {'index': old, 'alias': alias}} for old in previous]
+        if not previous and client.indices.exists(index=alias):
+            legacy_copy = cls._preserve_legacy_index()
+            logger.warning(f"{alias} 是实体索引，已复制为 {legacy_copy}，切换别名时删除原索引")
+            actions.append({'remove_index': {'index': alias}})
+            previous = [legacy_copy]
+        actions.append({'add': {'index': index_name, 'alias': alias}})
+
+        client.indices.update_aliases(actions=actions)
+        logger.info(f"别名 {alias} 已切换: {previous} -> {index_name}")
+
+        # 别名指向的索引变化，缓存的搜索结果全部失效
+        from .cache import SearchResultCache
+        SearchResultCache.bump()
+        return previous
+
+    @classmethod
+    def _preserve_legacy_index(cls) -> str:
+        """
+        将与别名同名的实体索引完整复制为版本号索引（使用原索引自己的映射和分析器）
+
+        Returns:
+            str: 副本索引名（版本号最小，rollback 会切回它）
+        """
+        client = _client()
+        alias = cls.alias()
+        legacy_copy = f"{alias}_v{0:014d}"
+
+        if not client.indices.exists(index=legacy_copy):
+            legacy = client.indices.get(index=alias)[alias]
+            legacy_settings = legacy['settings']['index']
+            index_settings = {
+                key: legacy_settings[key]
+                for key in ('number_of_shards', 'number_of_replicas', 'analysis')
+                if key in legacy_settings
+            }
+            client.indices.create(index=legacy_copy, settings=index_settings, mappings=legacy['mappings'])
+
+        # 重复执行时覆盖为原索引的最新内容
+        client.reindex(
+            source={'index': alias},
+            dest={'index': legacy_copy},
+            wait_for_completion=True,
+            refresh=True,
+            request_timeout=3600,
+        )
+        return legacy_copy
+
+    @classmethod
+    def prune(cls, keep: Optional[int] = None) -> List[str]:
+        """删除多余的旧版本索引（别名指向的索引不会删除）"""
+        keep = keep if keep is not None else settings.ES_REINDEX_KEEP_INDICES
+        active = set(cls.aliased_indices())
+        candidates = [name for name in cls.versioned_indices() if name not in active]
+        removed = candidates[:max(0, len(candidates) - keep)]
+        for name in removed:
+            _client().indices.delete(index=name, ignore_unavailable=True)
+            logger.info(f"删除旧索引 {name}")
+        return removed
+
+    @classmethod
+    def finalize(cls, index_name: str, started_at, retry_ids: Iterable[int] = ()) -> Dict[str, Any]:
+        """
+        所有切片完成后：恢复设置、补齐变更、切换别名、清理旧索引
+
+        Args:
+            retry_ids: 切片中写入失败的文章 ID，在补齐阶段重新写入
+
+        Raises:
+            RuntimeError: 补齐后仍有文章写入失败（不切换别名，新索引不完整）
+        """
+        try:
+            cls.restore_settings(index_name)
+            caught_up = cls.catch_up(index_name, started_at, retry_ids)
+            if caught_up['failed']:
+                raise RuntimeError(f"{caught_up['failed']} 篇文章写入新索引失败，放弃切换别名")
+            previous = cls.swap_alias(index_name)
+        finally:
+            cache.delete(CacheKeyBuilder.build(cls.TARGET_KEY))
+
+        # 以下步骤在别名切换后执行：新索引已在线，失败时只记录日志，不能放弃重建
+        # 别名切换后补一次：覆盖 catch_up 与切换之间的变更
+        try:
+            cls.catch_up(index_name, timezone.now() - timedelta(minutes=5))
+        except Exception as e:
+            logger.error(f"别名切换后补齐 {index_name} 失败（发件箱会继续同步后续变更）: {e}")
+
+        try:
+            removed = cls.prune()
+        except Exception as e:
+            logger.error(f"清理旧索引失败: {e}")
+            removed = []
+
+        return {
+            'index': index_name,
+            'previous': previous,
+            'caught_up': caught_up,
+            'removed': removed,
+        }
+
+    @classmethod
+    def abort(cls, index_name: str) -> None:
+        """
+        放弃重建：停止双写并删除新索引，别名保持不变
+
+        新索引已被别名指向时（切换已完成）不删除
+        """
+        # 先停止双写，再删除索引
+        cache.delete(CacheKeyBuilder.build(cls.TARGET_KEY))
+        if index_name in cls.aliased_indices():
+            logger.error(f"{index_name} 已是别名指向的索引，不删除")
+            return
+        _client().indices.delete(index=index_name, ignore_unavailable=True)
+        logger.warning(f"已放弃索引重建，删除 {index_name}")
+
+    @classmethod
+    def rollback(cls) -> Optional[str]:
+        """
+        将别名切回上一个版本的索引
+
+        Returns:
+            str: 回滚到的索引名，没有可回滚的版本时返回 None
+        """
+        active = cls.aliased_indices()
+        versions = cls.versioned_indices()
+        if not active or active[-1] not in versions:
+            return None
+
+        position = versions.index(active[-1])
+        if position == 0:
+            return None
+
+        target = versions[position - 1]
+        _client().indices.put_settings(index=target, settings={'refresh_interval': '1s'})
+        cls.swap_alias(target)
+        # 旧索引错过了切换后的变更，补齐一次
+        cls.catch_up(target, timezone.now() - timedelta(days=1))
+        return target
+
+    # ============================================
+    # 同步执行（管理命令 --sync）
+    # ============================================
+
+    @classmethod
+    def run(cls, slices: int = 1) -> Dict[str, Any]:
+        """在当前进程中依次执行全部步骤"""
+        started_at = timezone.now()
+        index_name = cls.create_index()
+        failed_ids = []
+        try:
+            for start_id, end_id in cls.plan_slices(slices):
+                failed_ids += cls.index_slice(index_name, start_id, end_id)['failed_ids']
+            return cls.finalize(index_name, started_at, failed_ids)
+        except Exception:
+            cls.abort(index_name)
+            raise
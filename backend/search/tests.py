@@ -1,3 +1,100 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from elasticsearch_dsl import MultiSearch
+from rest_framework.test import APIRequestFactory
+
+from articles.views import ArticleViewSet
+from stats.models import UserAction
+from users.models import User
+from utils.testing import RedisTestMixin
+
+from .analytics import SearchAnalytics
+from .models import ArticleDocument
+from .views import SearchView
+
+
+class BatchMultiSearchTests(SimpleTestCase):
+    """批量接口的 msearch 请求：子查询头部只能包含索引，分页写入请求体"""
+
+    def _multi_search(self, plans):
+        multi_search = MultiSearch(index=ArticleDocument._index._name)
+        for plan in plans:
+            multi_search = multi_search.add(plan['search'])
+        return multi_search.to_dict()
+
+    def test_search_sub_query_puts_pagination_in_body(self):
+        search = SearchView()._build_search('django', {}, 3, 10, '-published_at')
+        header, body = self._multi_search([{'search': search}])
+
+        self.assertEqual(set(header), {'index'})
+        self.assertEqual(body['from'], 20)
+        self.assertEqual(body['size'], 10)
+
+    def test_batch_plan_headers_only_contain_index(self):
+        request = APIRequestFactory().post('/api/articles/batch/')
+        request.user = AnonymousUser()
+        view = ArticleViewSet()
+
+        plans = [
+            view._plan_batch_query(request, 'list', {'page': '2', 'page_size': '5'}),
+            view._plan_batch_query(request, 'search', {'q': 'django', 'page': '2'}),
+            view._plan_batch_query(request, 'suggest', {'q': 'dj'}),
+        ]
+        lines = self._multi_search(plans)
+
+        headers = lines[::2]
+        self.assertEqual(len(headers), 3)
+        for header in headers:
+            self.assertEqual(set(header), {'index'})
+
+
+class SearchAnalyticsTests(RedisTestMixin, TestCase):
+    """搜索事件写入与热门查询衰减"""
+
+    def test_flush_round_trip(self):
+        user = User.objects.create_user(username='searcher', password='password')
+        SearchAnalytics.record('Django  ORM', user_id=user.pk, ip_address='10.0.0.1', result_count=3)
+        SearchAnalytics.record('python', user_id=user.pk + 1000, result_count=0)
+
+        self.assertEqual(SearchAnalytics.flush(), 2)
+        self.assertEqual(SearchAnalytics.flush(), 0)
+
+        actions = {action.metadata['normalized']: action for action in UserAction.objects.all()}
+        self.assertEqual(set(actions), {'django orm', 'python'})
+        self.assertEqual(actions['django orm'].action_type, UserAction.ActionType.SEARCH)
+        self.assertEqual(actions['django orm'].user_id, user.pk)
+        self.assertEqual(actions['django orm'].metadata['result_count'], 3)
+        # 写入前已不存在的用户置空
+        self.assertIsNone(actions['python'].user_id)
+
+    def test_failed_flush_keeps_events(self):
+        for query in ('django', 'python', 'rust'):
+            SearchAnalytics.record(query, result_count=1)
+
+        with mock.patch.object(UserAction.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                SearchAnalytics.flush()
+        self.assertEqual(UserAction.objects.count(), 0)
+
+        SearchAnalytics.record('go', result_count=1)
+        self.assertEqual(SearchAnalytics.flush(), 3)
+        self.assertEqual(SearchAnalytics.flush(), 1)
+        self.assertEqual(UserAction.objects.count(), 4)
+
+    @override_settings(SEARCH_TRENDING_DECAY=0.5, SEARCH_TRENDING_MIN_SCORE=1, SEARCH_TRENDING_SIZE=2)
+    def test_decay_scales_and_prunes_trending(self):
+        for query, times in (('django', 4), ('rust', 3), ('python', 2), ('go', 1)):
+            for _ in range(times):
+                SearchAnalytics.record(query, result_count=1)
+        # 无结果的查询不计入热门
+        SearchAnalytics.record('nothing', result_count=0)
+
+        self.assertEqual(SearchAnalytics.decay(), 2)
+        self.assertEqual(SearchAnalytics.trending(), [
+            {'query': 'django', 'score': 2.0},
+            {'query': 'rust', 'score': 1.5},
+        ])
+        self.assertEqual(SearchAnalytics.trending_with_prefix('Dj'), ['django'])
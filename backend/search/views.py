@@ -9,6 +9,7 @@
 5. 支持更多搜索选项
 """
 
+import hashlib
 import logging
 from typing import Optional, List, Dict, Any
 
@@ -21,8 +22,14 @@ from drf_yasg import openapi
 from elasticsearch_dsl import Q
 from elasticsearch.exceptions import ApiError, TransportError
 
+from .analytics import SearchAnalytics
+from .cache import SearchResultCache
+from .execution import SearchUnavailable, es_breaker, run_search
+from .fallback import LocalSearchIndex
 from .models import ArticleDocument
+from utils import get_client_ip
 from utils.cache_utils import CacheKeyBuilder, get_or_set
+from utils.timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +37,32 @@ logger = logging.getLogger(__name__)
 # 搜索配置常量
 MAX_PAGE_SIZE = 100  # 最大每页数量
 DEFAULT_PAGE_SIZE = 20
+ES_MAX_RESULT_WINDOW = 10000  # 与 ES 默认 index.max_result_window 一致
 DEFAULT_SEARCH_TIMEOUT = 3  # ES 查询超时（秒）
 MIN_QUERY_LENGTH = 2  # 最小查询长度
+MAX_FALLBACK_RESULTS = 1000  # 降级搜索最多返回的匹配数
+# 搜索聚合：facet 名称（即 ES 字段名） -> 返回的桶数量（published_at 为按月直方图）
+FACET_SIZES = {
+    'category_slug': 20,
+    'tags_names': 30,
+    'locale': 10,
+    'project_status': 10,
+    'published_at': None,
+}
+
+# 高亮模式
+HIGHLIGHT_FULL = 'full'
+HIGHLIGHT_TITLE = 'title'
+HIGHLIGHT_NONE = 'none'
+HIGHLIGHT_MODES = (HIGHLIGHT_FULL, HIGHLIGHT_TITLE, HIGHLIGHT_NONE)
+
+MAX_SUGGEST_SIZE = 20  # 搜索建议最大数量
+MAX_SUGGEST_PREFIX_LENGTH = 50  # 搜索建议前缀最大长度
+
+
+def normalize_suggest_query(query: str) -> str:
+    """规范化建议前缀：去除首尾空白、合并连续空白、转小写（与 completion 字段的分析器一致）"""
+    return ' '.join(query.split()).lower()[:MAX_SUGGEST_PREFIX_LENGTH]
 
 
 class SearchView(APIView):
@@ -93,6 +124,20 @@ class SearchView(APIView):
                 enum=['published_at', 'view_count', 'like_count', '-published_at', '-view_count', '-like_count'],
                 default='-published_at'
             ),
+            openapi.Parameter(
+                'highlight',
+                openapi.IN_QUERY,
+                description='高亮模式：full 标题/描述/正文片段，title 仅标题（列表页），none 不高亮',
+                type=openapi.TYPE_STRING,
+                enum=['full', 'title', 'none'],
+                default='full'
+            ),
+            openapi.Parameter(
+                'facets',
+                openapi.IN_QUERY,
+                description='返回聚合计数（逗号分隔）：category_slug, tags_names, locale, project_status, published_at（按月）',
+                type=openapi.TYPE_STRING
+            ),
         ],
         responses={200: openapi.Response(description='搜索成功')}
     )
@@ -101,20 +146,21 @@ class SearchView(APIView):
         query = self._get_query_param(request)
         page, page_size = self._get_pagination_params(request)
         sort_by = request.query_params.get('sort', '-published_at')
+        highlight = request.query_params.get('highlight', HIGHLIGHT_FULL)
+        facets = sorted({f.strip() for f in request.query_params.get('facets', '').split(',') if f.strip()})
 
         # 参数验证
-        if not query:
-            return self._error_response('请输入搜索关键词', status.HTTP_400_BAD_REQUEST)
-
-        if len(query) < MIN_QUERY_LENGTH:
-            return self._error_response(
-                f'搜索关键词至少需要 {MIN_QUERY_LENGTH} 个字符',
-                status.HTTP_400_BAD_REQUEST
-            )
+        error = self._validate_params(query, highlight, facets, page, page_size)
+        if error:
+            return self._error_response(error, status.HTTP_400_BAD_REQUEST)
 
         try:
-            # 暂时禁用缓存，直接执行搜索
-            result = self._perform_search(query, request, page, page_size, sort_by)
+            result = self.cached_search(
+                query, request.query_params, page, page_size, sort_by, highlight, facets
+            )
+            # 规范化后大小写不同的查询共用缓存，回显本次请求的原始查询词
+            result = {**result, 'query': query}
+            self._record_search(request, query, page, result)
 
             return Response({
                 'code': 200,
@@ -122,12 +168,12 @@ class SearchView(APIView):
                 'data': result
             })
 
+        except SearchUnavailable:
+            # 熔断器打开，直接使用本地降级索引
+            return self._fallback_response(query, request, page, page_size, sort_by)
         except (ApiError, TransportError) as e:
             logger.error(f"Elasticsearch 搜索失败: {e}, 查询: {query}")
-            return self._error_response(
-                '搜索服务暂时不可用，请稍后重试',
-                status.HTTP_503_SERVICE_UNAVAILABLE
-            )
+            return self._fallback_response(query, request, page, page_size, sort_by)
         except Exception as e:
             logger.exception(f"搜索处理异常: {e}")
             return self._error_response(
@@ -135,6 +181,63 @@ class SearchView(APIView):
                 status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def cached_search(
+        self,
+        query: str,
+        params,
+        page: int,
+        page_size: int,
+        sort_by: str,
+        highlight: str = HIGHLIGHT_FULL,
+        facets: List[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        带缓存的搜索（热门查询预热也通过这里写入缓存）
+
+        缓存键包含索引代数，文章发布/更新同步到 ES 后旧缓存自动失效
+        """
+        cache_params = self._cache_params(query, params, page, page_size, sort_by)
+        cache_params['highlight'] = highlight
+        cache_params['facets'] = list(facets)
+        return SearchResultCache.get_or_search(
+            cache_params,
+            lambda: self._perform_search(query, params, page, page_size, sort_by, highlight, facets)
+        )
+
+    @timed('analytics')
+    def _record_search(self, request, query: str, page: int, result: Dict[str, Any]) -> None:
+        """记录搜索行为（只记录第一页，翻页不重复计数）"""
+        if page != 1:
+            return
+        user = request.user
+        SearchAnalytics.record(
+            query,
+            user_id=user.id if user.is_authenticated else None,
+            ip_address=get_client_ip(request),
+            result_count=result.get('total', 0),
+        )
+
+    def _validate_params(self, query: str, highlight: str, facets: List[str],
+                         page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> Optional[str]:
+        """校验查询参数，返回错误信息（合法时返回 None）"""
+        if page * page_size > ES_MAX_RESULT_WINDOW:
+            return f'页码过大，超过 {ES_MAX_RESULT_WINDOW} 条'
+
+        unknown_facets = [facet for facet in facets if facet not in FACET_SIZES]
+        if unknown_facets:
+            return f"facets 参数只支持 {', '.join(FACET_SIZES)}"
+
+        if highlight not in HIGHLIGHT_MODES:
+            return f"highlight 参数只支持 {', '.join(HIGHLIGHT_MODES)}"
+
+        if not query:
+            return '请输入搜索关键词'
+
+        if len(query) < MIN_QUERY_LENGTH:
+            return f'搜索关键词至少需要 {MIN_QUERY_LENGTH} 个字符'
+
+        return None
+
     def _get_query_param(self, request) -> str:
         """获取并清理查询参数"""
         return request.query_params.get('q', '').strip()
@@ -148,22 +251,69 @@ class SearchView(APIView):
         )
         return page, page_size
 
+    def _cache_params(self, query: str, params, page: int, page_size: int, sort_by: str) -> Dict[str, Any]:
+        """规范化影响结果的参数（与 _apply_filters 使用的参数一致），作为缓存键"""
+        tags = sorted({t.strip() for t in params.get('tags', '').split(',') if t.strip()})
+        featured = params.get('featured', '').lower() in ('true', '1')
+        return {
+            'q': ' '.join(query.split()).lower(),
+            'category': params.get('category') or '',
+            'locale': params.get('locale') or '',
+            'tags': tags,
+            'featured': featured,
+            'sort': sort_by,
+            'page': page,
+            'page_size': page_size,
+        }
+
     def _perform_search(
         self,
         query: str,
-        request,
+        params,
         page: int,
         page_size: int,
-        sort_by: str
+        sort_by: str,
+        highlight: str = HIGHLIGHT_FULL,
+        facets: List[str] = ()
     ) -> Dict[str, Any]:
-        """执行实际的搜索操作"""
+        """执行实际的搜索操作（facets 非空时在同一请求中返回聚合计数）"""
+        search = self._build_search(
+            query, params, page, page_size, sort_by, highlight, facets
+        )
+        # 超时是请求参数，不能放进 _build_search（msearch 会把 _params 写入每个子查询的头部）
+        search = search.params(request_timeout=DEFAULT_SEARCH_TIMEOUT)
+
+        # 执行搜索
+        response = run_search(search)
+
+        with timed('format'):
+            return self._format_result(response, query, page, page_size, facets)
+
+    def _build_search(
+        self,
+        query: str,
+        params,
+        page: int,
+        page_size: int,
+        sort_by: str,
+        highlight: str = HIGHLIGHT_FULL,
+        facets: List[str] = ()
+    ):
+        """
+        构建搜索查询（不执行，批量接口通过 msearch 一起提交）
+
+        分页通过切片写入请求体；不要使用 search.params()，msearch 会把它写入子查询头部，ES 会拒绝
+        """
 
         # 构建搜索查询
         search = ArticleDocument.search()
 
-        # 设置超时和最大结果窗口
-        search = search.params(request_timeout=DEFAULT_SEARCH_TIMEOUT)
-        search = search.params(size=page_size, from_=(page - 1) * page_size)
+        # 分页
+        start = (page - 1) * page_size
+        search = search[start:start + page_size]
+
+        # 结果中不使用正文，避免每条命中返回最多 5 万字的 _source
+        search = search.source(excludes=['content', 'title_suggest'])
 
         # 构建多字段查询
         should_queries = [
@@ -191,33 +341,33 @@ class SearchView(APIView):
         search = search.query(q)
 
         # 应用过滤器
-        search = self._apply_filters(search, request.query_params)
+        search = self._apply_filters(search, params)
 
         # 配置高亮
-        search = search.highlight(
-            'title',
-            'description',
-            'content',
-            fragment_size=150,
-            number_of_fragments=3,
-            pre_tags=['<mark>'],
-            post_tags=['</mark>'],
-            no_match_size=150
-        )
+        search = self._apply_highlight(search, highlight)
 
         # 排序
         search = search.sort(sort_by)
 
-        # 执行搜索
-        response = search.execute()
+        # 聚合（计数基于当前查询和过滤条件）
+        return self._apply_facets(search, facets)
 
+    def _format_result(
+        self,
+        response,
+        query: str,
+        page: int,
+        page_size: int,
+        facets: List[str] = ()
+    ) -> Dict[str, Any]:
+        """序列化搜索结果"""
         # 序列化结果
         results = [self._serialize_hit(hit) for hit in response]
 
         # 获取总数（兼容不同版本的 elasticsearch-dsl）
         total = response.hits.total.value if hasattr(response.hits.total, 'value') else response.hits.total
 
-        return {
+        result = {
             'items': results,
             'total': total,
             'page': page,
@@ -225,6 +375,174 @@ class SearchView(APIView):
             'query': query,
             'max_score': response.hits.max_score
         }
+        if facets:
+            result['facets'] = self._serialize_facets(response, facets)
+        return result
+
+    def _apply_facets(self, search, facets: List[str]):
+        """添加 terms / date_histogram 聚合"""
+        for facet in facets:
+            if facet == 'published_at':
+                search.aggs.bucket(
+                    facet, 'date_histogram',
+                    field='published_at',
+                    calendar_interval='month',
+                    format='yyyy-MM',
+                    min_doc_count=1
+                )
+            else:
+                search.aggs.bucket(facet, 'terms', field=facet, size=FACET_SIZES[facet])
+        return search
+
+    def _serialize_facets(self, response, facets: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """聚合结果：{facet: [{'key': 值, 'count': 文章数}, ...]}"""
+        result = {}
+        for facet in facets:
+            buckets = getattr(response.aggregations, facet).buckets
+            if facet == 'published_at':
+                # 按时间倒序，最近的月份在前
+                result[facet] = [
+                    {'key': bucket.key_as_string, 'count': bucket.doc_count}
+                    for bucket in reversed(buckets)
+                ]
+            else:
+                result[facet] = [
+                    {'key': bucket.key, 'count': bucket.doc_count}
+                    for bucket in buckets
+                ]
+        return result
+
+    def _fallback_response(self, query: str, request, page: int, page_size: int, sort_by: str) -> Response:
+        """ES 不可用时的降级响应（本地索引也不可用时返回 503）"""
+        try:
+            result = self._fallback_search(query, request.query_params, page, page_size, sort_by)
+        except Exception as e:
+            logger.exception(f"本地降级搜索失败: {e}")
+            result = None
+
+        if result is None:
+            response = self._error_response(
+                '搜索服务暂时不可用，请稍后重试',
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = es_breaker.open_seconds
+            return response
+
+        self._record_search(request, query, page, result)
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': result
+        })
+
+    @timed('fallback')
+    def _fallback_search(
+        self,
+        query: str,
+        params,
+        page: int,
+        page_size: int,
+        sort_by: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        使用本地全文索引检索，过滤和排序在 MySQL 中完成
+
+        结果格式与 ES 搜索一致（无评分和高亮），附带 fallback 标记
+
+        Returns:
+            dict: 搜索结果；本地索引不可用时返回 None
+        """
+        from articles.models import Article
+
+        article_ids = LocalSearchIndex.search(query, limit=MAX_FALLBACK_RESULTS)
+        if article_ids is None:
+            return None
+
+        queryset = Article.objects.filter(
+            pk__in=article_ids,
+            status=Article.ArticleStatus.PUBLISHED
+        ).select_related('category').prefetch_related('tags')
+
+        # 与 _apply_filters 相同的过滤条件
+        if params.get('category'):
+            queryset = queryset.filter(category__slug=params['category'])
+        if params.get('locale'):
+            queryset = queryset.filter(locale=params['locale'])
+        tag_list = [t.strip() for t in params.get('tags', '').split(',') if t.strip()]
+        if tag_list:
+            queryset = queryset.filter(tags__name__in=tag_list).distinct()
+        if params.get('featured', '').lower() in ('true', '1'):
+            queryset = queryset.filter(featured=True)
+
+        field = sort_by.lstrip('-')
+        if field in ('published_at', 'view_count', 'like_count'):
+            queryset = queryset.order_by(sort_by, '-pk')
+            articles = list(queryset)
+        else:
+            # 按相关度（本地索引返回的顺序）
+            position = {article_id: index for index, article_id in enumerate(article_ids)}
+            articles = sorted(queryset, key=lambda article: position[article.pk])
+
+        start = (page - 1) * page_size
+        items = [
+            {
+                'id': article.pk,
+                'title': article.title,
+                'description': article.description,
+                'slug': article.slug,
+                'category': {
+                    'name': article.category.name,
+                    'slug': article.category.slug,
+                } if article.category else None,
+                'tags': [{'name': tag.name} for tag in article.tags.all()],
+                'locale': article.locale,
+                'reading_time': article.reading_time,
+                'featured': article.featured,
+                'view_count': article.view_count,
+                'like_count': article.like_count,
+                'comment_count': article.comment_count,
+                'published_at': article.published_at.isoformat() if article.published_at else None,
+                'score': None,
+            }
+            for article in articles[start:start + page_size]
+        ]
+
+        return {
+            'items': items,
+            'total': len(articles),
+            'page': page,
+            'page_size': page_size,
+            'query': query,
+            'max_score': None,
+            'fallback': True,
+        }
+
+    def _apply_highlight(self, search, mode: str):
+        """
+        按模式配置高亮（unified 高亮器，使用索引中记录的偏移量）
+
+        Args:
+            search: 搜索对象
+            mode: full 标题/描述/正文片段，title 仅标题，none 不高亮
+        """
+        if mode == HIGHLIGHT_NONE:
+            return search
+
+        options = {
+            'type': 'unified',
+            'pre_tags': ['<mark>'],
+            'post_tags': ['</mark>'],
+        }
+        if mode == HIGHLIGHT_TITLE:
+            # 返回完整标题
+            return search.highlight_options(**options).highlight('title', number_of_fragments=0)
+
+        return search.highlight_options(
+            fragment_size=150,
+            number_of_fragments=3,
+            no_match_size=150,
+            **options
+        ).highlight('title', 'description', 'content')
 
     def _apply_filters(self, search, params: Dict[str, str]):
         """应用搜索过滤器"""
@@ -341,81 +659,98 @@ class SearchSuggestView(APIView):
     )
     def get(self, request):
         """获取搜索建议"""
-        query = request.query_params.get('q', '').strip()
-        size = min(20, int(request.query_params.get('size', 10)))
+        query = normalize_suggest_query(request.query_params.get('q', ''))
+        try:
+            size = max(1, min(MAX_SUGGEST_SIZE, int(request.query_params.get('size', 10))))
+        except ValueError:
+            size = 10
 
-        if not query or len(query) < 1:
-            return Response({
-                'code': 200,
-                'message': 'success',
-                'data': {
-                    'suggestions': []
-                }
-            })
+        if not query:
+            return self._suggestions_response([])
 
-        try:
-            # 缓存建议结果（缓存 10 分钟）
-            cache_key = CacheKeyBuilder.build('search_suggest', query, size)
+        # 以该前缀开头的热门查询排在前面（实时读取，不进入建议缓存）
+        trending = SearchAnalytics.trending_with_prefix(query, size)
 
+        try:
+            # 按规范化后的前缀缓存固定数量的建议（缓存 10 分钟），不同 size 共用一份缓存
+            cache_key = CacheKeyBuilder.build(
+                'search_suggest', hashlib.md5(query.encode('utf-8')).hexdigest()
+            )
             suggestions = get_or_set(
                 cache_key,
-                lambda: self._get_suggestions(query, size),
+                lambda: self._get_suggestions(query, MAX_SUGGEST_SIZE),
                 ttl=600
             )
+            return self._suggestions_response(self._merge_suggestions(trending, suggestions, size))
 
-            return Response({
-                'code': 200,
-                'message': 'success',
-                'data': {
-                    'suggestions': suggestions
-                }
-            })
-
-        except ElasticsearchException as e:
+        except SearchUnavailable:
+            return self._suggestions_response(trending)
+        except (ApiError, TransportError) as e:
             logger.error(f"Elasticsearch 建议查询失败: {e}")
-            return Response({
-                'code': 200,
-                'message': 'success',
-                'data': {
-                    'suggestions': []  # 失败时返回空列表
-                }
-            })
+            # 失败时只返回热门查询
+            return self._suggestions_response(trending)
         except Exception as e:
             logger.exception(f"搜索建议异常: {e}")
-            return Response({
-                'code': 200,
-                'message': 'success',
-                'data': {
-                    'suggestions': []
-                }
-            })
+            return self._suggestions_response(trending)
+
+    def _merge_suggestions(self, trending: List[str], titles: List[str], size: int) -> List[str]:
+        """热门查询在前、文章标题在后，忽略大小写去重"""
+        merged = []
+        seen = set()
+        for suggestion in trending + titles:
+            key = suggestion.lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(suggestion)
+        return merged[:size]
+
+    def _suggestions_response(self, suggestions: List[str]) -> Response:
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'suggestions': suggestions
+            }
+        })
 
     def _get_suggestions(self, query: str, size: int) -> List[str]:
-        """获取搜索建议列表"""
-        search = ArticleDocument.search()
-
-        # 使用 completion suggester 或 match_phrase_prefix
-        # 这里使用 match_phrase_prefix 支持前缀匹配
-        search = search.query('match_phrase_prefix', title={'query': query, 'boost': 2})
-
-        # 限制结果数量
-        search = search[:size]
-
-        response = search.execute()
-
-        # 提取建议标题
-        suggestions = set()  # 使用集合去重
-        for hit in response:
-            title = self._extract_title(hit)
-            if title:
-                suggestions.add(title)
-
-        return list(suggestions)[:size]
+        """
+        使用 completion suggester 获取建议
+
+        前缀匹配在内存中的 FST 上完成，不执行查询、不返回命中文档，
+        _source 只取标题（标签前缀命中时也返回文章标题）
+        """
+        response = run_search(self._build_suggest_search(query, size))
+        return self._extract_suggestions(response, size)
+
+    def _build_suggest_search(self, query: str, size: int):
+        """构建 completion suggester 查询"""
+        search = ArticleDocument.search().source(['title']).extra(size=0)
+        return search.suggest(
+            'title',
+            query,
+            completion={
+                'field': 'title_suggest',
+                'size': size,
+                'skip_duplicates': True,
+            }
+        )
 
-    def _extract_title(self, hit) -> Optional[str]:
-        """从搜索结果中提取标题"""
-        hit_dict = hit.to_dict()
-        title = hit_dict.get('title', '')
+    def _extract_suggestions(self, response, size: int) -> List[str]:
+        """从 suggester 响应中提取去重后的标题"""
+        suggestions = []
+        for entry in response.suggest.title:
+            for option in entry.options:
+                title = self._extract_title(option)
+                if title and title not in suggestions:
+                    suggestions.append(title)
+
+        return suggestions[:size]
+
+    def _extract_title(self, option) -> Optional[str]:
+        """从建议结果的 _source 中提取标题"""
+        source = option.to_dict().get('_source') or {}
+        title = source.get('title', '')
         if isinstance(title, list):
             title = title[0] if title else ''
         return title.strip() if title else None
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stats", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="populararticles",
+            name="period",
+            field=models.CharField(
+                choices=[
+                    ("daily", "每日"),
+                    ("weekly", "每周"),
+                    ("monthly", "每月"),
+                    ("all_time", "全部时间"),
+                    ("feed_popular", "热门 feed"),
+                    ("feed_featured", "精选 feed"),
+                ],
+                max_length=20,
+                unique=True,
+                verbose_name="周期",
+            ),
+        ),
+    ]
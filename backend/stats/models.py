@@ -112,6 +112,9 @@ class PopularArticles(models.Model):
         WEEKLY = 'weekly', _('每周')
         MONTHLY = 'monthly', _('每月')
         ALL_TIME = 'all_time', _('全部时间')
+        # 排行 feed 的持久化快照（见 articles/feeds.py）
+        FEED_POPULAR = 'feed_popular', _('热门 feed')
+        FEED_FEATURED = 'feed_featured', _('精选 feed')
 
     period = models.CharField(
         _('周期'),
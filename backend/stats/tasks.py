@@ -307,3 +307,80 @@ def sync_popular_articles_cache():
 
 
 from typing import Optional
+
+
+@shared_task
+def flush_search_events():
+    """
+    将 Redis 中缓冲的搜索事件批量写入 UserAction
+
+    Returns:
+        dict: 写入结果
+    """
+    from search.analytics import SearchAnalytics
+
+    try:
+        flushed = SearchAnalytics.flush()
+        if flushed:
+            logger.info(f"写入搜索事件: {flushed} 条")
+        return {
+            'status': 'success',
+            'flushed': flushed
+        }
+
+    except Exception as e:
+        logger.error(f"写入搜索事件失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def decay_trending_queries():
+    """
+    衰减热门查询得分
+
+    Returns:
+        dict: 衰减结果
+    """
+    from search.analytics import SearchAnalytics
+
+    try:
+        remaining = SearchAnalytics.decay()
+        return {
+            'status': 'success',
+            'remaining': remaining
+        }
+
+    except Exception as e:
+        logger.error(f"衰减热门查询失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+@shared_task
+def warm_trending_search_cache():
+    """
+    预热热门查询的搜索结果缓存
+
+    Returns:
+        dict: 预热结果
+    """
+    from search.analytics import SearchAnalytics
+
+    try:
+        warmed = SearchAnalytics.warm_cache()
+        return {
+            'status': 'success',
+            'warmed': warmed
+        }
+
+    except Exception as e:
+        logger.error(f"预热搜索缓存失败: {e}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
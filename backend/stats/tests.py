@@ -1,3 +1,67 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .views import StatsViewSet
+
+DB_ERROR = 'Access denied for user root@db.internal:3306'
+REDIS_ERROR = 'Error connecting to redis-secret.internal:6379'
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class BrokenCursor:
+    def __enter__(self):
+        raise Exception(DB_ERROR)
+
+    def __exit__(self, *exc):
+        return False
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('search.execution.es_breaker.snapshot', return_value={
+    'name': 'elasticsearch', 'status': 'open', 'window_requests': 12, 'window_failures': 9, 'retry_in': 20,
+})
+@mock.patch('django_redis.get_redis_connection', side_effect=Exception(REDIS_ERROR))
+@mock.patch('django.db.connection.cursor', return_value=BrokenCursor())
+class HealthCheckTests(SimpleTestCase):
+    """公开的健康检查只返回状态，错误信息和积压只对管理员返回"""
+
+    def _get(self, action, user=None):
+        request = APIRequestFactory().get(f'/api/stats/{action}/')
+        if user is not None:
+            force_authenticate(request, user=user)
+        return StatsViewSet.as_view({'get': action})(request)
+
+    def test_anonymous_health_hides_error_details(self, cursor, get_redis_connection, snapshot):
+        response = self._get('health')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data['data'], {
+            'database': 'error',
+            'redis': 'error',
+            'elasticsearch': 'open',
+            'status': 'error',
+        })
+        body = json.dumps(response.data, ensure_ascii=False)
+        for secret in ('error:', DB_ERROR, REDIS_ERROR, 'search_outbox_backlog', 'window_failures'):
+            self.assertNotIn(secret, body)
+
+    def test_anonymous_cannot_read_health_details(self, cursor, get_redis_connection, snapshot):
+        self.assertIn(self._get('health_details').status_code, (401, 403))
+
+    @mock.patch('stats.views.StatsViewSet._outbox_backlog', return_value=42)
+    def test_admin_health_details_include_errors_and_backlog(self, backlog, cursor, get_redis_connection, snapshot):
+        admin = mock.Mock(is_staff=True, is_authenticated=True)
+        data = self._get('health_details', user=admin).data['data']
+
+        self.assertEqual(data['database'], f'error: {DB_ERROR}')
+        self.assertEqual(data['redis'], f'error: {REDIS_ERROR}')
+        self.assertEqual(data['elasticsearch']['window_failures'], 9)
+        self.assertEqual(data['search_outbox_backlog'], 42)
@@ -2,11 +2,13 @@
 统计视图
 """
 
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from drf_yasg.utils import swagger_auto_schema
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
@@ -17,8 +19,14 @@ from users.models import User
 from comments.models import Comment
 from categories.models import Category
 from tags.models import Tag
+from utils.timing import RequestTimingStats, timed
 from .serializers import OverviewSerializer
 
+logger = logging.getLogger(__name__)
+
+# 健康检查统计发件箱积压的上限（避免每次探测都全表计数）
+HEALTH_OUTBOX_COUNT_LIMIT = 10000
+
 
 class StatsViewSet(ViewSet):
     """统计视图集 - 允许匿名访问"""
@@ -37,49 +45,53 @@ class StatsViewSet(ViewSet):
         today_start = timezone.make_aware(timezone.datetime(today.year, today.month, today.day))
 
         # 使用单次聚合查询获取文章统计
-        article_stats = Article.objects.aggregate(
-            total_articles=Count('id', filter=Q(status='published')),
-            articles_draft=Count('id', filter=Q(status='draft')),
-            total_views=Sum('view_count'),
-            today_articles=Count('id', filter=Q(status='published', created_at__gte=today_start))
-        )
+        with timed('articles'):
+            article_stats = Article.objects.aggregate(
+                total_articles=Count('id', filter=Q(status='published')),
+                articles_draft=Count('id', filter=Q(status='draft')),
+                total_views=Sum('view_count'),
+                today_articles=Count('id', filter=Q(status='published', created_at__gte=today_start))
+            )
         total_articles = article_stats['total_articles'] or 0
         articles_draft = article_stats['articles_draft'] or 0
         total_views = article_stats['total_views'] or 0
         today_articles = article_stats['today_articles'] or 0
 
         # 用户和评论统计
-        total_users = User.objects.count()
-        today_users = User.objects.filter(created_at__gte=today_start).count()
-        total_comments = Comment.objects.filter(status='approved').count()
-        today_comments = Comment.objects.filter(created_at__gte=today_start).count()
+        with timed('users_comments'):
+            total_users = User.objects.count()
+            today_users = User.objects.filter(created_at__gte=today_start).count()
+            total_comments = Comment.objects.filter(status='approved').count()
+            today_comments = Comment.objects.filter(created_at__gte=today_start).count()
 
         # 按分类统计（单次查询）
-        category_stats = dict(
-            Article.objects.filter(status='published')
-            .values('category__category_type')
-            .annotate(count=Count('id'))
-            .values_list('category__category_type', 'count')
-        )
+        with timed('categories'):
+            category_stats = dict(
+                Article.objects.filter(status='published')
+                .values('category__category_type')
+                .annotate(count=Count('id'))
+                .values_list('category__category_type', 'count')
+            )
         # 确保所有分类都有值
         for category_type in ['blog', 'projects', 'life', 'notes']:
             category_stats.setdefault(category_type, 0)
 
         # 热门分类和标签（使用 select_related/prefetch_related 优化）
-        popular_categories = list(
-            Category.objects
-            .filter(articles__status='published')
-            .annotate(article_count=Count('articles'))
-            .order_by('-article_count')[:5]
-            .values('slug', 'name', 'article_count')
-        )
-
-        popular_tags = list(
-            Tag.objects
-            .annotate(article_count=Count('articles'))
-            .order_by('-article_count')[:10]
-            .values('slug', 'name', 'color', 'article_count')
-        )
+        with timed('popular'):
+            popular_categories = list(
+                Category.objects
+                .filter(articles__status='published')
+                .annotate(article_count=Count('articles'))
+                .order_by('-article_count')[:5]
+                .values('slug', 'name', 'article_count')
+            )
+
+            popular_tags = list(
+                Tag.objects
+                .annotate(article_count=Count('articles'))
+                .order_by('-article_count')[:10]
+                .values('slug', 'name', 'color', 'article_count')
+            )
 
         data = {
             'total_articles': total_articles,
@@ -135,10 +147,144 @@ class StatsViewSet(ViewSet):
         queryset = queryset.select_related('author', 'category').prefetch_related('tags')
         queryset = queryset.order_by('-view_count')[:limit]
 
-        serializer = ArticleListSerializer(queryset, many=True)
+        with timed('serialize'):
+            data = ArticleListSerializer(queryset, many=True).data
 
         return Response({
             'code': 200,
             'message': 'success',
-            'data': serializer.data
+            'data': data
         })
+
+    @swagger_auto_schema(
+        operation_summary='获取热门搜索',
+        operation_description='按时间衰减后的搜索次数排序的热门查询词',
+        responses={200: '查询词列表'}
+    )
+    @action(detail=False, methods=['get'])
+    def trending_searches(self, request):
+        """热门搜索"""
+        from search.analytics import SearchAnalytics
+
+        try:
+            limit = max(1, min(50, int(request.query_params.get('limit', 10))))
+        except ValueError:
+            limit = 10
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': SearchAnalytics.trending(limit)
+        })
+
+    @swagger_auto_schema(
+        operation_summary='获取接口耗时统计',
+        operation_description='按接口、阶段汇总的耗时直方图（各阶段与 Server-Timing 响应头一致），需要管理员权限',
+        responses={200: '耗时统计'}
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def request_timing(self, request):
+        """接口耗时统计"""
+        from django.conf import settings
+
+        try:
+            hours = int(request.query_params.get('hours', 1))
+        except ValueError:
+            hours = 1
+        hours = max(1, min(settings.REQUEST_TIMING_RETENTION_HOURS, hours))
+
+        endpoint = request.query_params.get('endpoint')
+        try:
+            timings = RequestTimingStats.snapshot(hours)
+        except Exception as e:
+            return Response({
+                'code': 503,
+                'message': f'读取耗时统计失败: {e}',
+                'data': None
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if endpoint:
+            timings = {name: phases for name, phases in timings.items() if endpoint in name}
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'hours': hours,
+                'endpoints': timings
+            }
+        })
+
+    @swagger_auto_schema(
+        operation_summary='健康检查',
+        operation_description='数据库、Redis 连通性及 Elasticsearch 熔断器状态（只返回 ok/error）',
+        responses={200: '健康状态'}
+    )
+    @action(detail=False, methods=['get'])
+    def health(self, request):
+        """健康检查（不直接请求 ES，只读取熔断器状态）"""
+        return self._health_response(detailed=False)
+
+    @swagger_auto_schema(
+        operation_summary='健康检查详情',
+        operation_description='健康检查的错误信息、熔断器窗口统计和索引发件箱积压，需要管理员权限',
+        responses={200: '健康状态'}
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def health_details(self, request):
+        """健康检查详情"""
+        return self._health_response(detailed=True)
+
+    def _health_response(self, detailed: bool) -> Response:
+        """
+        执行健康检查
+
+        匿名可访问的接口只返回 ok/error，错误信息（可能包含主机名、端口、认证错误）
+        和发件箱积压只在 detailed 时返回
+        """
+        from django.db import connection
+        from django_redis import get_redis_connection
+        from search.execution import es_breaker
+
+        checks = {}
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            checks['database'] = 'ok'
+        except Exception as e:
+            logger.error(f"健康检查：数据库不可用: {e}")
+            checks['database'] = f'error: {e}' if detailed else 'error'
+
+        try:
+            get_redis_connection('default').ping()
+            checks['redis'] = 'ok'
+        except Exception as e:
+            logger.error(f"健康检查：Redis 不可用: {e}")
+            checks['redis'] = f'error: {e}' if detailed else 'error'
+
+        breaker = es_breaker.snapshot()
+        checks['elasticsearch'] = breaker if detailed else breaker['status']
+
+        if detailed:
+            checks['search_outbox_backlog'] = self._outbox_backlog()
+
+        healthy = checks['database'] == 'ok' and checks['redis'] == 'ok'
+        # ES 熔断时服务已降级但仍可用
+        checks['status'] = 'degraded' if healthy and breaker['status'] != 'closed' else ('ok' if healthy else 'error')
+
+        return Response({
+            'code': 200 if healthy else 503,
+            'message': 'success' if healthy else 'unhealthy',
+            'data': checks
+        }, status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def _outbox_backlog(self):
+        """索引发件箱积压行数（最多统计到 HEALTH_OUTBOX_COUNT_LIMIT，超过时返回 "N+"）"""
+        from articles.models import ArticleIndexOutbox
+
+        try:
+            backlog = ArticleIndexOutbox.objects.values('pk')[:HEALTH_OUTBOX_COUNT_LIMIT + 1].count()
+        except Exception:
+            return None
+        return f'{HEALTH_OUTBOX_COUNT_LIMIT}+' if backlog > HEALTH_OUTBOX_COUNT_LIMIT else backlog
@@ -23,6 +23,8 @@ class CacheKeyPrefix:
     # 文章相关
     ARTICLE_STATS = "article_stats"
     ARTICLE_DETAIL = "article_detail"
+    ARTICLE_DETAIL_SLUG = "article_detail_slug"
+    ARTICLE_DETAIL_VERSION = "article_detail_version"
     ARTICLE_LIST = "article_list"
     ARTICLE_RELATED = "article_related"
 
@@ -78,6 +80,16 @@ class CacheKeyBuilder:
         """文章详情缓存键"""
         return cls.build(CacheKeyPrefix.ARTICLE_DETAIL, article_id)
 
+    @classmethod
+    def article_detail_slug(cls, slug: str) -> str:
+        """文章详情缓存键（按 slug）"""
+        return cls.build(CacheKeyPrefix.ARTICLE_DETAIL_SLUG, slug)
+
+    @classmethod
+    def article_detail_version(cls, lookup: Union[str, int]) -> str:
+        """文章详情版本号键（按 ID 或 slug），失效时递增"""
+        return cls.build(CacheKeyPrefix.ARTICLE_DETAIL_VERSION, lookup)
+
     @classmethod
     def article_list(cls, **params) -> str:
         """文章列表缓存键"""
@@ -360,6 +372,25 @@ def delete_pattern(pattern: str) -> int:
     return 0
 
 
+def bump_version(version_key: str) -> int:
+    """
+    递增版本号（不存在时初始化）
+
+    Args:
+        version_key: 版本号缓存键
+
+    Returns:
+        int: 递增后的版本号
+    """
+    cache.add(version_key, 0, None)
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # 并发下键被删除，重新初始化
+        cache.set(version_key, 1, None)
+        return 1
+
+
 # ============================================
 # 缓存预热和刷新
 # ============================================
@@ -396,20 +427,35 @@ class CacheWarmer:
         return True
 
     @classmethod
-    def invalidate_article(cls, article_id: int) -> bool:
+    def invalidate_article(cls, article_id: int, slugs: Optional[List[str]] = None) -> bool:
         """
         使文章相关缓存失效
 
         Args:
             article_id: 文章 ID
+            slugs: 文章的 slug 列表（包括变更前的旧 slug）
 
         Returns:
             bool: 是否成功
         """
+        slugs = set(slugs or [])
+
+        # 从已缓存的详情中取出缓存时的 slug，防止 slug 变更后旧键残留
+        cached_detail = cache.get(CacheKeyBuilder.article_detail(article_id))
+        if isinstance(cached_detail, dict) and cached_detail.get('data'):
+            slugs.add(cached_detail['data'].get('slug'))
+        slugs.discard(None)
+        slugs.discard('')
+
+        # 先递增版本号，使正在回源的请求放弃写入旧数据
+        for lookup in [article_id, *slugs]:
+            bump_version(CacheKeyBuilder.article_detail_version(lookup))
+
         keys_to_delete = [
             CacheKeyBuilder.article_stats(article_id),
             CacheKeyBuilder.article_detail(article_id),
         ]
+        keys_to_delete.extend(CacheKeyBuilder.article_detail_slug(slug) for slug in slugs)
         delete_many(keys_to_delete)
 
         # 删除文章列表缓存
@@ -0,0 +1,242 @@
+"""
+熔断器模块
+
+状态保存在 Redis 中，所有进程共享：
+- closed: 正常放行，按时间窗口统计失败率（慢调用计为失败）
+- open: 失败率超过阈值后打开，直接拒绝请求，调用方立即走降级逻辑
+- half_open: 打开一段时间后只放行少量探测请求，全部成功则关闭，任一失败则重新打开
+
+Redis 不可用时熔断器不生效（始终放行），不影响正常请求
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+
+from .cache_utils import CacheKeyBuilder
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求被拒绝"""
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class CircuitBreaker:
+    """基于 Redis 的共享熔断器"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_requests: int = 10,
+        window: int = 30,
+        slow_call_seconds: float = 2.0,
+        open_seconds: int = 30,
+        half_open_probes: int = 3,
+    ):
+        """
+        Args:
+            name: 熔断器名称（同名熔断器共享状态）
+            failure_rate: 打开熔断的失败率阈值
+            min_requests: 窗口内请求数达到该值才计算失败率
+            window: 统计窗口（秒）
+            slow_call_seconds: 超过该耗时的成功调用计为失败
+            open_seconds: 打开后多久进入半开状态（秒）
+            half_open_probes: 半开状态放行的探测请求数
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+    # ============================================
+    # Redis 键
+    # ============================================
+
+    def _key(self, *parts) -> str:
+        return CacheKeyBuilder.build('circuit', self.name, *parts)
+
+    def _window_key(self) -> str:
+        return self._key('window', int(time.time() // self.window))
+
+    # ============================================
+    # 状态
+    # ============================================
+
+    def _state(self, redis_conn) -> Dict[str, Any]:
+        raw = redis_conn.hgetall(self._key('state'))
+        state = {key.decode() if isinstance(key, bytes) else key: value for key, value in raw.items()}
+        status = state.get('status', self.CLOSED)
+        if isinstance(status, bytes):
+            status = status.decode()
+        return {
+            'status': status,
+            'opened_at': float(state.get('opened_at') or 0),
+        }
+
+    def _open(self, redis_conn, reason: str) -> None:
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.hset(self._key('state'), mapping={'status': self.OPEN, 'opened_at': time.time()})
+        pipe.delete(self._key('probes'), self._key('probe_successes'))
+        pipe.execute()
+        logger.warning(f"熔断器 {self.name} 打开: {reason}")
+
+    def _close(self, redis_conn) -> None:
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.delete(self._key('state'), self._key('probes'), self._key('probe_successes'), self._window_key())
+        pipe.execute()
+        logger.info(f"熔断器 {self.name} 关闭")
+
+    def allow_request(self) -> bool:
+        """
+        是否放行本次请求
+
+        Returns:
+            bool: False 表示熔断器打开，调用方应直接降级
+        """
+        try:
+            redis_conn = _get_redis()
+            state = self._state(redis_conn)
+
+            if state['status'] == self.CLOSED:
+                return True
+
+            if state['status'] == self.OPEN:
+                if time.time() - state['opened_at'] < self.open_seconds:
+                    return False
+                # 冷却结束，进入半开状态（多个进程同时转换是幂等的）
+                redis_conn.hset(self._key('state'), 'status', self.HALF_OPEN)
+
+            # 半开状态：只放行有限个探测请求
+            pipe = redis_conn.pipeline(transaction=True)
+            pipe.incr(self._key('probes'))
+            pipe.expire(self._key('probes'), self.open_seconds)
+            probes, _ = pipe.execute()
+            return probes <= self.half_open_probes
+        except Exception as e:
+            logger.debug(f"熔断器 {self.name} 状态不可用，放行请求: {e}")
+            return True
+
+    def record_success(self, elapsed: float = 0) -> None:
+        """
+        记录成功调用（慢调用计为失败）
+
+        Args:
+            elapsed: 调用耗时（秒）
+        """
+        if elapsed > self.slow_call_seconds:
+            self.record_failure(reason=f'慢调用 {elapsed:.2f}s')
+            return
+
+        try:
+            redis_conn = _get_redis()
+            state = self._state(redis_conn)
+            if state['status'] == self.HALF_OPEN:
+                successes = redis_conn.incr(self._key('probe_successes'))
+                if successes >= self.half_open_probes:
+                    self._close(redis_conn)
+                return
+
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.hincrby(self._window_key(), 'total', 1)
+            pipe.expire(self._window_key(), self.window * 2)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"熔断器 {self.name} 记录失败: {e}")
+
+    def record_failure(self, reason: str = '') -> None:
+        """记录失败调用，达到阈值时打开熔断器"""
+        try:
+            redis_conn = _get_redis()
+            state = self._state(redis_conn)
+            if state['status'] == self.HALF_OPEN:
+                self._open(redis_conn, f'探测请求失败 {reason}')
+                return
+            if state['status'] == self.OPEN:
+                return
+
+            key = self._window_key()
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.hincrby(key, 'total', 1)
+            pipe.hincrby(key, 'failures', 1)
+            pipe.expire(key, self.window * 2)
+            total, failures, _ = pipe.execute()
+
+            if total >= self.min_requests and failures / total >= self.failure_rate:
+                self._open(redis_conn, f'失败率 {failures}/{total} {reason}')
+        except Exception as e:
+            logger.debug(f"熔断器 {self.name} 记录失败: {e}")
+
+    def call(self, func: Callable, *args, is_failure: Callable[[Exception], bool] = None, **kwargs):
+        """
+        通过熔断器执行调用
+
+        Args:
+            func: 被保护的调用
+            is_failure: 判断异常是否计为失败（如 4xx 参数错误不应触发熔断），默认全部计为失败
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f'{self.name} 熔断中')
+
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure(reason=type(e).__name__)
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前状态（用于健康检查）"""
+        try:
+            redis_conn = _get_redis()
+            state = self._state(redis_conn)
+            window = redis_conn.hgetall(self._window_key())
+            window = {
+                (key.decode() if isinstance(key, bytes) else key): int(value)
+                for key, value in window.items()
+            }
+        except Exception as e:
+            return {'name': self.name, 'status': 'unknown', 'error': str(e)}
+
+        retry_in = None
+        if state['status'] == self.OPEN:
+            retry_in = max(0, round(self.open_seconds - (time.time() - state['opened_at']), 1))
+
+        return {
+            'name': self.name,
+            'status': state['status'],
+            'window_requests': window.get('total', 0),
+            'window_failures': window.get('failures', 0),
+            'retry_in': retry_in,
+        }
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    按配置创建熔断器
+
+    配置项 CIRCUIT_BREAKERS = {name: {failure_rate, min_requests, ...}}
+    """
+    options = getattr(settings, 'CIRCUIT_BREAKERS', {}).get(name, {})
+    return CircuitBreaker(name, **options)
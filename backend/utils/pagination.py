@@ -0,0 +1,226 @@
+"""
+分页工具模块
+
+提供不透明游标的编码/解码（ES search_after 与 MySQL keyset 分页共用）
+以及基于 (排序字段, id) 的 keyset 分页器
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    将分页状态编码为不透明游标
+
+    Args:
+        state: 分页状态（必须可 JSON 序列化）
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps(state, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    解码游标
+
+    Args:
+        cursor: encode_cursor 生成的游标字符串
+
+    Returns:
+        dict: 分页状态
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f'无效的游标: {e}')
+
+    if not isinstance(state, dict):
+        raise ValueError('无效的游标')
+    return state
+
+
+class KeysetPaginator:
+    """
+    Keyset（seek）分页器
+
+    按 (排序字段, id) 定位下一页，避免 OFFSET 扫描和每页 COUNT(*)：
+    第 N 页的成本与第 1 页相同，只读取 page_size + 1 行。
+
+    排序字段允许为 NULL（如 published_at），按 MySQL 的语义处理：
+    NULL 视为最小值，降序时排在最后，升序时排在最前。
+    """
+
+    CURSOR_KIND = 'db'
+
+    def __init__(
+        self,
+        queryset,
+        field: str,
+        page_size: int = 20,
+        descending: bool = True,
+    ):
+        """
+        Args:
+            queryset: 已过滤的查询集
+            field: 主排序字段（id 作为次级排序保证唯一）
+            page_size: 每页数量
+            descending: 是否降序
+        """
+        self.queryset = queryset
+        self.field = field
+        self.page_size = page_size
+        self.descending = descending
+        self._model_field = queryset.model._meta.get_field(field)
+
+    def _ordered(self):
+        prefix = '-' if self.descending else ''
+        return self.queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+    def _after(self, value, last_id):
+        """构建“位于游标之后”的过滤条件"""
+        from django.db.models import Q
+
+        field = self.field
+        if self.descending:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'id__lt': last_id})
+            return (
+                Q(**{f'{field}__lt': value}) |
+                Q(**{field: value, 'id__lt': last_id}) |
+                Q(**{f'{field}__isnull': True})
+            )
+
+        if value is None:
+            return (
+                Q(**{f'{field}__isnull': True, 'id__gt': last_id}) |
+                Q(**{f'{field}__isnull': False})
+            )
+        return (
+            Q(**{f'{field}__gt': value}) |
+            Q(**{field: value, 'id__gt': last_id})
+        )
+
+    def _dump_value(self, value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _load_value(self, value):
+        """
+        将游标中的排序值还原为字段类型
+
+        Raises:
+            ValueError: 值的类型与排序字段不符（游标被篡改）
+        """
+        from django.core.exceptions import ValidationError
+        from django.db import models
+        from django.utils.dateparse import parse_datetime
+
+        if value is None:
+            return None
+        if isinstance(self._model_field, models.DateTimeField):
+            parsed = parse_datetime(value) if isinstance(value, str) else None
+            if parsed is None:
+                raise ValueError('无效的游标')
+            return parsed
+        if isinstance(value, (dict, list, bool)):
+            raise ValueError('无效的游标')
+        try:
+            return self._model_field.to_python(value)
+        except (ValidationError, TypeError) as e:
+            raise ValueError(f'无效的游标: {e}')
+
+    def decode(self, cursor: str) -> Dict[str, Any]:
+        """
+        解码并校验游标
+
+        Raises:
+            ValueError: 游标无效或与当前排序不匹配
+        """
+        state = decode_cursor(cursor)
+        if state.get('kind') != self.CURSOR_KIND or state.get('field') != self.field \
+                or state.get('desc') != self.descending or 'id' not in state:
+            raise ValueError('游标与当前排序不匹配')
+        # bool 是 int 的子类，需要单独排除
+        if not isinstance(state['id'], int) or isinstance(state['id'], bool):
+            raise ValueError('无效的游标')
+        state['value'] = self._load_value(state.get('value'))
+        return state
+
+    def paginate(self, cursor: Optional[str] = None, offset: int = 0) -> Dict[str, Any]:
+        """
+        获取一页数据
+
+        Args:
+            cursor: 上一页返回的 next_cursor，None 表示从头开始
+            offset: 无游标时的偏移量（兼容页码分页）
+
+        Returns:
+            dict: {'items': 当前页对象列表, 'next_cursor': 下一页游标或 None}
+
+        Raises:
+            ValueError: 游标无效
+        """
+        queryset = self._ordered()
+
+        if cursor:
+            state = self.decode(cursor)
+            queryset = queryset.filter(self._after(state['value'], state['id']))
+            offset = 0
+
+        items = list(queryset[offset:offset + self.page_size + 1])
+        has_next = len(items) > self.page_size
+        items = items[:self.page_size]
+
+        next_cursor = None
+        if has_next and items:
+            last = items[-1]
+            next_cursor = encode_cursor({
+                'kind': self.CURSOR_KIND,
+                'field': self.field,
+                'desc': self.descending,
+                'value': self._dump_value(getattr(last, self.field)),
+                'id': last.pk,
+            })
+
+        return {
+            'items': items,
+            'next_cursor': next_cursor,
+        }
+
+    def approximate_count(self, ttl: Optional[int] = None) -> int:
+        """
+        缓存的近似总数
+
+        同一过滤条件在 TTL 内只执行一次 COUNT(*)
+
+        Args:
+            ttl: 缓存时间（秒），默认使用 KEYSET_COUNT_CACHE_TTL
+
+        Returns:
+            int: 总数（可能滞后 TTL 秒）
+        """
+        from django.conf import settings
+        from django.core.cache import cache
+        from utils.cache_utils import CacheKeyBuilder
+
+        sql_digest = hashlib.md5(str(self.queryset.query).encode('utf-8')).hexdigest()
+        cache_key = CacheKeyBuilder.build('keyset_count', self.queryset.model._meta.label_lower, sql_digest)
+
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(cache_key, count, ttl or settings.KEYSET_COUNT_CACHE_TTL)
+        return count
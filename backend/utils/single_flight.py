@@ -0,0 +1,136 @@
+"""
+请求合并（single-flight）
+
+多个进程同时发起完全相同的查询时，只有一个进程（leader）真正执行，
+其余进程轮询 Redis 中的结果键并复用序列化后的结果。
+等待超过上限（或 leader 执行失败）时各自独立执行，不会因合并而失败
+
+Redis 不可用时直接执行
+"""
+
+import json
+import logging
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+
+from .cache_utils import CacheKeyBuilder
+
+logger = logging.getLogger(__name__)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class SingleFlight:
+    """基于 Redis 的跨进程请求合并"""
+
+    def __init__(
+        self,
+        namespace: str,
+        result_ttl: float = 2.0,
+        lock_ttl: float = 10.0,
+        max_wait: float = 0.5,
+        poll_interval: float = 0.01,
+    ):
+        """
+        Args:
+            namespace: 键命名空间
+            result_ttl: 结果保留时间（秒），只需覆盖等待者的轮询窗口
+            lock_ttl: leader 锁的超时时间（秒），防止 leader 崩溃后锁不释放
+            max_wait: 等待者最长等待时间（秒）
+            poll_interval: 等待者轮询间隔（秒）
+        """
+        self.namespace = namespace
+        self.result_ttl = result_ttl
+        self.lock_ttl = lock_ttl
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+
+    def _keys(self, key: str):
+        return (
+            CacheKeyBuilder.build('single_flight', self.namespace, key, 'lock'),
+            CacheKeyBuilder.build('single_flight', self.namespace, key, 'result'),
+        )
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        执行 func，相同 key 的并发调用共享一次执行的结果
+
+        Args:
+            key: 规范化后的请求标识
+            func: 实际执行的调用，返回值必须可 JSON 序列化
+
+        Returns:
+            func 的返回值（等待者拿到的是反序列化后的副本）
+        """
+        lock_key, result_key = self._keys(key)
+        try:
+            redis_conn = _get_redis()
+            is_leader = redis_conn.set(lock_key, 1, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.debug(f"请求合并不可用，直接执行: {e}")
+            return func()
+
+        if is_leader:
+            return self._lead(redis_conn, lock_key, result_key, func)
+
+        result = self._wait(redis_conn, lock_key, result_key)
+        if result is not None:
+            return result
+
+        # 等待超时或 leader 失败，独立执行
+        return func()
+
+    def _lead(self, redis_conn, lock_key: str, result_key: str, func: Callable[[], Any]) -> Any:
+        """leader：执行并发布结果"""
+        try:
+            result = func()
+        except Exception:
+            # 释放锁，等待者发现锁消失且没有结果后独立执行
+            try:
+                redis_conn.delete(lock_key)
+            except Exception:
+                pass
+            raise
+
+        try:
+            pipe = redis_conn.pipeline(transaction=True)
+            pipe.set(result_key, json.dumps(result), px=int(self.result_ttl * 1000))
+            pipe.delete(lock_key)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"发布合并结果失败: {e}")
+        return result
+
+    def _wait(self, redis_conn, lock_key: str, result_key: str) -> Any:
+        """等待者：轮询结果，返回 None 表示需要独立执行"""
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while time.monotonic() < deadline:
+                # 先检查锁再读结果：锁已释放时结果必然已写入（两者在同一事务中完成）
+                pipe = redis_conn.pipeline(transaction=False)
+                pipe.exists(lock_key)
+                pipe.get(result_key)
+                locked, raw = pipe.execute()
+                if raw is not None:
+                    return json.loads(raw)
+                if not locked:
+                    return None
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            logger.debug(f"等待合并结果失败: {e}")
+        return None
+
+
+def get_single_flight(namespace: str) -> SingleFlight:
+    """
+    按配置创建请求合并器
+
+    配置项 SINGLE_FLIGHT = {namespace: {result_ttl, lock_ttl, max_wait, poll_interval}}
+    """
+    options = getattr(settings, 'SINGLE_FLIGHT', {}).get(namespace, {})
+    return SingleFlight(namespace, **options)
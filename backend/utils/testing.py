@@ -0,0 +1,41 @@
+"""
+测试辅助工具
+
+依赖 Redis 的测试（计数缓冲、熔断器、搜索统计等）使用 RedisTestMixin：
+1. 键前缀替换为每个测试独立的前缀，不影响开发环境中的数据
+2. 测试结束后删除该前缀下的所有键
+3. Redis 不可用时跳过测试
+"""
+
+import uuid
+import unittest
+
+from django.test import override_settings
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class RedisTestMixin:
+    """为每个测试分配独立的 Redis 键前缀"""
+
+    def setUp(self):
+        super().setUp()
+        try:
+            self.redis = _get_redis()
+            self.redis.ping()
+        except Exception as e:
+            raise unittest.SkipTest(f'Redis 不可用: {e}')
+
+        self.redis_prefix = f"test_{uuid.uuid4().hex[:12]}"
+        prefix_override = override_settings(REDIS_CACHE_PREFIX=self.redis_prefix)
+        prefix_override.enable()
+        self.addCleanup(prefix_override.disable)
+        self.addCleanup(self._delete_redis_keys)
+
+    def _delete_redis_keys(self):
+        keys = list(self.redis.scan_iter(match=f"{self.redis_prefix}:*", count=500))
+        if keys:
+            self.redis.delete(*keys)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .testing import RedisTestMixin
+
+
+class CircuitBreakerTests(RedisTestMixin, SimpleTestCase):
+    """熔断器按时间窗口统计失败率，按冷却时间进入半开状态"""
+
+    NOW = 1_000_000.0
+
+    def setUp(self):
+        super().setUp()
+        self.now = self.NOW
+        clock = mock.patch('utils.circuit_breaker.time')
+        fake_time = clock.start()
+        fake_time.time.side_effect = lambda: self.now
+        fake_time.monotonic.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+
+        self.breaker = CircuitBreaker(
+            'test', failure_rate=0.5, min_requests=4, window=30, open_seconds=10, half_open_probes=2
+        )
+
+    def _open_breaker(self):
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.snapshot()['status'], CircuitBreaker.OPEN)
+
+    def test_window_counts_requests_and_failures(self):
+        self.breaker.record_success()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['status'], CircuitBreaker.CLOSED)
+        self.assertEqual(snapshot['window_requests'], 3)
+        self.assertEqual(snapshot['window_failures'], 1)
+
+        # 窗口滚动后重新计数
+        self.now += 30
+        self.assertEqual(self.breaker.snapshot()['window_requests'], 0)
+
+    def test_opens_only_after_min_requests(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.snapshot()['status'], CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['status'], CircuitBreaker.OPEN)
+        self.assertEqual(snapshot['retry_in'], 10)
+
+    def test_slow_success_counts_as_failure(self):
+        self.breaker.record_success(elapsed=self.breaker.slow_call_seconds + 1)
+        self.assertEqual(self.breaker.snapshot()['window_failures'], 1)
+
+    def test_open_rejects_until_cooldown_then_half_opens(self):
+        self._open_breaker()
+
+        self.now += 9
+        self.assertFalse(self.breaker.allow_request())
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: None)
+
+        self.now += 2
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.snapshot()['status'], CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        # 超出探测请求数
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_closes_after_successful_probes(self):
+        self._open_breaker()
+        self.now += 11
+
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.snapshot()['status'], CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.snapshot()['status'], CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_failure_reopens(self):
+        self._open_breaker()
+        self.now += 11
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['status'], CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
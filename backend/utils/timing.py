@@ -0,0 +1,209 @@
+"""
+请求分阶段耗时统计
+
+视图中用 timed('阶段名') 包裹（或装饰）耗时操作，耗时累加到当前请求上：
+1. 响应头 Server-Timing 输出各阶段耗时，浏览器开发者工具中可直接查看
+2. 按接口、阶段汇总为 Redis 中的直方图（按小时分桶），由统计接口读取分位数
+
+请求之外（Celery 任务、shell）调用 timed 时不做任何记录
+"""
+
+import logging
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .cache_utils import CacheKeyBuilder
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上限（毫秒），超过最后一个桶计入 inf
+TIMING_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_timer: ContextVar[Optional['RequestTimer']] = ContextVar('request_timer', default=None)
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+class RequestTimer:
+    """单个请求的阶段耗时（毫秒），同名阶段多次执行时累加"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    def header(self) -> str:
+        """Server-Timing 响应头"""
+        return ', '.join(f"{name};dur={duration:.1f}" for name, duration in self.phases.items())
+
+
+def record_phase(name: str, duration_ms: float) -> None:
+    """记录外部测得的耗时（如 ES 返回的 took）"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, duration_ms)
+
+
+class timed(ContextDecorator):
+    """
+    记录代码块耗时，可用作上下文管理器或装饰器
+
+        with timed('stats'):
+            ...
+
+        @timed('stats')
+        def _get_batch_stats(...):
+            ...
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = 0.0
+
+    def _recreate_cm(self):
+        # 装饰器每次调用使用新实例，避免并发和递归调用共享起始时间
+        return self.__class__(self.name)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_phase(self.name, (time.perf_counter() - self._start) * 1000)
+        return False
+
+
+class RequestTimingStats:
+    """按接口、阶段汇总的耗时直方图"""
+
+    KEY_PREFIX = "request_timing"
+
+    @classmethod
+    def _key(cls, hour: int) -> str:
+        return CacheKeyBuilder.build(cls.KEY_PREFIX, hour)
+
+    @staticmethod
+    def _bucket(duration_ms: float) -> str:
+        for bound in TIMING_BUCKETS:
+            if duration_ms <= bound:
+                return str(bound)
+        return 'inf'
+
+    @classmethod
+    def record(cls, endpoint: str, phases: Dict[str, float]) -> None:
+        """
+        写入一次请求的各阶段耗时
+
+        每小时一个哈希，字段为 "接口|阶段|桶"、"接口|阶段|count"、"接口|阶段|sum"
+        """
+        key = cls._key(int(time.time() // 3600))
+        try:
+            pipe = _get_redis().pipeline(transaction=False)
+            for phase, duration in phases.items():
+                field = f"{endpoint}|{phase}"
+                pipe.hincrby(key, f"{field}|{cls._bucket(duration)}", 1)
+                pipe.hincrby(key, f"{field}|count", 1)
+                pipe.hincrbyfloat(key, f"{field}|sum", round(duration, 3))
+            pipe.expire(key, settings.REQUEST_TIMING_RETENTION_HOURS * 3600)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"记录请求耗时失败: {e}")
+
+    @classmethod
+    def snapshot(cls, hours: int = 1) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        最近若干小时（含当前小时）的耗时汇总
+
+        Returns:
+            dict: {接口: {阶段: {count, avg_ms, p50_ms, p90_ms, p99_ms, buckets}}}
+                  分位数为所在桶的上限（估计值），超出最大桶时为 None
+        """
+        current = int(time.time() // 3600)
+        pipe = _get_redis().pipeline(transaction=False)
+        for hour in range(current - hours + 1, current + 1):
+            pipe.hgetall(cls._key(hour))
+
+        totals: Dict[str, Dict[str, float]] = {}
+        for data in pipe.execute():
+            for raw_field, raw_value in data.items():
+                field = raw_field.decode() if isinstance(raw_field, bytes) else raw_field
+                endpoint_phase, _, name = field.rpartition('|')
+                counters = totals.setdefault(endpoint_phase, {})
+                counters[name] = counters.get(name, 0) + float(raw_value)
+
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for endpoint_phase, counters in sorted(totals.items()):
+            endpoint, _, phase = endpoint_phase.rpartition('|')
+            count = int(counters.get('count', 0))
+            if not count:
+                continue
+            buckets = [
+                (bound, int(counters.get(str(bound), 0)))
+                for bound in TIMING_BUCKETS
+            ] + [('inf', int(counters.get('inf', 0)))]
+
+            result.setdefault(endpoint, {})[phase] = {
+                'count': count,
+                'avg_ms': round(counters.get('sum', 0) / count, 2),
+                'p50_ms': cls._percentile(buckets, count, 0.5),
+                'p90_ms': cls._percentile(buckets, count, 0.9),
+                'p99_ms': cls._percentile(buckets, count, 0.99),
+                'buckets': {str(bound): n for bound, n in buckets if n},
+            }
+        return result
+
+    @staticmethod
+    def _percentile(buckets: List[tuple], count: int, quantile: float) -> Optional[int]:
+        threshold = count * quantile
+        cumulative = 0
+        for bound, n in buckets:
+            cumulative += n
+            if cumulative >= threshold:
+                return None if bound == 'inf' else bound
+        return None
+
+
+def _endpoint_name(request) -> Optional[str]:
+    """接口标识：请求方法 + 路由名（如 GET article-list），未匹配路由时返回 None"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return f"{request.method} {match.view_name}"
+
+
+class ServerTimingMiddleware:
+    """
+    为每个请求创建 RequestTimer，响应时输出 Server-Timing 头并写入直方图
+
+    应放在 MIDDLEWARE 最前面，total 阶段包含其余中间件的耗时
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        timer.add('total', (time.perf_counter() - start) * 1000)
+
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timer.header()
+
+        endpoint = _endpoint_name(request)
+        if endpoint and settings.REQUEST_TIMING_HISTOGRAMS:
+            RequestTimingStats.record(endpoint, timer.phases)
+
+        return response